@@ -2,9 +2,18 @@
 # Copyright (c) 2020 VMware, Inc. All Rights Reserved.
 # SPDX-License-Identifier: BSD-2-Claus
 
-from container_service_extension.common.thread_local_data import init_thread_local_data  # noqa: E501
-import container_service_extension.logging.logger
-from container_service_extension.logging.logger import configure_null_logger
+import os
+
+import container_service_extension.common.utils.import_utils as import_utils
+
+# Set up first, so that imports of all other CSE modules get recorded
+if os.getenv(import_utils.IMPORT_TIME_REPORT_ENV_VAR):
+    import_utils.enable_import_time_report(
+        os.getenv(import_utils.IMPORT_TIME_REPORT_ENV_VAR))
+
+from container_service_extension.common.thread_local_data import init_thread_local_data  # noqa: E402 E501 I100 I202
+import container_service_extension.logging.logger  # noqa: E402
+from container_service_extension.logging.logger import configure_null_logger  # noqa: E402 E501
 
 init_thread_local_data()
 container_service_extension.logging.logger.configure_all_file_loggers()
@@ -14,6 +14,8 @@ from container_service_extension.client.de_cluster_native import DEClusterNative
 from container_service_extension.client.de_cluster_tkg_s import DEClusterTKGS
 import container_service_extension.client.tkgclient.rest as tkg_rest
 import container_service_extension.client.utils as client_utils
+from container_service_extension.common.constants.shared_constants import ClusterEntityKind  # noqa: E501
+from container_service_extension.common.constants.shared_constants import ClusterSummaryField  # noqa: E501
 from container_service_extension.common.constants.shared_constants import CSE_PAGINATION_DEFAULT_PAGE_SIZE, PaginationKey  # noqa: E501
 from container_service_extension.common.constants.shared_constants import CSE_PAGINATION_FIRST_PAGE_NUMBER  # noqa: E501
 from container_service_extension.common.constants.shared_constants import EntityTypeId  # noqa: E501
@@ -22,13 +24,21 @@ import container_service_extension.common.utils.pyvcloud_utils as vcd_utils
 import container_service_extension.exception.exceptions as cse_exceptions
 import container_service_extension.logging.logger as logger
 import container_service_extension.rde.common.entity_service as def_entity_svc
-from container_service_extension.rde.models.abstractNativeEntity import AbstractNativeEntity  # noqa: E501
 import container_service_extension.rde.models.common_models as common_models
 import container_service_extension.rde.schema_service as def_schema_svc
 
 
 DUPLICATE_CLUSTER_ERROR_MSG = "Duplicate clusters found. Please use --k8-runtime for the unique identification"  # noqa: E501
 
+# Cluster summary fields shown by cluster list
+CLUSTER_LIST_SUMMARY_FIELDS = [ClusterSummaryField.NAME.value,
+                               ClusterSummaryField.ORG.value,
+                               ClusterSummaryField.OWNER.value,
+                               ClusterSummaryField.VDC.value,
+                               ClusterSummaryField.KIND.value,
+                               ClusterSummaryField.VERSION.value,
+                               ClusterSummaryField.PHASE.value]
+
 
 class DECluster:
     """Handle operations common to DefNative and TKG-S kubernetes clusters.
@@ -105,36 +115,28 @@ class DECluster:
                         include_entity_type_ids=[EntityTypeId.NATIVE_1_0_0.value,  # noqa: E501
                                                  EntityTypeId.NATIVE_2_0_0.value,  # noqa: E501
                                                  EntityTypeId.NATIVE_2_1_0.value,  # noqa: E501
-                                                 EntityTypeId.TKG_1_0_0.value]
+                                                 EntityTypeId.TKG_1_0_0.value],  # noqa: E501
+                        summary_fields=CLUSTER_LIST_SUMMARY_FIELDS
                     )
-                    # Get the list of cluster defined entities
-                    entities: List[common_models.GenericClusterEntity] = clusters_page_results[PaginationKey.VALUES]  # noqa: E501
+                    # Get the summaries of the clusters
+                    summaries: List[common_models.ClusterSummary] = clusters_page_results[PaginationKey.VALUES]  # noqa: E501
                     clusters = []
-                    for de in entities:
-                        entity = de.entity
-                        logger.CLIENT_LOGGER.debug(f"Native Defined entity list from server: {entity}")  # noqa: E501
+                    for summary in summaries:
+                        logger.CLIENT_LOGGER.debug(f"Cluster summary list from server: {summary}")  # noqa: E501
                         cluster = {
-                            cli_constants.CLIOutputKey.CLUSTER_NAME.value: de.name,  # noqa: E501
-                            cli_constants.CLIOutputKey.ORG.value: de.org.name,  # noqa: E501
-                            cli_constants.CLIOutputKey.OWNER.value: de.owner.name  # noqa: E501
+                            cli_constants.CLIOutputKey.CLUSTER_NAME.value: summary.name,  # noqa: E501
+                            cli_constants.CLIOutputKey.ORG.value: summary.org,  # noqa: E501
+                            cli_constants.CLIOutputKey.OWNER.value: summary.owner  # noqa: E501
                         }
-                        if isinstance(entity, AbstractNativeEntity):
-                            if hasattr(entity.metadata, 'ovdc_name'):
-                                cluster[cli_constants.CLIOutputKey.VDC.value] = \
-                                    entity.metadata.ovdc_name  # noqa: E501
-                            elif hasattr(entity.metadata, 'virtual_data_center_name'):  # noqa: E501
-                                cluster[cli_constants.CLIOutputKey.VDC.value] = \
-                                    entity.metadata.virtual_data_center_name  # noqa: E501
-                            cluster[cli_constants.CLIOutputKey.K8S_RUNTIME.value] = entity.kind  # noqa: E501
-                            cluster[cli_constants.CLIOutputKey.K8S_VERSION.value] = entity.status.kubernetes  # noqa: E501
-                            cluster[cli_constants.CLIOutputKey.STATUS.value] = entity.status.phase  # noqa: E501
-                        elif isinstance(entity, common_models.TKGEntity):
-                            cluster[cli_constants.CLIOutputKey.VDC.value] = \
-                                entity.metadata.virtualDataCenterName
-                            cluster[cli_constants.CLIOutputKey.K8S_RUNTIME.value] = entity.kind  # noqa: E501
-                            cluster[cli_constants.CLIOutputKey.K8S_VERSION.value] = entity.spec.distribution.version  # noqa: E501
+                        if summary.vdc is not None:
+                            cluster[cli_constants.CLIOutputKey.VDC.value] = summary.vdc  # noqa: E501
+                        cluster[cli_constants.CLIOutputKey.K8S_RUNTIME.value] = summary.kind  # noqa: E501
+                        cluster[cli_constants.CLIOutputKey.K8S_VERSION.value] = summary.version  # noqa: E501
+                        if summary.kind == ClusterEntityKind.TKG_S.value:
                             cluster[cli_constants.CLIOutputKey.STATUS.value] = \
-                                entity.status.phase if entity.status else 'N/A'  # noqa: E501
+                                summary.phase or 'N/A'  # noqa: E501
+                        else:
+                            cluster[cli_constants.CLIOutputKey.STATUS.value] = summary.phase  # noqa: E501
                         clusters.append(cluster)
                     has_more_results = page_number * page_size < \
                         clusters_page_results[PaginationKey.RESULT_TOTAL]
@@ -104,6 +104,13 @@ SAMPLE_VCS_CONFIG = {
 SAMPLE_SERVICE_CONFIG = {
     'service': {
         'processors': 15,
+        'write_processors': 5,
+        'request_queue_size': 100,
+        'request_queue_timeout': 30,
+        'cloudapi_connection_pool_size': 20,
+        'cluster_index_refresh_interval': 0,
+        'max_concurrent_vm_operations': 8,
+        'max_concurrent_guest_operations_per_vcenter': 8,
         'enforce_authorization': False,
         'log_wire': False,
         'telemetry': {
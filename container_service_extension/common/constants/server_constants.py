@@ -76,10 +76,59 @@ PBKDF2_ITERATIONS = 100000
 SALT_SIZE = 32
 PBKDF2_OUTPUT_SIZE = 32
 
-# Names of Message Consumer Thread and Watchdog Thread
+# Names of Message Consumer Thread, Message Publisher Thread and Watchdog
+# Thread
 MESSAGE_CONSUMER_THREAD = 'MessageConsumer'
+MESSAGE_PUBLISHER_THREAD = 'MessagePublisher'
 WATCHDOG_THREAD = 'ConsumerWatchdog'
 
+# Multi-process worker mode
+WORKER_PROCESS_NAME_PREFIX = 'CseWorker-'
+WORKER_SUPERVISOR_POLL_SEC = 5
+WORKER_STATS_PUBLISH_INTERVAL_SEC = 5
+MQTT_SHARED_SUBSCRIPTION_GROUP = 'cse'
+
+# Admission queue of the message consumer thread pool
+DEFAULT_REQUEST_QUEUE_SIZE = 100
+DEFAULT_REQUEST_QUEUE_TIMEOUT_SEC = 30
+# Size of the thread pool that processes long running mutating requests
+DEFAULT_WRITE_PROCESSORS = 5
+# Seconds between two reconciliations of the in-memory index of clusters
+# with vCD, 0 disables the index
+DEFAULT_CLUSTER_INDEX_REFRESH_INTERVAL_SEC = 0
+# Max number of VMs of a cluster operation that are customized and powered on
+# concurrently
+DEFAULT_MAX_CONCURRENT_VM_OPERATIONS = 8
+# Max number of guest operations (tools checks, script executions) that CSE
+# server runs at the same time on a vCenter server
+DEFAULT_MAX_CONCURRENT_GUEST_OPERATIONS_PER_VCENTER = 8
+
+# Task watcher: seconds between two polls of a task, from the first poll or a
+# change of status on, up to the max while the status doesn't change
+TASK_WATCHER_MIN_POLL_INTERVAL_SEC = 1
+TASK_WATCHER_MAX_POLL_INTERVAL_SEC = 5
+# Max number of tasks whose status is queried with a single request
+TASK_WATCHER_MAX_TASKS_PER_QUERY = 25
+# Max number of failed GETs of a task in a row, after which the task is failed
+TASK_WATCHER_MAX_TASK_GET_FAILURES = 5
+
+# Cache of vCD sessions of tenant users, keyed by auth token and api version
+TENANT_SESSION_CACHE_MAX_SIZE = 1000
+TENANT_SESSION_CACHE_TTL_SEC = 300
+
+# Pool of vCD sessions of the sysadmin user, per api version
+SYSADMIN_SESSION_POOL_MAX_SIZE = 32
+# Max number of seconds to wait for a session, if all sessions are borrowed
+SYSADMIN_SESSION_POOL_WAIT_SEC = 60
+# Idle sessions are kept alive well within the default vCD idle session
+# timeout (30 minutes), and are replaced once they reach the max age
+SYSADMIN_SESSION_KEEPALIVE_INTERVAL_SEC = 300
+SYSADMIN_SESSION_MAX_AGE_SEC = 3600
+
+# Cache of the rights of vCD roles, keyed by org and role name
+ROLE_RIGHTS_CACHE_MAX_SIZE = 1000
+ROLE_RIGHTS_CACHE_TTL_SEC = 300
+
 
 # Config file error messages
 CONFIG_DECRYPTION_ERROR_MSG = \
@@ -106,6 +155,31 @@ class OperationType(str, Enum):
     ORG_VDCS = 'orgvdc'
 
 
+@unique
+class RequestLane(str, Enum):
+    """Execution lanes of the message consumer.
+
+    Each lane has its own thread pool and admission queue, so that long
+    running mutating requests can't starve quick read requests.
+    """
+
+    READ = 'read'
+    WRITE = 'write'
+
+
+# Number of seconds a request of each lane may take, including time spent
+# waiting in the admission queue. Long running operations only need to
+# validate the request and kick off the work within this time.
+REQUEST_LANE_TIMEOUT_SEC = {
+    RequestLane.READ: 60,
+    RequestLane.WRITE: 300
+}
+# Number of seconds a request listing clusters, templates or org VDCs may
+# take. Those go through every matching entity visible to the user, which
+# is all of them for a sysadmin.
+LIST_REQUEST_TIMEOUT_SEC = 300
+
+
 @unique
 class ThreadLocalData(str, Enum):
     USER_AGENT = 'User-Agent'
@@ -405,10 +479,11 @@ class RemoteTemplateCookbookVersion(Enum):
 # CSE requests
 @unique
 class CseOperation(Enum):
-    def __init__(self, description, api_path_format, ideal_response_code=requests.codes.ok):  # noqa: E501
+    def __init__(self, description, api_path_format, ideal_response_code=requests.codes.ok, timeout=None):  # noqa: E501
         self._description = description
         self._ideal_response_code = ideal_response_code
         self._api_path_format = api_path_format
+        self._timeout = timeout
 
     @property
     def ideal_response_code(self):
@@ -418,12 +493,30 @@ class CseOperation(Enum):
     def api_path_format(self):
         return self._api_path_format
 
+    @property
+    def lane(self):
+        # Operations that kick off long running work in VCD reply with
+        # 202 Accepted, except for the legacy compute policy update which
+        # replies with the task in a 200 OK
+        if self._ideal_response_code == requests.codes.accepted or \
+                self is CseOperation.OVDC_COMPUTE_POLICY_UPDATE:
+            return RequestLane.WRITE
+        return RequestLane.READ
+
+    @property
+    def timeout(self):
+        """Return the number of seconds a request may take.
+
+        Defaults to the timeout of the lane of the operation.
+        """
+        return self._timeout or REQUEST_LANE_TIMEOUT_SEC[self.lane]
+
     CLUSTER_CONFIG = ('get config of cluster', '/cse/cluster/%s/config')
     CLUSTER_CREATE = ('create cluster', '/cse/clusters', requests.codes.accepted)  # noqa: E501
     CLUSTER_DELETE = ('delete cluster', '/cse/cluster/%s', requests.codes.accepted)  # noqa: E501
     CLUSTER_INFO = ('get info of cluster', '/cse/cluster/%s')
-    NATIVE_CLUSTER_LIST = ('list legacy clusters', '/cse/nativeclusters')
-    CLUSTER_LIST = ('list clusters', '/cse/clusters')
+    NATIVE_CLUSTER_LIST = ('list legacy clusters', '/cse/nativeclusters', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
+    CLUSTER_LIST = ('list clusters', '/cse/clusters', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
     CLUSTER_RESIZE = ('resize cluster', '/cse/cluster/%s', requests.codes.accepted)  # noqa: E501
     CLUSTER_UPGRADE_PLAN = ('get supported cluster upgrade paths', '/cse/cluster/%s/upgrade-plan')  # noqa: E501
     CLUSTER_UPGRADE = ('upgrade cluster software', '/cse/cluster/%s/action/upgrade', requests.codes.accepted)  # noqa: E501
@@ -435,8 +528,8 @@ class CseOperation(Enum):
     V35_CLUSTER_CREATE = ('create DEF cluster', '/cse/3.0/clusters', requests.codes.accepted)  # noqa: E501
     V35_CLUSTER_DELETE = ('delete DEF cluster', '/cse/3.0/cluster/%s', requests.codes.accepted)  # noqa: E501
     V35_CLUSTER_INFO = ('get info of DEF cluster', '/cse/3.0/cluster/%s')
-    V35_NATIVE_CLUSTER_LIST = ('list paginated DEF clusters', '/cse/3.0/nativeclusters')  # noqa: E501
-    V35_CLUSTER_LIST = ('list DEF clusters', '/cse/3.0/clusters')
+    V35_NATIVE_CLUSTER_LIST = ('list paginated DEF clusters', '/cse/3.0/nativeclusters', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
+    V35_CLUSTER_LIST = ('list DEF clusters', '/cse/3.0/clusters', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
     V35_CLUSTER_RESIZE = ('resize DEF cluster', '/cse/3.0/cluster/%s', requests.codes.accepted)  # noqa: E501
     V35_CLUSTER_UPGRADE_PLAN = ('get supported DEF cluster upgrade paths', '/cse/3.0/cluster/%s/upgrade-plan')  # noqa: E501
     V35_CLUSTER_UPGRADE = ('upgrade DEF cluster software', '/cse/3.0/cluster/%s/action/upgrade', requests.codes.accepted)  # noqa: E501
@@ -447,8 +540,8 @@ class CseOperation(Enum):
     V35_NODE_INFO = ('get info of DEF node', 'NOT IMPLEMENTED')
 
     V36_CLUSTER_CREATE = ('create DEF v36 cluster', '/cse/3.0/clusters', requests.codes.accepted)  # noqa: E501
-    V36_CLUSTER_LIST = ('list V36 DEF clusters', '/cse/3.0/clusters')  # noqa: E501
-    V36_NATIVE_CLUSTER_LIST = ('list paginated V36 DEF clusters', '/cse/3.0/nativeclusters')  # noqa: E501
+    V36_CLUSTER_LIST = ('list V36 DEF clusters', '/cse/3.0/clusters', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
+    V36_NATIVE_CLUSTER_LIST = ('list paginated V36 DEF clusters', '/cse/3.0/nativeclusters', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
     V36_CLUSTER_INFO = ('get info of DEF V36 clusters', '/cse/3.0/cluster/%s')
     V36_CLUSTER_CONFIG = ('get config of DEF V36 cluster', '/cse/3.0/cluster/%s/config')  # noqa: E501
     V36_CLUSTER_UPDATE = ('update DEF V36 cluster', '/cse/3.0/cluster/%s', requests.codes.accepted)  # noqa: E501
@@ -461,31 +554,31 @@ class CseOperation(Enum):
 
     OVDC_UPDATE = ('enable or disable ovdc for k8s', '/cse/ovdc/%s', requests.codes.accepted)  # noqa: E501
     OVDC_INFO = ('get info of ovdc', '/cse/ovdc/%s')
-    OVDC_LIST = ('list ovdcs', '/cse/ovdcs')
-    ORG_VDC_LIST = ('list org VDCs', '/cse/orgvdcs')
+    OVDC_LIST = ('list ovdcs', '/cse/ovdcs', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
+    ORG_VDC_LIST = ('list org VDCs', '/cse/orgvdcs', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
     OVDC_COMPUTE_POLICY_LIST = ('list ovdc compute policies', '/cse/ovdc/%s/compute-policies')  # noqa: E501
     OVDC_COMPUTE_POLICY_UPDATE = ('update ovdc compute policies', '/cse/ovdc/%s/compute-policies')  # noqa: E501
     SYSTEM_INFO = ('get info of system', '/cse/system')
     SYSTEM_SERVER_CONFIG = ('fetch server runtime configuration', '/cse/system/config')  # noqa: E501
     SYSTEM_UPDATE = ('update system status', '/cse/system')
-    TEMPLATE_LIST = ('list all templates', '/cse/templates')
+    TEMPLATE_LIST = ('list all templates', '/cse/templates', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
     TEMPLATE_RELOAD = ('reload native and TKGm templates into server runtime config', '/cse/templates/action/reload', requests.codes.accepted)  # noqa: E501
-    TKGM_TEMPLATE_LIST = ('list TKGm templates', '/cse/templates/tkgm')
+    TKGM_TEMPLATE_LIST = ('list TKGm templates', '/cse/templates/tkgm', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
 
-    V35_OVDC_LIST = ('list ovdcs for v35', '/cse/3.0/ovdcs')
-    V35_ORG_VDC_LIST = ('list org VDCs', '/cse/3.0/orgvdcs')
+    V35_OVDC_LIST = ('list ovdcs for v35', '/cse/3.0/ovdcs', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
+    V35_ORG_VDC_LIST = ('list org VDCs', '/cse/3.0/orgvdcs', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
     V35_OVDC_INFO = ('get info of ovdc for v35', '/cse/3.0/ovdc/%s')
     V35_OVDC_UPDATE = ('enable or disable ovdc for a cluster kind for v35', '/cse/3.0/ovdc/%s', requests.codes.accepted)  # noqa: E501
-    V35_TEMPLATE_LIST = ('list all v35 templates', '/cse/templates')
+    V35_TEMPLATE_LIST = ('list all v35 templates', '/cse/templates', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
 
     PKS_CLUSTER_CONFIG = ('get config of PKS cluster', '/pks/clusters/%s/config')  # noqa: E501
     PKS_CLUSTER_CREATE = ('create PKS cluster', '/pks/clusters', requests.codes.accepted)  # noqa: E501
     PKS_CLUSTER_DELETE = ('delete PKS cluster', '/pks/cluster/%s', requests.codes.accepted)  # noqa: E501
     PKS_CLUSTER_INFO = ('get info of PKS cluster', '/pks/cluster/%s')
-    PKS_CLUSTER_LIST = ('list PKS clusters', '/pks/clusters')
+    PKS_CLUSTER_LIST = ('list PKS clusters', '/pks/clusters', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
     PKS_CLUSTER_RESIZE = ('resize PKS cluster', '/pks/cluster/%s', requests.codes.accepted)  # noqa: E501
-    PKS_OVDC_LIST = ('list all ovdcs', '/pks/ovdcs')
-    PKS_ORG_VDC_LIST = ('list  org VDCs', '/pks/orgvdcs')
+    PKS_OVDC_LIST = ('list all ovdcs', '/pks/ovdcs', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
+    PKS_ORG_VDC_LIST = ('list  org VDCs', '/pks/orgvdcs', requests.codes.ok, LIST_REQUEST_TIMEOUT_SEC)  # noqa: E501
     PKS_OVDC_INFO = ('get info of the ovdc', '/pks/ovdc/%s')
     PKS_OVDC_UPDATE = ('enable or disable ovdc for pks', '/pks/ovdc/%s', requests.codes.accepted)  # noqa: E501
 
@@ -844,6 +937,9 @@ KUBE_CONFIG = 'guestinfo.kubeconfig'
 POST_CUSTOMIZATION_SCRIPT_EXECUTION_STATUS = 'guestinfo.post_customization_script_execution_status'  # noqa: E501
 POST_CUSTOMIZATION_SCRIPT_EXECUTION_FAILURE_REASON = 'guestinfo.post_customization_script_execution_failure_reason'  # noqa: E501
 DEFAULT_POST_CUSTOMIZATION_STATUS_LIST = [cust_status.value for cust_status in PostCustomizationStatus]  # noqa: E501
+# Post customization statuses are polled after the min interval when they
+# change, then less and less often up to the poll interval
+DEFAULT_POST_CUSTOMIZATION_MIN_POLL_SEC = 1
 DEFAULT_POST_CUSTOMIZATION_POLL_SEC = 5
 DEFAULT_POST_CUSTOMIZATION_TIMEOUT_SEC = 600
 DISK_ENABLE_UUID = 'disk.enableUUID'
@@ -851,6 +947,10 @@ CLOUDINIT_GUEST_USERDATA = 'guestinfo.userdata'
 CLOUDINIT_GUEST_USERDATA_ENCODING = 'guestinfo.userdata.encoding'
 
 MAX_RDE_UPDATE_ATTEMPTS = 10
+# Base and cap of the jittered exponential backoff between attempts to update
+# an RDE that was modified concurrently (412 Precondition Failed)
+RDE_UPDATE_BACKOFF_BASE_SEC = 0.5
+RDE_UPDATE_BACKOFF_MAX_SEC = 8
 
 # keys of the Behavior task response that gets sent to VCD
 BEHAVIOR_TASK_RESPONSE_RESULT_MESSAGE_KEY = "result"
@@ -864,6 +964,28 @@ CSI_DEFAULT_VERSION = "1.2.0"
 
 UBUNTU_20_04_TEMPLATE_OS = "ubuntu-20.04"
 
+# Readiness probes of node VMs: seconds between two probes, doubling from the
+# min up to the max, and max number of seconds spent waiting for a VM to be
+# ready per template OS, after which CSE goes on as if it was
+READINESS_PROBE_MIN_INTERVAL_SEC = 1
+READINESS_PROBE_MAX_INTERVAL_SEC = 15
+DEFAULT_READINESS_PROBE_BUDGET_SEC = 180
+READINESS_PROBE_BUDGETS_SEC = {
+    UBUNTU_20_04_TEMPLATE_OS: 300
+}
+
+
+@unique
+class ReadinessProbePhase(str, Enum):
+    # vCD guest customization of the VM is complete
+    GUEST_CUSTOMIZATION = 'guest_customization'
+    # VMware Tools are running and report a healthy heartbeat
+    TOOLS_HEARTBEAT = 'tools_heartbeat'
+    # Guest operations can be run in the VM
+    GUEST_OPERATIONS = 'guest_operations'
+    # A script run in the VM succeeds
+    GUEST_EXECUTION = 'guest_execution'
+
 
 @unique
 class TkgmNodeSizing(Enum):
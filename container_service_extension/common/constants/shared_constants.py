@@ -95,6 +95,10 @@ ACCESS_LEVEL_TYPE_TO_ID = {
 CSE_PAGINATION_FIRST_PAGE_NUMBER = 1
 CSE_PAGINATION_DEFAULT_PAGE_SIZE = 25
 
+# Query parameter of cluster list requests, holding the comma separated
+# names of the fields to return for each cluster (see ClusterSummaryField)
+CLUSTER_LIST_FIELDS_QUERY_PARAM = 'fields'
+
 # System org constants
 SYSTEM_ORG_NAME = 'system'
 SYSTEM_USER_GENERIC_NAME = 'system user'
@@ -253,8 +257,24 @@ class ClusterDetailsKey(str, Enum):
     VDC_NAME = 'vdc_name'
 
 
+@unique
+class ClusterSummaryField(str, Enum):
+    """Fields of the summary of a cluster, returned by cluster list."""
+
+    ID = 'id'
+    NAME = 'name'
+    ORG = 'org'
+    OWNER = 'owner'
+    VDC = 'vdc'
+    KIND = 'kind'
+    VERSION = 'version'
+    PHASE = 'phase'
+    ENTITY_TYPE = 'entityType'
+
+
 @unique
 class HttpResponseHeader(str, Enum):
+    ETAG = 'ETag'
     LOCATION = 'Location'
     X_VMWARE_VCLOUD_TASK_LOCATION = 'X-VMWARE-VCLOUD-TASK-LOCATION'
 
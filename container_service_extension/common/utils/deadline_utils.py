@@ -0,0 +1,109 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Deadlines of requests processed by CSE server.
+
+Every request is given a deadline once it is received, based on its
+operation. The deadline is carried by the OperationContext of the request,
+and outbound calls to VCD made on behalf of the request use the remaining
+time as their timeout. This way a hung VCD call can't hold on to a consumer
+thread forever.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from requests.adapters import HTTPAdapter
+
+_num_timed_out_requests = 0
+_num_timed_out_requests_lock = threading.Lock()
+
+
+class RequestDeadline:
+    def __init__(self, timeout: float, start_time: Optional[float] = None):
+        """Create a deadline.
+
+        :param float timeout: number of seconds the request may take.
+        :param float start_time: time.monotonic() at which the request was
+            received, defaults to now.
+        """
+        if start_time is None:
+            start_time = time.monotonic()
+        self.timeout = timeout
+        self._expiry_time = start_time + timeout
+
+    def get_remaining_time(self) -> float:
+        """Return number of seconds left, negative if the deadline passed."""
+        return self._expiry_time - time.monotonic()
+
+    def has_passed(self) -> bool:
+        return self.get_remaining_time() <= 0
+
+
+class DeadlineHTTPAdapter(HTTPAdapter):
+    """HTTP adapter that times out requests at the deadline of the caller.
+
+    pyvcloud doesn't expose timeouts of the requests it makes. Mounting this
+    adapter on the requests session of a pyvcloud client limits each request
+    to the time remaining until the deadline.
+    """
+
+    def __init__(self,
+                 timeout_provider: Optional[Callable[[], Optional[float]]],
+                 **kwargs):
+        """Create the adapter.
+
+        :param callable timeout_provider: callable returning the number of
+            seconds left until the deadline, or None if there is no
+            deadline. It is expected to raise if the deadline has passed.
+            None if requests shouldn't be limited (yet).
+        """
+        super().__init__(**kwargs)
+        self._timeout_provider = timeout_provider
+
+    def set_timeout_provider(
+            self,
+            timeout_provider: Optional[Callable[[], Optional[float]]]):
+        """Switch to the deadline of another caller.
+
+        Lets a session, along with its connection pool, be used on behalf of
+        one request after another.
+        """
+        self._timeout_provider = timeout_provider
+
+    def send(self, request, timeout=None, **kwargs):
+        timeout_provider = self._timeout_provider
+        remaining_time = None if timeout_provider is None \
+            else timeout_provider()
+        if remaining_time is not None and \
+                (timeout is None or remaining_time < timeout):
+            timeout = remaining_time
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+def mount_deadline_adapter(session, timeout_provider):
+    """Limit requests made through a session to the deadline of the caller.
+
+    :param requests.Session session: session to mount the adapter on.
+    :param callable timeout_provider: see DeadlineHTTPAdapter.
+
+    :return: the mounted adapter.
+    :rtype: DeadlineHTTPAdapter
+    """
+    adapter = DeadlineHTTPAdapter(timeout_provider)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return adapter
+
+
+def record_request_timeout():
+    global _num_timed_out_requests
+    with _num_timed_out_requests_lock:
+        _num_timed_out_requests += 1
+
+
+def get_num_timed_out_requests() -> int:
+    with _num_timed_out_requests_lock:
+        return _num_timed_out_requests
@@ -0,0 +1,189 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Utilities to defer and measure module imports.
+
+Request handler modules pull in large dependencies (pyvcloud, the PKS
+client, NSX-T libraries...). LazyModule defers importing such a module until
+one of its functions is actually called, so that CSE server starts without
+loading handlers of features that are not in use.
+
+ImportTimeRecorder measures how long each module takes to import, and writes
+a report in the format of `python -X importtime`. Set the environment
+variable CSE_IMPORT_TIME_REPORT to a file path to have the report of the
+whole CSE process written to that file on exit.
+"""
+
+import atexit
+import importlib
+import sys
+import threading
+import time
+
+IMPORT_TIME_REPORT_ENV_VAR = 'CSE_IMPORT_TIME_REPORT'
+
+
+class LazyModule:
+    """Reference to a module that is imported on first use.
+
+    Accessing an attribute doesn't import the module, it returns a callable
+    that imports the module and calls the attribute of the same name.
+    """
+
+    def __init__(self, module_name: str):
+        self._module_name = module_name
+        self._module = None
+
+    def load(self):
+        """Import the module, if not already imported, and return it."""
+        module = self._module
+        if module is None:
+            # importlib serializes concurrent imports of the same module
+            module = importlib.import_module(self._module_name)
+            self._module = module
+        return module
+
+    def __getattr__(self, name: str):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return LazyFunction(self, name)
+
+    def __repr__(self):
+        return f"LazyModule({self._module_name})"
+
+
+class LazyFunction:
+    """Function of a LazyModule, the module is imported on first call."""
+
+    def __init__(self, lazy_module: LazyModule, name: str):
+        self._lazy_module = lazy_module
+        self.__name__ = name
+        self._function = None
+
+    def __call__(self, *args, **kwargs):
+        function = self._function
+        if function is None:
+            function = getattr(self._lazy_module.load(), self.__name__)
+            self._function = function
+        return function(*args, **kwargs)
+
+    def __repr__(self):
+        return f"LazyFunction({self._lazy_module._module_name}." \
+               f"{self.__name__})"
+
+
+class _TimedLoader:
+    """Loader that records how long executing a module takes."""
+
+    def __init__(self, loader, recorder):
+        self._loader = loader
+        self._recorder = recorder
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._recorder.start(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._recorder.stop(module.__name__)
+
+    def __getattr__(self, name):
+        # Resource readers, get_data() etc. of the wrapped loader
+        return getattr(self._loader, name)
+
+
+class ImportTimeRecorder:
+    """Meta path finder that records import times of modules.
+
+    Only imports that happen after install() are recorded.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (thread name, depth, module name, self time, cumulative time) in
+        # order of completion, times in microseconds
+        self._records = []
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        # Let the remaining finders find the module, and wrap its loader
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and \
+                    hasattr(spec.loader, 'exec_module'):
+                spec.loader = _TimedLoader(spec.loader, self)
+            return spec
+        return None
+
+    def _get_stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = []
+            self._local.stack = stack
+        return stack
+
+    def start(self, module_name):
+        # Each entry holds the start time and the time spent importing
+        # nested modules
+        self._get_stack().append([time.perf_counter(), 0.0])
+
+    def stop(self, module_name):
+        stack = self._get_stack()
+        start_time, nested_time = stack.pop()
+        cumulative_time = time.perf_counter() - start_time
+        if stack:
+            stack[-1][1] += cumulative_time
+        record = (threading.current_thread().name, len(stack), module_name,
+                  int((cumulative_time - nested_time) * 10**6),
+                  int(cumulative_time * 10**6))
+        with self._lock:
+            self._records.append(record)
+
+    def get_report(self):
+        """Return the report in the format of `python -X importtime`.
+
+        :rtype: str
+        """
+        with self._lock:
+            records = list(self._records)
+        lines = ["import time: self [us] | cumulative | imported package"]
+        for thread_name, depth, module_name, self_time, cumulative_time \
+                in records:
+            thread_info = '' if thread_name == 'MainThread' \
+                else f" [{thread_name}]"
+            lines.append(f"import time: {self_time:>9} | "
+                         f"{cumulative_time:>10} | {'  ' * depth}"
+                         f"{module_name}{thread_info}")
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, file_path):
+        with open(file_path, 'w') as f:
+            f.write(self.get_report())
+
+
+def enable_import_time_report(file_path):
+    """Record import times from now on, and write the report on exit.
+
+    :param str file_path: path of the file to write the report to.
+
+    :rtype: ImportTimeRecorder
+    """
+    recorder = ImportTimeRecorder()
+    recorder.install()
+    atexit.register(recorder.write_report, file_path)
+    return recorder
@@ -3,9 +3,8 @@
 # SPDX-License-Identifier: BSD-2-Clause
 
 """Utility module to perform operations which involve pyvcloud calls."""
-from datetime import datetime, timedelta
 import time
-from typing import Optional
+from typing import Dict, List, Optional
 import urllib
 
 import pyvcloud.vcd.client as vcd_client
@@ -50,6 +49,50 @@ def raise_error_if_user_not_from_system_org(client: vcd_client.Client):
 def connect_vcd_user_via_token(
         tenant_auth_token: str,
         api_version: Optional[str]):
+    client_tenant = _create_tenant_client(api_version)
+    client_tenant.rehydrate_from_token(
+        token=tenant_auth_token,
+        is_jwt_token=True
+    )
+    return client_tenant
+
+
+def connect_vcd_user_via_session(
+        tenant_auth_token: str,
+        api_version: Optional[str],
+        vcloud_session,
+        vcloud_auth_token: Optional[str]):
+    """Create a client for a tenant user from a previously fetched session.
+
+    Unlike connect_vcd_user_via_token(), no call is made to vCD. The session
+    is expected to have been fetched with the same token, by a client that
+    was created by connect_vcd_user_via_token().
+
+    :param str tenant_auth_token: JWT token of the user.
+    :param str api_version: api version of the client.
+    :param lxml.objectify.ObjectifiedElement vcloud_session: session of the
+        user, as returned by vcd_client.Client.get_vcloud_session().
+    :param str vcloud_auth_token: x-vcloud-authorization token of the
+        session.
+
+    :rtype: vcd_client.Client
+    """
+    client_tenant = _create_tenant_client(api_version)
+    # Same state that vcd_client.Client.rehydrate_from_token() sets up
+    session = requests.Session()
+    session.headers[vcd_client.Client._HEADER_AUTHORIZATION_NAME] = \
+        f"Bearer {tenant_auth_token}"
+    client_tenant._session = session
+    client_tenant._vcloud_access_token = tenant_auth_token
+    client_tenant._vcloud_auth_token = vcloud_auth_token
+    client_tenant._vcloud_session = vcloud_session
+    client_tenant._update_is_sysadmin()
+    client_tenant._session_endpoints = \
+        vcd_client._get_session_endpoints(vcloud_session)
+    return client_tenant
+
+
+def _create_tenant_client(api_version: Optional[str]):
     server_config = get_server_runtime_config()
     if not api_version:
         api_version = server_config.get_value_at('service.default_api_version')
@@ -70,10 +113,6 @@ def connect_vcd_user_via_token(
         log_headers=log_wire,
         log_bodies=log_wire
     )
-    client_tenant.rehydrate_from_token(
-        token=tenant_auth_token,
-        is_jwt_token=True
-    )
     return client_tenant
 
 
@@ -532,7 +571,8 @@ def get_storage_profile_name_of_first_vm_in_vapp(vapp):
 def get_cloudapi_client_from_vcd_client(
         client: vcd_client.Client,
         logger_debug=NULL_LOGGER,
-        logger_wire=NULL_LOGGER
+        logger_wire=NULL_LOGGER,
+        timeout_provider=None
 ):
     token = client.get_access_token()
     return cloud_api_client.CloudApiClient(
@@ -542,7 +582,8 @@ def get_cloudapi_client_from_vcd_client(
         logger_debug=logger_debug,
         logger_wire=logger_wire,
         verify_ssl=client._verify_ssl_certs,
-        is_sys_admin=client.is_sysadmin()
+        is_sys_admin=client.is_sysadmin(),
+        timeout_provider=timeout_provider
     )
 
 
@@ -709,6 +750,179 @@ def get_vm_extra_config_element(vm: VM, element_name: str) -> str:
     return vm_extra_config_elements.get(element_name)
 
 
+def get_vm_extra_config_values(vm: VM, element_names) -> Dict[str, str]:
+    """Get the values of some extra config elements of given VM.
+
+    Unlike list_vm_extra_config_info(), only the given elements are looked
+    up in the resource of the VM, which isn't reloaded.
+
+    :param VM vm:
+    :param set element_names:
+    :return: element name -> value, of the elements the VM has
+    :rtype: dict
+    """
+    key_attribute = f"{{{vcd_client.NSMAP['vmw']}}}key"
+    value_attribute = f"{{{vcd_client.NSMAP['vmw']}}}value"
+    values = {}
+    for element in vm.get_resource().iterfind(
+            'ovf:VirtualHardwareSection/vmw:ExtraConfig',
+            namespaces=vcd_client.NSMAP):
+        key = element.get(key_attribute)
+        if key in element_names:
+            values[key] = element.get(value_attribute)
+    return values
+
+
+class _PostCustomizationProgress:
+    """Progress of a VM through post customization phases."""
+
+    def __init__(self, vm: VM, customization_phases: List[str],
+                 expected_target_status_list: list,
+                 phase_timeouts: Dict[str, float], now: float):
+        self.vm = vm
+        self.customization_phases = customization_phases
+        self.expected_target_status_list = expected_target_status_list
+        self.phase_timeouts = phase_timeouts
+        self.phase_index = 0
+        self.next_poll_time = now
+        self.poll_interval = \
+            server_constants.DEFAULT_POST_CUSTOMIZATION_MIN_POLL_SEC
+        self._start_phase(now)
+
+    def is_finished(self):
+        return self.phase_index >= len(self.customization_phases)
+
+    def get_customization_phase(self):
+        return self.customization_phases[self.phase_index]
+
+    def update(self, extra_config: Dict[str, str], now: float, logger):
+        """Move through the phases, given the extra config of the VM.
+
+        :return: whether the status of any phase changed.
+        :rtype: bool
+        """
+        status_changed = False
+        while not self.is_finished():
+            customization_phase = self.get_customization_phase()
+            new_status = extra_config.get(customization_phase)
+            if new_status not in self.remaining_statuses:
+                logger.error(f"Invalid VM Post guest customization status:{new_status}")  # noqa: E501
+                raise exceptions.InvalidCustomizationStatus
+            # update the remaining statuses on status change
+            if new_status != self.current_status:
+                self.remaining_statuses.remove(self.current_status)
+                self.current_status = new_status
+                status_changed = True
+            logger.info(f"Post guest customization phase {customization_phase} is {new_status}")  # noqa: E501
+            # Check for successful customization: reaching last status
+            # between, then go on with the next phase
+            if new_status != self.expected_target_status_list[-1]:
+                break
+            self.phase_index += 1
+            self._start_phase(now)
+
+        if self.is_finished():
+            return status_changed
+
+        # Catch any intermediate command failure and raise early exception
+        script_execution_status = extra_config.get(server_constants.POST_CUSTOMIZATION_SCRIPT_EXECUTION_STATUS)  # noqa: E501
+        if script_execution_status and int(script_execution_status) != 0:
+            script_execution_failure_reason = extra_config.get(server_constants.POST_CUSTOMIZATION_SCRIPT_EXECUTION_FAILURE_REASON)  # noqa: E501
+            logger.error(f"VM Post guest customization script failed with error:{script_execution_failure_reason}")  # noqa: E501
+            raise exceptions.ScriptExecutionError(error_message=script_execution_failure_reason)  # noqa: E501
+
+        timeout = self.phase_timeouts.get(
+            self.get_customization_phase(),
+            server_constants.DEFAULT_POST_CUSTOMIZATION_TIMEOUT_SEC)
+        if now - self.phase_start_time > timeout:
+            logger.error(f"VM Post guest customization failed due to timeout({timeout} sec)")  # noqa: E501
+            raise exceptions.PostCustomizationTimeoutError
+        return status_changed
+
+    def _start_phase(self, now):
+        self.phase_start_time = now
+        self.current_status = self.expected_target_status_list[0]
+        self.remaining_statuses = list(self.expected_target_status_list)
+
+
+def wait_for_completion_of_post_customization_procedures(
+        vms: List[VM],
+        customization_phases: List[str],
+        timeout=server_constants.DEFAULT_POST_CUSTOMIZATION_TIMEOUT_SEC,
+        poll_frequency=server_constants.DEFAULT_POST_CUSTOMIZATION_POLL_SEC,
+        expected_target_status_list=server_constants.DEFAULT_POST_CUSTOMIZATION_STATUS_LIST,   # noqa: E501
+        phase_timeouts: Optional[Dict[str, float]] = None,
+        logger=NULL_LOGGER):
+    """Wait for VMs to go through post customization phases, in order.
+
+    Each VM is polled on its own schedule, from a single thread: right away,
+    then less and less often while its statuses don't change, up to
+    poll_frequency. A poll reloads the VM once, and moves it through all the
+    phases that reached their final status since the last poll.
+
+    :param list vms: VMs to wait for.
+    :param list customization_phases: names of the phases, in the order the
+        VMs go through them.
+    :param float timeout: Time in seconds to wait for a customization phase
+    of a VM to finish
+    :param float poll_frequency: max time in seconds between two polls of
+    the status of customization phase of a VM
+    :param list expected_target_status_list: list of expected target status
+    values. The contract is to explicitly spell out all the valid status values
+    including None as a status to start with.
+    :param dict phase_timeouts: phase name -> timeout of the phase, for the
+    phases that don't use the default timeout.
+    :param logging.Logger logger: logger to use for logging custom messages.
+    :raises PostCustomizationTimeoutError: if a customization phase of a VM
+    is not finished within given time
+    :raises InvalidCustomizationStatus: If customization enters a status
+    not in valid target status
+    :raises ScriptExecutionError: If script execution fails at any command
+    """
+    # Raise exception on empty status list
+    if not expected_target_status_list:
+        logger.error("VM Post guest customization error: empty target status list")  # noqa: E501
+        raise exceptions.InvalidCustomizationStatus
+
+    element_names = set(customization_phases)
+    element_names.add(server_constants.POST_CUSTOMIZATION_SCRIPT_EXECUTION_STATUS)  # noqa: E501
+    element_names.add(server_constants.POST_CUSTOMIZATION_SCRIPT_EXECUTION_FAILURE_REASON)  # noqa: E501
+    phase_timeouts = {phase: timeout for phase in customization_phases} \
+        if phase_timeouts is None \
+        else {phase: phase_timeouts.get(phase, timeout)
+              for phase in customization_phases}
+    now = time.monotonic()
+    pending = [
+        _PostCustomizationProgress(vm, customization_phases,
+                                   expected_target_status_list,
+                                   phase_timeouts, now)
+        for vm in vms
+    ]
+    while pending:
+        now = time.monotonic()
+        next_poll_time = min(p.next_poll_time for p in pending)
+        if next_poll_time > now:
+            time.sleep(next_poll_time - now)
+            continue
+        for progress in [p for p in pending if p.next_poll_time <= now]:
+            progress.vm.reload()
+            extra_config = get_vm_extra_config_values(progress.vm,
+                                                      element_names)
+            status_changed = progress.update(extra_config,
+                                             time.monotonic(), logger)
+            if progress.is_finished():
+                pending.remove(progress)
+                continue
+            if status_changed:
+                progress.poll_interval = \
+                    server_constants.DEFAULT_POST_CUSTOMIZATION_MIN_POLL_SEC
+            else:
+                progress.poll_interval = min(progress.poll_interval * 2,
+                                             poll_frequency)
+            progress.next_poll_time = time.monotonic() + \
+                progress.poll_interval
+
+
 def wait_for_completion_of_post_customization_procedure(
         vm: VM,
         customization_phase: str,
@@ -725,8 +939,8 @@ def wait_for_completion_of_post_customization_procedure(
     :param str customization_phase:
     :param float timeout: Time in seconds to wait for customization phase to
     finish
-    :param float poll_frequency: time in seconds for how often to poll the
-    status of customization_phase
+    :param float poll_frequency: max time in seconds between two polls of
+    the status of customization_phase
     :param list expected_target_status_list: list of expected target status
     values. The contract is to explicitly spell out all the valid status values
     including None as a status to start with.
@@ -739,42 +953,14 @@ def wait_for_completion_of_post_customization_procedure(
     not in valid target status
     :raises ScriptExecutionError: If script execution fails at any command
     """
-    # Raise exception on empty status list
-    if not expected_target_status_list:
-        logger.error("VM Post guest customization error: empty target status list")  # noqa: E501
-        raise exceptions.InvalidCustomizationStatus
-
-    start_time = datetime.now()
-    current_status = expected_target_status_list[0]
-    remaining_statuses = list(expected_target_status_list)
-
-    while True:
-        vm.reload()
-        new_status = get_vm_extra_config_element(vm, customization_phase)
-        if new_status not in remaining_statuses:
-            logger.error(f"Invalid VM Post guest customization status:{new_status}")  # noqa: E501
-            raise exceptions.InvalidCustomizationStatus
-        # update the remaining statuses on status change
-        if new_status != current_status:
-            remaining_statuses.remove(current_status)
-            current_status = new_status
-        logger.info(f"Post guest customization phase {customization_phase} is {new_status}")  # noqa: E501
-        # Check for successful customization: reaching last status between
-        if new_status == expected_target_status_list[-1]:
-            return new_status
-
-        # Catch any intermediate command failure and raise early exception
-        script_execution_status = get_vm_extra_config_element(vm, server_constants.POST_CUSTOMIZATION_SCRIPT_EXECUTION_STATUS)  # noqa: E501
-        if script_execution_status and int(script_execution_status) != 0:
-            script_execution_failure_reason = get_vm_extra_config_element(vm, server_constants.POST_CUSTOMIZATION_SCRIPT_EXECUTION_FAILURE_REASON)  # noqa: E501
-            logger.error(f"VM Post guest customization script failed with error:{script_execution_failure_reason}")  # noqa: E501
-            raise exceptions.ScriptExecutionError(error_message=script_execution_failure_reason)  # noqa: E501
-
-        if datetime.now() - start_time > timedelta(seconds=timeout):
-            break
-        time.sleep(poll_frequency)
-    logger.error(f"VM Post guest customization failed due to timeout({timeout} sec)")  # noqa: E501
-    raise exceptions.PostCustomizationTimeoutError
+    wait_for_completion_of_post_customization_procedures(
+        [vm],
+        [customization_phase],
+        timeout=timeout,
+        poll_frequency=poll_frequency,
+        expected_target_status_list=expected_target_status_list,
+        logger=logger)
+    return expected_target_status_list[-1]
 
 
 def get_missing_rights_for_cluster_force_delete(
@@ -141,6 +141,23 @@ def is_test_mode(config: Optional[ServerConfig] = None) -> bool:
         return False
 
 
+def get_max_concurrent_vm_operations(config: Optional[ServerConfig] = None) -> int:  # noqa: E501
+    """Get the max number of VMs of a cluster operation handled concurrently.
+
+    :param ServerConfig config: configuration provided by the user.
+
+    :return: max number of VMs customized, powered on or running scripts at
+        the same time for a cluster operation.
+    :rtype: int
+    """
+    if not config:
+        config = get_server_runtime_config()
+    try:
+        return int(config.get_value_at('service.max_concurrent_vm_operations'))  # noqa: E501
+    except KeyError:
+        return server_constants.DEFAULT_MAX_CONCURRENT_VM_OPERATIONS
+
+
 def get_template_descriptor_keys(cookbook_version: semantic_version.Version) -> enum.EnumMeta:  # noqa: E501
     """Get template descriptor keys using the cookbook version."""
     # if cookbook version is None, use version 1.0
@@ -0,0 +1,393 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Watcher of vCD tasks shared by all threads of the process.
+
+pyvcloud's task monitor polls a task with a GET every 5 seconds, from the
+thread waiting for it, so every task being waited on costs a poller of its
+own. The watcher instead keeps track of all outstanding tasks, and a single
+thread queries the status of many of them at once with the query service.
+Tasks of sysadmin sessions to the same vCD are queried together, whichever
+session they were started with; tasks of tenant sessions are queried per
+session, since vCD only shows them tasks they can access.
+
+Each task is polled right away, then less and less often while its status
+doesn't change. The full task is only fetched once it has finished, to be
+returned, or raised as pyvcloud does.
+"""
+
+from concurrent.futures import Future
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+from urllib import parse
+
+from pyvcloud.vcd.client import QueryResultFormat
+from pyvcloud.vcd.client import ResourceType
+from pyvcloud.vcd.client import TaskStatus
+from pyvcloud.vcd.exceptions import TaskTimeoutException
+from pyvcloud.vcd.exceptions import VcdTaskException
+
+import container_service_extension.common.constants.server_constants as server_constants  # noqa: E501
+from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER  # noqa: E501
+
+TASK_WATCHER_THREAD = 'TaskWatcher'
+
+DEFAULT_FAIL_ON_STATUSES = (TaskStatus.ABORTED, TaskStatus.CANCELED,
+                            TaskStatus.ERROR)
+DEFAULT_EXPECTED_TARGET_STATUSES = (TaskStatus.SUCCESS,)
+
+
+class _WatchedTask:
+    """Task being waited on, and what to do once it reaches a status."""
+
+    def __init__(self, client, href, fail_on_statuses,
+                 expected_target_statuses, callback, timeout):
+        self.client = client
+        self.href: str = href
+        self.future = Future()
+        self.fail_on_statuses = [s.value.lower() for s in fail_on_statuses]
+        self.expected_target_statuses = \
+            [s.value.lower() for s in expected_target_statuses]
+        self.callback = callback
+        now = time.monotonic()
+        self.deadline: Optional[float] = \
+            now + timeout if timeout is not None else None
+        self.status: Optional[str] = None
+        self.poll_interval: float = \
+            server_constants.TASK_WATCHER_MIN_POLL_INTERVAL_SEC
+        self.next_poll_time: float = now
+        # Number of failed GETs of the task in a row
+        self.num_get_failures: int = 0
+
+    def get_query_group_key(self):
+        # Sysadmin sessions see all tasks, so one is as good as another
+        if self.client.is_sysadmin():
+            return self.client.get_api_uri()
+        return id(self.client)
+
+    def is_finished(self, status):
+        return status in self.expected_target_statuses or \
+            status in self.fail_on_statuses
+
+
+class TaskWatcher:
+    def __init__(self):
+        self._condition = threading.Condition()
+        # task href -> tasks waited on, a task may be waited on several times
+        self._watched_tasks: Dict[str, List[_WatchedTask]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._is_stopped = False
+        self._num_tasks_watched = 0
+        self._num_tasks_finished = 0
+        self._num_tasks_failed = 0
+        self._num_status_queries = 0
+        self._num_status_query_failures = 0
+        self._num_task_gets = 0
+        self._num_task_get_failures = 0
+
+    def watch(self, client, task,
+              fail_on_statuses=DEFAULT_FAIL_ON_STATUSES,
+              expected_target_statuses=DEFAULT_EXPECTED_TARGET_STATUSES,
+              callback=None, timeout=None) -> Future:
+        """Start watching a task.
+
+        :param pyvcloud.vcd.client.Client client: client the task was started
+            with, used to poll it.
+        :param lxml.objectify.ObjectifiedElement task: task returned by vCD.
+        :param list fail_on_statuses: statuses that fail the task.
+        :param list expected_target_statuses: statuses that complete the task.
+        :param callable callback: called with the task record on each poll,
+            and with the task once it has reached one of the statuses.
+        :param float timeout: seconds after which the task is failed with
+            TaskTimeoutException, None to wait forever, which is what
+            pyvcloud's task monitor ends up doing.
+
+        :return: future completed with the task once it has reached an
+            expected status, or with VcdTaskException if it reached a failing
+            status.
+        :rtype: concurrent.futures.Future
+        """
+        watched_task = _WatchedTask(
+            client=client,
+            href=task.get('href'),
+            fail_on_statuses=fail_on_statuses or [],
+            expected_target_statuses=expected_target_statuses,
+            callback=callback,
+            timeout=timeout)
+        with self._condition:
+            if self._is_stopped:
+                raise RuntimeError("Task watcher is stopped")
+            self._watched_tasks.setdefault(watched_task.href, []).append(
+                watched_task)
+            self._num_tasks_watched += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    name=TASK_WATCHER_THREAD, target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+        return watched_task.future
+
+    def wait_for_status(self, client, task,
+                        fail_on_statuses=DEFAULT_FAIL_ON_STATUSES,
+                        expected_target_statuses=DEFAULT_EXPECTED_TARGET_STATUSES,  # noqa: E501
+                        callback=None, timeout=None):
+        """Wait for a task to reach a status.
+
+        Drop-in replacement for client.get_task_monitor().wait_for_status(),
+        see watch() for the parameters.
+
+        :return: the task, once it has reached an expected status.
+        :rtype: lxml.objectify.ObjectifiedElement
+
+        :raises VcdTaskException: if the task reached a failing status.
+        :raises TaskTimeoutException: if the task didn't reach any of the
+            statuses in time.
+        """
+        return self.watch(
+            client, task,
+            fail_on_statuses=fail_on_statuses,
+            expected_target_statuses=expected_target_statuses,
+            callback=callback,
+            timeout=timeout).result()
+
+    def stop(self):
+        """Stop the watcher thread, and fail the tasks still watched."""
+        with self._condition:
+            self._is_stopped = True
+            watched_tasks = [watched_task
+                             for tasks in self._watched_tasks.values()
+                             for watched_task in tasks]
+            self._watched_tasks.clear()
+            self._condition.notify_all()
+        for watched_task in watched_tasks:
+            watched_task.future.set_exception(
+                RuntimeError("Task watcher is stopped"))
+
+    def get_stats(self):
+        """Return task and request counters.
+
+        :rtype: dict
+        """
+        with self._condition:
+            return {
+                'tasks_watched': self._num_tasks_watched,
+                'tasks_in_progress': sum(
+                    len(tasks) for tasks in self._watched_tasks.values()),
+                'tasks_finished': self._num_tasks_finished,
+                'tasks_failed': self._num_tasks_failed,
+                'status_queries': self._num_status_queries,
+                'status_query_failures': self._num_status_query_failures,
+                'task_gets': self._num_task_gets,
+                'task_get_failures': self._num_task_get_failures
+            }
+
+    def _run(self):
+        while True:
+            with self._condition:
+                groups = self._get_due_query_groups()
+                while not self._is_stopped and not groups:
+                    self._condition.wait(self._get_time_to_next_poll())
+                    groups = self._get_due_query_groups()
+                if self._is_stopped:
+                    return
+            for watched_tasks in groups:
+                try:
+                    self._poll(watched_tasks)
+                except Exception as err:
+                    # Errors of single tasks are handled by _poll(), don't
+                    # let anything else stop the watcher
+                    LOGGER.error(f"Failed to poll tasks: "
+                                 f"{traceback.format_exc()}")
+                    for watched_task in watched_tasks:
+                        self._complete(watched_task, exception=err)
+
+    def _get_time_to_next_poll(self):
+        if not self._watched_tasks:
+            return None
+        next_poll_time = min(watched_task.next_poll_time
+                             for tasks in self._watched_tasks.values()
+                             for watched_task in tasks)
+        return max(next_poll_time - time.monotonic(), 0)
+
+    def _get_due_query_groups(self):
+        """Group the tasks to query, if any of them is due for a poll.
+
+        Tasks not due yet are queried along with the due tasks they share a
+        query with, since that is free.
+        """
+        now = time.monotonic()
+        groups = {}
+        due_group_keys = set()
+        for tasks in self._watched_tasks.values():
+            for watched_task in tasks:
+                key = watched_task.get_query_group_key()
+                groups.setdefault(key, []).append(watched_task)
+                if watched_task.next_poll_time <= now:
+                    due_group_keys.add(key)
+        return [groups[key] for key in due_group_keys]
+
+    def _poll(self, watched_tasks: List[_WatchedTask]):
+        hrefs = list(dict.fromkeys(t.href for t in watched_tasks))
+        # Any client of the group can query the tasks of the group; it
+        # can't be returned by its borrower until its task is completed
+        client = watched_tasks[0].client
+        statuses = {}
+        max_tasks = server_constants.TASK_WATCHER_MAX_TASKS_PER_QUERY
+        for i in range(0, len(hrefs), max_tasks):
+            statuses.update(self._query_statuses(client,
+                                                 hrefs[i:i + max_tasks]))
+
+        tasks = {}
+        # task href -> error of the GET of the task
+        get_errors = {}
+        now = time.monotonic()
+        for watched_task in watched_tasks:
+            href = watched_task.href
+            status = statuses.get(href)
+            if status is None or watched_task.is_finished(status):
+                # The full task is returned or raised once it has finished,
+                # and tasks the query didn't return are fetched
+                if href not in tasks and href not in get_errors:
+                    try:
+                        tasks[href] = self._get_task(watched_task.client,
+                                                     href)
+                    except Exception as err:
+                        get_errors[href] = err
+                if href in get_errors:
+                    self._on_get_task_failure(watched_task, get_errors[href],
+                                              now)
+                    continue
+                watched_task.num_get_failures = 0
+                task = tasks[href]
+                status = task.get('status').lower()
+            else:
+                task = None
+            self._update(watched_task, status, task, now)
+
+    def _query_statuses(self, client, hrefs):
+        """Query the statuses of tasks with the query service.
+
+        :return: task href -> status of the tasks found, empty if the query
+            failed.
+        :rtype: dict
+        """
+        resource_type = ResourceType.ADMIN_TASK.value \
+            if client.is_sysadmin() else ResourceType.TASK.value
+        task_ids = [f"urn:vcloud:task:{href.rstrip('/').split('/')[-1]}"
+                    for href in hrefs]
+        query_filter = ','.join(f"id=={parse.quote(task_id)}"
+                                for task_id in task_ids)
+        with self._condition:
+            self._num_status_queries += 1
+        try:
+            query = client.get_typed_query(
+                resource_type,
+                query_result_format=QueryResultFormat.RECORDS,
+                qfilter=f"({query_filter})",
+                page_size=len(hrefs),
+                fields='status')
+            return {record.get('href'): record.get('status').lower()
+                    for record in query.execute()}
+        except Exception:
+            with self._condition:
+                self._num_status_query_failures += 1
+            LOGGER.debug(f"Failed to query task statuses, tasks will be "
+                         f"fetched one by one: {traceback.format_exc()}")
+            return {}
+
+    def _get_task(self, client, href):
+        with self._condition:
+            self._num_task_gets += 1
+        return client.get_resource(href)
+
+    def _on_get_task_failure(self, watched_task: _WatchedTask, err, now):
+        """Retry a task whose GET failed on its next poll, with backoff.
+
+        Only the task is failed, once its GETs failed too many times in a
+        row, or after its deadline.
+        """
+        with self._condition:
+            self._num_task_get_failures += 1
+        watched_task.num_get_failures += 1
+        if watched_task.num_get_failures >= \
+                server_constants.TASK_WATCHER_MAX_TASK_GET_FAILURES:
+            self._complete(watched_task, exception=err)
+            return
+        if watched_task.deadline is not None and now > watched_task.deadline:
+            self._complete(watched_task,
+                           exception=TaskTimeoutException("Task timeout"))
+            return
+        LOGGER.debug(f"Failed to get task {watched_task.href}, retrying: "
+                     f"{err}")
+        watched_task.poll_interval = min(
+            watched_task.poll_interval * 2,
+            server_constants.TASK_WATCHER_MAX_POLL_INTERVAL_SEC)
+        watched_task.next_poll_time = now + watched_task.poll_interval
+
+    def _update(self, watched_task: _WatchedTask, status, task, now):
+        if watched_task.callback is not None:
+            try:
+                watched_task.callback(task if task is not None
+                                      else _TaskRecord(watched_task.href,
+                                                       status))
+            except Exception as err:
+                self._complete(watched_task, exception=err)
+                return
+
+        if status in watched_task.expected_target_statuses:
+            self._complete(watched_task, task=task)
+        elif status in watched_task.fail_on_statuses:
+            self._complete(watched_task,
+                           exception=VcdTaskException(status, task.Error))
+        elif watched_task.deadline is not None and \
+                now > watched_task.deadline:
+            self._complete(watched_task,
+                           exception=TaskTimeoutException("Task timeout"))
+        else:
+            # Poll again soon if the task is moving, later and later if not
+            if status != watched_task.status:
+                watched_task.poll_interval = \
+                    server_constants.TASK_WATCHER_MIN_POLL_INTERVAL_SEC
+            else:
+                watched_task.poll_interval = min(
+                    watched_task.poll_interval * 2,
+                    server_constants.TASK_WATCHER_MAX_POLL_INTERVAL_SEC)
+            watched_task.status = status
+            watched_task.next_poll_time = now + watched_task.poll_interval
+
+    def _complete(self, watched_task: _WatchedTask, task=None,
+                  exception=None):
+        with self._condition:
+            tasks = self._watched_tasks.get(watched_task.href, [])
+            if watched_task not in tasks:
+                return
+            tasks.remove(watched_task)
+            if not tasks:
+                del self._watched_tasks[watched_task.href]
+            if exception is None:
+                self._num_tasks_finished += 1
+            else:
+                self._num_tasks_failed += 1
+        if exception is None:
+            watched_task.future.set_result(task)
+        else:
+            watched_task.future.set_exception(exception)
+
+
+class _TaskRecord:
+    """Status of a task, as passed to callbacks while it is in progress.
+
+    Like the task, it gives access to the href and status attributes.
+    """
+
+    def __init__(self, href, status):
+        self._attributes = {'href': href, 'status': status}
+
+    def get(self, key, default=None):
+        return self._attributes.get(key, default)
+
+
+TASK_WATCHER = TaskWatcher()
@@ -4,6 +4,8 @@
 
 """Thread utils for managing multiple threads in the server."""
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import functools
 import threading
 
@@ -16,8 +18,10 @@ def _transfer_thread_local_data_wrapper(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         thread_local_data.set_thread_local_data_from_dict(cur_thread_data)
-        func(*args, **kwargs)
-        thread_local_data.reset_thread_local_data()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            thread_local_data.reset_thread_local_data()
     return wrapper
 
 
@@ -33,6 +37,46 @@ def run_async(func):
     return wrapper
 
 
+def imap_concurrently(func, items, max_workers):
+    """Call a function on each item in threads, yield results in order.
+
+    At most max_workers calls are in flight at any time, and calls for items
+    further down are only made as results are consumed. Thread local data of
+    the calling thread is visible to the calls.
+
+    If a call raises, the exception is raised when its result is due, and
+    calls not started yet are cancelled.
+
+    :param callable func: function taking an item as its only argument.
+    :param iterable items: items to call the function on.
+    :param int max_workers: max number of concurrent calls.
+
+    :return: generator of the results of the calls, in order of the items.
+    """
+    items = iter(items)
+    thread_local_data_wrapper = _transfer_thread_local_data_wrapper(func)
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix=generate_thread_name(func.__name__))
+    futures = deque()
+    try:
+        for item in items:
+            futures.append(executor.submit(thread_local_data_wrapper, item))
+            if len(futures) >= max_workers:
+                break
+        while futures:
+            result = futures.popleft().result()
+            for item in items:
+                futures.append(
+                    executor.submit(thread_local_data_wrapper, item))
+                break
+            yield result
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
 def generate_thread_name(function_name):
     parent_thread_id = threading.current_thread().ident
     return function_name + ':' + str(parent_thread_id)
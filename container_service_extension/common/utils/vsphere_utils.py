@@ -4,6 +4,8 @@
 
 """Contains utility methods for interacting with vSphere."""
 
+from contextlib import contextmanager
+import threading
 from urllib.parse import urlparse
 
 from cachetools import LRUCache
@@ -12,23 +14,37 @@ from pyvcloud.vcd.vapp import VApp
 from pyvcloud.vcd.vm import VM
 from vsphere_guest_run.vsphere import VSphere
 
+from container_service_extension.common.constants.server_constants import DEFAULT_MAX_CONCURRENT_GUEST_OPERATIONS_PER_VCENTER  # noqa: E501
 from container_service_extension.common.utils.core_utils import NullPrinter
 from container_service_extension.logging.logger import NULL_LOGGER
 
 cache = LRUCache(maxsize=1024)
 vsphere_list = []
+max_concurrent_guest_operations = \
+    DEFAULT_MAX_CONCURRENT_GUEST_OPERATIONS_PER_VCENTER
+# vCenter server hostname -> semaphore bounding its guest operations
+guest_operation_semaphores = {}
+guest_operation_semaphores_lock = threading.Lock()
 
 
-def populate_vsphere_list(vcs):
+def populate_vsphere_list(
+        vcs,
+        max_concurrent_guest_operations_per_vcenter=DEFAULT_MAX_CONCURRENT_GUEST_OPERATIONS_PER_VCENTER):  # noqa: E501
     """Populate the global variable holding info on vCenter servers.
 
     This method must be called before a call to get_vsphere.
 
     :param list vcs: list of dictionaries, where each dictionary hold the name,
     admin username and password of a vCenter server.
+    :param int max_concurrent_guest_operations_per_vcenter: max number of
+        guest operations run at the same time on a vCenter server, see
+        guest_operation_slot.
     """
     global vsphere_list
+    global max_concurrent_guest_operations
     vsphere_list = vcs
+    max_concurrent_guest_operations = \
+        max_concurrent_guest_operations_per_vcenter
 
 
 def get_vsphere(sys_admin_client, vapp, vm_name, logger=NULL_LOGGER):
@@ -77,6 +93,27 @@ def get_vsphere(sys_admin_client, vapp, vm_name, logger=NULL_LOGGER):
                    cache[vm_id]['password'], cache[vm_id]['port'])
 
 
+@contextmanager
+def guest_operation_slot(vsphere):
+    """Hold one of the guest operation slots of a vCenter server.
+
+    Guest operations (waiting for VMware Tools, running scripts in a VM) of
+    all the threads of the process are bounded per vCenter server, so that
+    operations on the VMs of many nodes at once don't overload it.
+
+    :param vsphere_guest_run.vsphere.VSphere vsphere: VSphere object of the
+        vCenter server the guest operation is run on.
+    """
+    with guest_operation_semaphores_lock:
+        semaphore = guest_operation_semaphores.get(vsphere.host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(
+                max_concurrent_guest_operations)
+            guest_operation_semaphores[vsphere.host] = semaphore
+    with semaphore:
+        yield
+
+
 def vgr_callback(
         prepend_msg='',
         logger=NULL_LOGGER,
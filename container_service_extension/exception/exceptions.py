@@ -145,6 +145,15 @@ class NotFoundRequestError(CseRequestError):
                          minor_error_code)
 
 
+class RequestTimeoutError(CseRequestError):
+    """Raised when a request could not be processed before its deadline."""
+
+    def __init__(self, error_message="Request timed out",
+                 minor_error_code=None):
+        super().__init__(requests.codes.gateway_timeout, error_message,
+                         minor_error_code)
+
+
 class UnauthorizedRequestError(CseRequestError):
     """Raised when an action is attempted by an unauthorized user."""
 
@@ -173,7 +173,12 @@ def get_validated_config(
         config['service'],
         SAMPLE_SERVICE_CONFIG['service'],
         location="config file 'service' section",
-        excluded_keys=['log_wire'],
+        excluded_keys=['log_wire', 'request_queue_size',
+                       'request_queue_timeout', 'write_processors',
+                       'cloudapi_connection_pool_size',
+                       'cluster_index_refresh_interval',
+                       'max_concurrent_vm_operations',
+                       'max_concurrent_guest_operations_per_vcenter'],
         msg_update_callback=msg_update_callback
     )
 
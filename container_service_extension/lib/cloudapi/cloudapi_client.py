@@ -2,16 +2,17 @@
 # Copyright (c) 2019 VMware, Inc. All Rights Reserved.
 # SPDX-License-Identifier: BSD-2-Clause
 
-from copy import deepcopy
+import copy
 import json
 import logging
-from typing import Optional
+from typing import Callable, Optional
 from urllib import parse
 
 from pyvcloud.vcd.vcd_api_version import VCDApiVersion
 import requests
 import requests.utils as requests_utils
 
+from container_service_extension.lib.cloudapi.connection_pool import CLOUDAPI_CONNECTION_POOL  # noqa: E501
 from container_service_extension.lib.cloudapi.constants import ResponseKeys
 
 
@@ -26,11 +27,25 @@ class CloudApiClient(object):
             logger_debug: logging.Logger,
             logger_wire: logging.Logger,
             verify_ssl: bool = True,
-            is_sys_admin: bool = False
+            is_sys_admin: bool = False,
+            timeout_provider: Optional[Callable[[], Optional[float]]] = None,
+            session: Optional[requests.Session] = None
     ):
+        """Create a cloudapi client.
+
+        :param callable timeout_provider: optional callable returning the
+            timeout, in seconds, of the next request, or None for no timeout.
+            It may raise to prevent the request from being made.
+        :param requests.Session session: session to make requests with,
+            defaults to the session shared by all clients of the vCD host.
+            The session must not hold authentication state.
+        """
         if not base_url.endswith('/'):
             base_url += '/'
         self._base_url = base_url
+        if session is None:
+            session = CLOUDAPI_CONNECTION_POOL.get_session(base_url)
+        self._session = session
 
         self._headers = {
             "Authorization": f"Bearer {token}",
@@ -45,6 +60,20 @@ class CloudApiClient(object):
         self.is_sys_admin = is_sys_admin
         self._api_version = api_version
         self._vcd_api_version = VCDApiVersion(api_version)
+        self._timeout_provider = timeout_provider
+
+    def copy(self):
+        """Return a client with the same token and settings.
+
+        The copy shares the connections of this client, but tracks its own
+        last response, so that both can make requests concurrently.
+
+        :rtype: CloudApiClient
+        """
+        client = copy.copy(self)
+        client._headers = dict(self._headers)
+        client._last_response = None
+        return client
 
     def get_api_version(self):
         return self._api_version
@@ -109,24 +138,30 @@ class CloudApiClient(object):
             url += f"{resource_url_relative_path}"
 
         self.LOGGER_WIRE.debug(f"Request uri : {method.value.upper()} {url}")
-        headers = deepcopy(self._headers)
+        # Header values are strings, a shallow copy is enough
+        headers = dict(self._headers)
         if additional_request_headers:
             headers.update(additional_request_headers)
+        timeout = None
+        if self._timeout_provider:
+            timeout = self._timeout_provider()
         if content_type and 'json' not in content_type:
             headers['Content-type'] = content_type
-            response = requests.request(
+            response = self._session.request(
                 method.value,
                 url,
                 headers=headers,
                 data=payload,
-                verify=self._verify_ssl)
+                verify=self._verify_ssl,
+                timeout=timeout)
         else:
-            response = requests.request(
+            response = self._session.request(
                 method.value,
                 url,
                 headers=headers,
                 json=payload,
-                verify=self._verify_ssl)
+                verify=self._verify_ssl,
+                timeout=timeout)
         self._last_response = response
 
         self.LOGGER_WIRE.debug("Request headers :"
@@ -0,0 +1,155 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""HTTP connection pools shared by all cloudapi clients of the process.
+
+Each vCD host gets one requests session, whose connections are kept alive and
+reused by every CloudApiClient talking to that host, so that cloudapi calls
+don't pay for a TCP and TLS handshake each. Sessions don't carry any
+authentication state: headers are passed with each request, and cookies are
+neither stored nor sent, since the sessions are shared across users.
+"""
+
+from http.cookiejar import DefaultCookiePolicy
+import threading
+from urllib import parse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.connectionpool import HTTPSConnectionPool
+
+# Max number of connections kept alive per host
+DEFAULT_POOL_MAXSIZE = 20
+# Max number of hosts to keep connections to
+DEFAULT_POOL_CONNECTIONS = 4
+
+_stats_lock = threading.Lock()
+_num_requests = 0
+_num_connections_opened = 0
+
+
+def _record_request():
+    global _num_requests
+    with _stats_lock:
+        _num_requests += 1
+
+
+def _record_connection_opened():
+    global _num_connections_opened
+    with _stats_lock:
+        _num_connections_opened += 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _record_connection_opened()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _record_connection_opened()
+        return super()._new_conn()
+
+
+class _PoolingHTTPAdapter(HTTPAdapter):
+    """HTTP adapter that counts requests, and connections it opens."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool
+        }
+
+    def send(self, request, **kwargs):
+        _record_request()
+        return super().send(request, **kwargs)
+
+
+class CloudApiConnectionPool:
+    def __init__(self, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS):
+        """Create a set of requests sessions, one per host.
+
+        :param int pool_maxsize: max number of connections kept alive per
+            host. More concurrent requests are still made, over connections
+            that are closed afterwards.
+        :param int pool_connections: max number of hosts to keep connections
+            to.
+        """
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self.pool_maxsize = pool_maxsize
+        self.pool_connections = pool_connections
+
+    def configure(self, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                  pool_connections=DEFAULT_POOL_CONNECTIONS):
+        """Change the pool sizes, sessions already created are replaced."""
+        with self._lock:
+            self.pool_maxsize = pool_maxsize
+            self.pool_connections = pool_connections
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def get_session(self, url) -> requests.Session:
+        """Return the session to make requests to the host of a url.
+
+        :param str url: url of the request, or base url of the client.
+
+        :rtype: requests.Session
+        """
+        parsed_url = parse.urlsplit(url)
+        host_key = (parsed_url.scheme, parsed_url.netloc)
+        session = self._sessions.get(host_key)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(host_key)
+            if session is None:
+                session = self._create_session()
+                self._sessions[host_key] = session
+            return session
+
+    def _create_session(self):
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = _PoolingHTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def get_stats(self):
+        """Return request and connection counters.
+
+        :rtype: dict
+        """
+        with self._lock:
+            num_hosts = len(self._sessions)
+        with _stats_lock:
+            num_requests = _num_requests
+            num_connections_opened = _num_connections_opened
+        return {
+            'pool_maxsize': self.pool_maxsize,
+            'hosts': num_hosts,
+            'requests': num_requests,
+            'connections_opened': num_connections_opened,
+            # Requests made over a connection kept alive by the pool
+            'pool_hits': max(num_requests - num_connections_opened, 0)
+        }
+
+
+CLOUDAPI_CONNECTION_POOL = CloudApiConnectionPool()
@@ -2,24 +2,27 @@
 # Copyright (c) 2020 VMware, Inc. All Rights Reserved.
 # SPDX-License-Identifier: BSD-2-Clause
 
+from collections import deque
 import json
 import sys
-from threading import Lock
+import threading
 from typing import Optional
 
-from lru import LRU
 import pika
 import requests
 
+from container_service_extension.common.constants.server_constants import DEFAULT_WRITE_PROCESSORS  # noqa: E501
 from container_service_extension.common.constants.server_constants import EXCHANGE_TYPE  # noqa: E501
 from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER
 import container_service_extension.mqi.consumer.constants as constants
-from container_service_extension.mqi.consumer.consumer_thread_pool_executor \
-    import ConsumerThreadPoolExecutor
+from container_service_extension.mqi.consumer.idempotency_cache import \
+    REQUEST_IDEMPOTENCY_CACHE
+from container_service_extension.mqi.consumer.outbound_publisher import \
+    OutboundPublisher
+from container_service_extension.mqi.consumer.request_lane_executor import \
+    RequestLaneExecutor
 import container_service_extension.mqi.consumer.utils as utils
-
-REQUESTS_BEING_PROCESSED = LRU(constants.MAX_PROCESSING_REQUEST_CACHE_SIZE)
-LRU_LOCK = Lock()
+import container_service_extension.server.request_dispatcher as request_dispatcher  # noqa: E501
 
 
 class AMQPConsumer(object):
@@ -31,8 +34,13 @@ class AMQPConsumer(object):
                  password,
                  exchange,
                  routing_key,
-                 num_processors):
+                 num_processors,
+                 num_write_processors=DEFAULT_WRITE_PROCESSORS,
+                 max_queue_size=0,
+                 max_queue_wait_time=0,
+                 prefetch_count=None):
         self._connection: Optional[pika.connection.Connection] = None
+        self._ioloop_thread: Optional[threading.Thread] = None
         self._channel: pika.channel.Channel = None
         self._closing = False
         self._consumer_tag: Optional[str] = None
@@ -45,9 +53,31 @@ class AMQPConsumer(object):
         self.routing_key = routing_key
         self.queue = routing_key
         self.num_processors = num_processors
+        self.num_write_processors = num_write_processors
         self.fsencoding = sys.getfilesystemencoding()
-        self._ctpe = ConsumerThreadPoolExecutor(self.num_processors)
-        self._publish_lock = Lock()
+        self._ctpe = RequestLaneExecutor(
+            self.num_processors,
+            self.num_write_processors,
+            max_queue_size=max_queue_size,
+            max_queue_wait_time=max_queue_wait_time)
+        self._outbound_publisher = OutboundPublisher(self._publish_batch)
+
+        # Broker is allowed to push only as many unacknowledged messages as
+        # one lane can admit, since a burst of messages may all belong to the
+        # same lane, and the smallest lane is the one that fills up first.
+        # Messages are acknowledged once a thread picks them up (or once they
+        # are rejected), so the broker holds on to the rest until the pools
+        # free up.
+        if prefetch_count is None:
+            prefetch_count = max(
+                max_queue_size + min(num_processors, num_write_processors), 1)
+        self.prefetch_count = prefetch_count
+        # Delivery tags (of the current channel) that are yet to be acked,
+        # in order of delivery, and the subset of those that can be acked.
+        # Only accessed from the ioloop thread.
+        self._unacked_delivery_tags = deque()
+        self._ready_to_ack_delivery_tags = set()
+        self._is_ack_flush_scheduled = False
 
     def connect(self) -> pika.connection.Connection:
         LOGGER.info(f"Connecting to {self.host}:{self.port}")
@@ -94,6 +124,9 @@ class AMQPConsumer(object):
     def on_channel_open(self, channel):
         LOGGER.debug("Channel opened")
         self._channel = channel
+        self._unacked_delivery_tags.clear()
+        self._ready_to_ack_delivery_tags.clear()
+        self._is_ack_flush_scheduled = False
         self.add_on_channel_close_callback()
         self.setup_exchange(self.exchange)
 
@@ -144,6 +177,15 @@ class AMQPConsumer(object):
 
     def on_bindok(self, unused_frame):
         LOGGER.debug("Queue bound")
+        self.set_qos()
+
+    def set_qos(self):
+        LOGGER.debug(f"Setting prefetch count to ({self.prefetch_count})")
+        self._channel.basic_qos(prefetch_count=self.prefetch_count,
+                                callback=self.on_basic_qos_ok)
+
+    def on_basic_qos_ok(self, unused_frame):
+        LOGGER.debug("QOS set")
         self.start_consuming()
 
     def start_consuming(self):
@@ -164,67 +206,85 @@ class AMQPConsumer(object):
         if self._channel:
             self._channel.close()
 
-    def form_response_json(self, request_id, status_code, reply_body_str):
+    def form_response_json(self, request_id, status_code, reply_body):
+        """Construct the reply message for a request.
+
+        :param str request_id: id of the request being replied to.
+        :param int status_code: http status code of the reply.
+        :param bytes reply_body: JSON encoded body of the reply.
+
+        :rtype: dict
+        """
         response_json = {
             'id': request_id,
             'headers': {
                 'Content-Type': 'application/json',
-                'Content-Length': len(reply_body_str)
+                'Content-Length': len(reply_body)
             },
             'statusCode': status_code,
-            'body': utils.format_response_body(reply_body_str,
-                                               self.fsencoding),
+            'body': utils.format_response_body(reply_body),
             'request': False
         }
         return response_json
 
-    def process_amqp_message(self, properties, body, basic_deliver):
+    def process_amqp_message(self, properties, request_msg):
         msg_json, reply_body, status_code, req_id = utils.get_response_fields(
-            request_msg=body,
-            fsencoding=self.fsencoding,
-            is_mqtt=False)
+            request_msg=request_msg)
 
+        reply_msg = None
         if properties.reply_to is not None:
-            reply_body_str = json.dumps(reply_body)
             reply_msg = self.form_response_json(
                 request_id=req_id,
                 status_code=status_code,
-                reply_body_str=reply_body_str)
+                reply_body=utils.encode_response_body(reply_body))
 
             self.send_response(reply_msg, properties)
-            LOGGER.debug(f"Successfully sent reply: {reply_msg} to AMQP.")
+            LOGGER.debug(f"Queued reply: {reply_msg} to AMQP.")
 
-        global REQUESTS_BEING_PROCESSED, LRU_LOCK
-        LRU_LOCK.acquire()
-        try:
-            if req_id in REQUESTS_BEING_PROCESSED:
-                del REQUESTS_BEING_PROCESSED[req_id]
-        finally:
-            LRU_LOCK.release()
+        if req_id is not None:
+            REQUEST_IDEMPOTENCY_CACHE.complete(req_id, reply_msg)
 
     def send_response(self, reply_msg, properties):
-        reply_properties = pika.BasicProperties(
-            correlation_id=properties.correlation_id)
-        self._publish_lock.acquire()
-        try:
+        """Hand over a reply to the publisher thread and return."""
+        self._outbound_publisher.publish((reply_msg, properties))
+
+    def _publish_batch(self, batch):
+        # Replies are serialized on the publisher thread, but published from
+        # the ioloop thread, since pika channels are not thread safe.
+        serialized_batch = [(json.dumps(reply_msg), properties)
+                            for reply_msg, properties in batch]
+        self._connection.ioloop.add_callback_threadsafe(
+            lambda: self._publish_serialized_batch(serialized_batch))
+
+    def _publish_serialized_batch(self, serialized_batch):
+        if not self._channel or not self._channel.is_open:
+            LOGGER.warning(f"Channel is closed, dropping "
+                           f"{len(serialized_batch)} replies")
+            return
+        for body, properties in serialized_batch:
             self._channel.basic_publish(
                 exchange=properties.headers['replyToExchange'],
                 routing_key=properties.reply_to,
-                body=json.dumps(reply_msg),
-                properties=reply_properties)
-        finally:
-            self._publish_lock.release()
+                body=body,
+                properties=pika.BasicProperties(
+                    correlation_id=properties.correlation_id))
 
-    def send_too_many_requests_response(self, properties, body):
+    def send_too_many_requests_response(self, properties, request_msg):
         if properties.reply_to is not None:
-            body_json = utils.str_to_json(body, self.fsencoding)[0]
             reply_msg = self.form_response_json(
-                request_id=body_json['id'],
+                request_id=request_msg.request_id,
                 status_code=requests.codes.too_many_requests,
-                reply_body_str=constants.TOO_MANY_REQUESTS_BODY)
-            LOGGER.debug(f"reply: ({ constants.TOO_MANY_REQUESTS_BODY})")
+                reply_body=constants.TOO_MANY_REQUESTS_BODY)
+            LOGGER.debug(f"reply: ({constants.TOO_MANY_REQUESTS_BODY})")
             self.send_response(reply_msg, properties)
 
+    def on_request_expired(self, properties, request_msg):
+        req_id = request_msg.request_id
+        LOGGER.debug(f"Request ({req_id}) waited too long in the queue")
+        self.send_too_many_requests_response(properties, request_msg)
+        if req_id is not None:
+            REQUEST_IDEMPOTENCY_CACHE.discard(req_id)
+
     def on_message(
             self,
             channel: pika.channel.Channel,
@@ -235,33 +295,94 @@ class AMQPConsumer(object):
         if channel.is_closed or channel.is_closing:
             return
 
-        req_id = utils.get_request_id(
-            request_msg=body, fsencoding=self.fsencoding)
-        global REQUESTS_BEING_PROCESSED, LRU_LOCK
-        LRU_LOCK.acquire()
-        try:
-            if req_id in REQUESTS_BEING_PROCESSED:
-                self.reject_message(basic_deliver.delivery_tag)
-                del REQUESTS_BEING_PROCESSED[req_id]
+        delivery_tag = basic_deliver.delivery_tag
+        request_msg = utils.parse_amqp_message(body, self.fsencoding)
+        req_id = request_msg.request_id
+        if req_id is not None:
+            is_new, cached_reply_msg = REQUEST_IDEMPOTENCY_CACHE.begin(req_id)
+            if not is_new:
+                if cached_reply_msg is None:
+                    # Request is still being processed
+                    self.reject_message(delivery_tag)
+                    return
+                LOGGER.debug(f"Replying to redelivered request ({req_id}) "
+                             f"with cached response")
+                self._unacked_delivery_tags.append(delivery_tag)
+                self.acknowledge_message(delivery_tag, channel)
+                if properties.reply_to is not None:
+                    self.send_response(cached_reply_msg, properties)
                 return
-        finally:
-            LRU_LOCK.release()
 
-        self.acknowledge_message(basic_deliver.delivery_tag)
-        if self._ctpe.max_threads_busy():
-            self.send_too_many_requests_response(properties, body)
-        else:
-            LRU_LOCK.acquire()
-            try:
-                REQUESTS_BEING_PROCESSED[req_id] = True
-            finally:
-                LRU_LOCK.release()
-            self._ctpe.submit(lambda: self.process_amqp_message(
-                properties, body, basic_deliver))
+        self._unacked_delivery_tags.append(delivery_tag)
+        future = self._ctpe.try_submit(
+            request_dispatcher.get_request_lane(request_msg),
+            lambda: self.process_amqp_message(properties, request_msg),
+            on_expired=lambda: self.on_request_expired(
+                properties, request_msg),
+            on_dequeued=lambda: self._connection.ioloop.add_callback_threadsafe(  # noqa: E501
+                lambda: self.acknowledge_message(delivery_tag, channel)))
+        if future is None:
+            self.acknowledge_message(delivery_tag, channel)
+            if req_id is not None:
+                REQUEST_IDEMPOTENCY_CACHE.discard(req_id)
+            self.send_too_many_requests_response(properties, request_msg)
+
+    def acknowledge_message(self, delivery_tag, channel):
+        """Mark a message as ready to be acknowledged.
+
+        Acknowledgements are coalesced and sent out by flush_acks(), either
+        when AMQP_ACK_BATCH_SIZE of them have accumulated or after
+        AMQP_ACK_FLUSH_INTERVAL_SEC, whichever happens first. Must be called
+        from the ioloop thread.
+
+        :param int delivery_tag: delivery tag of the message.
+        :param pika.channel.Channel channel: channel the message was
+            delivered on. Acks for messages delivered on an older channel are
+            dropped, since the broker will redeliver those messages anyway.
+        """
+        if channel is not self._channel:
+            LOGGER.debug(f"Dropping ack for message ({delivery_tag}) "
+                         f"delivered on a closed channel")
+            return
+        self._ready_to_ack_delivery_tags.add(delivery_tag)
+        if len(self._ready_to_ack_delivery_tags) >= \
+                constants.AMQP_ACK_BATCH_SIZE:
+            self.flush_acks()
+        elif not self._is_ack_flush_scheduled:
+            self._is_ack_flush_scheduled = True
+            self._connection.ioloop.call_later(
+                constants.AMQP_ACK_FLUSH_INTERVAL_SEC, self.flush_acks)
+
+    def flush_acks(self):
+        """Send out all pending acknowledgements.
+
+        The longest prefix of pending messages (in delivery order) that are
+        all ready to be acked is acknowledged with a single Basic.Ack with
+        multiple=True. Remaining ready messages are acked individually.
+        """
+        self._is_ack_flush_scheduled = False
+        ready_tags = self._ready_to_ack_delivery_tags
+        if not ready_tags:
+            return
+        if not self._channel or not self._channel.is_open:
+            ready_tags.clear()
+            return
 
-    def acknowledge_message(self, delivery_tag):
-        LOGGER.debug(f"Acknowledging message ({delivery_tag})")
-        self._channel.basic_ack(delivery_tag=delivery_tag)
+        last_contiguous_tag = None
+        while self._unacked_delivery_tags and \
+                self._unacked_delivery_tags[0] in ready_tags:
+            last_contiguous_tag = self._unacked_delivery_tags.popleft()
+            ready_tags.remove(last_contiguous_tag)
+        if last_contiguous_tag is not None:
+            LOGGER.debug(f"Acknowledging messages up to "
+                         f"({last_contiguous_tag})")
+            self._channel.basic_ack(delivery_tag=last_contiguous_tag,
+                                    multiple=True)
+        for delivery_tag in sorted(ready_tags):
+            LOGGER.debug(f"Acknowledging message ({delivery_tag})")
+            self._unacked_delivery_tags.remove(delivery_tag)
+            self._channel.basic_ack(delivery_tag=delivery_tag)
+        ready_tags.clear()
 
     def reject_message(self, delivery_tag):
         LOGGER.debug(f"Rejecting message {delivery_tag}")
@@ -299,12 +420,49 @@ class AMQPConsumer(object):
 
     def run(self):
         self._connection = self.connect()
+        self._ioloop_thread = threading.current_thread()
         self._connection.ioloop.start()
 
+    def _run_on_ioloop(self, callback):
+        """Run a callback on the ioloop thread, and wait for it to finish.
+
+        :param callable callback: function without arguments.
+
+        :return: False if the ioloop didn't run the callback in time.
+        :rtype: bool
+        """
+        if self._connection is None:
+            return True
+        if threading.current_thread() is self._ioloop_thread:
+            callback()
+            return True
+        is_done = threading.Event()
+
+        def run_callback():
+            try:
+                callback()
+            finally:
+                is_done.set()
+
+        self._connection.ioloop.add_callback_threadsafe(run_callback)
+        return is_done.wait(constants.AMQP_STOP_IOLOOP_TIMEOUT_SEC)
+
     def stop(self):
         LOGGER.info("Stopping")
         self._closing = True
         self._ctpe.shutdown(wait=True)
+        # Flush replies of the finished jobs before closing the channel. The
+        # publisher thread only posts them to the ioloop, which runs
+        # callbacks in order: once a callback posted afterwards has run, the
+        # replies have been published.
+        if not self._outbound_publisher.stop():
+            LOGGER.warning("Timed out handing over replies to the ioloop")
+        if not self._run_on_ioloop(lambda: None):
+            LOGGER.warning("Timed out publishing replies")
+        # Acks held back for coalescing would be lost with the channel, and
+        # the broker would redeliver the messages to another consumer
+        if not self._run_on_ioloop(self.flush_acks):
+            LOGGER.warning("Timed out flushing acknowledgements")
         self.stop_consuming()
         if self._connection:
             self._connection.ioloop.stop()
@@ -319,3 +477,9 @@ class AMQPConsumer(object):
 
     def get_num_total_threads(self):
         return self._ctpe.get_num_total_threads()
+
+    def get_queue_stats(self):
+        return self._ctpe.get_queue_stats()
+
+    def get_idempotency_cache_stats(self):
+        return REQUEST_IDEMPOTENCY_CACHE.get_stats()
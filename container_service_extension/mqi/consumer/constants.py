@@ -6,7 +6,12 @@ from container_service_extension.common.constants.shared_constants import CSE_SE
 
 # Shared between AMQP and MQTT consumers
 TOO_MANY_REQUESTS_BODY = f'{{"{CSE_SERVER_BUSY_KEY}":' \
-                         f'"Please wait and try again."}}'
+                         f'"Please wait and try again."}}'.encode()
+
+# Outbound messages are published in batches of at most this size
+MAX_PUBLISH_BATCH_SIZE = 50
+# Max time (in seconds) to wait for pending messages to be published on stop
+PUBLISHER_STOP_TIMEOUT_SEC = 10
 
 # Used by MQTT consumer
 MQTT_BROKER_PATH = '/messaging/mqtt'
@@ -15,5 +20,16 @@ MQTT_CONNECT_PORT = 443
 TRANSPORT_WSS = 'websockets'
 QOS_LEVEL = 2  # No duplicate messages
 
-# Used by only AMQP consumer
+# Idempotency cache of requests, used to detect redelivered requests
 MAX_PROCESSING_REQUEST_CACHE_SIZE = 1000
+PROCESSING_REQUEST_CACHE_TTL_SEC = 600
+PROCESSING_REQUEST_CACHE_NUM_STRIPES = 16
+
+# Used by only AMQP consumer
+# Max number of acknowledgements coalesced into a single Basic.Ack
+AMQP_ACK_BATCH_SIZE = 20
+# Max time (in seconds) an acknowledgement is held back before it is flushed
+AMQP_ACK_FLUSH_INTERVAL_SEC = 0.1
+# Max time (in seconds) to wait on stop for the ioloop to run the callbacks
+# posted before, like pending acknowledgements
+AMQP_STOP_IOLOOP_TIMEOUT_SEC = 10
@@ -2,39 +2,75 @@
 # Copyright (c) 2020 VMware, Inc. All Rights Reserved.
 # SPDX-License-Identifier: BSD-2-Clause
 
+from typing import Optional
+
 import container_service_extension.common.constants.server_constants as server_constants  # noqa: E501
 from container_service_extension.common.constants.server_constants import MQTTExtKey, MQTTExtTokenKey  # noqa: E501
 import container_service_extension.common.utils.server_utils as server_utils
 from container_service_extension.config.server_config import ServerConfig
 from container_service_extension.mqi.consumer.amqp_consumer import AMQPConsumer
+import container_service_extension.mqi.consumer.constants as consumer_constants
 from container_service_extension.mqi.consumer.mqtt_consumer import MQTTConsumer
 
 
 class MessageConsumer:
     """Returns the consumer class for the correct message protocol."""
 
-    def __new__(cls, config: ServerConfig, num_processors: int):
+    def __new__(cls, config: ServerConfig, num_processors: int,
+                worker_id: Optional[int] = None):
         """Create the correct message consumer class for the message protocol.
 
         :param ServerConfig config: content of the CSE config file.
         :param int num_processors: number of processors for thread pool
-            executor
+            executor of read requests
+        :param int worker_id: id of the worker process, if CSE server is
+            running in multi-process mode. Consumers of all worker processes
+            share the same AMQP queue or MQTT shared subscription.
 
         :return: instance of appropriate message protocol consumer
         """
+        try:
+            num_write_processors = config.get_value_at('service.write_processors')  # noqa: E501
+        except KeyError:
+            num_write_processors = server_constants.DEFAULT_WRITE_PROCESSORS
+        try:
+            max_queue_size = config.get_value_at('service.request_queue_size')  # noqa: E501
+        except KeyError:
+            max_queue_size = server_constants.DEFAULT_REQUEST_QUEUE_SIZE
+        try:
+            max_queue_wait_time = config.get_value_at('service.request_queue_timeout')  # noqa: E501
+        except KeyError:
+            max_queue_wait_time = \
+                server_constants.DEFAULT_REQUEST_QUEUE_TIMEOUT_SEC
+
         if server_utils.should_use_mqtt_protocol(config):
+            listen_topic = config.get_value_at(f'mqtt.{MQTTExtKey.EXT_LISTEN_TOPIC}')  # noqa: E501
+            client_id = consumer_constants.MQTT_CLIENT_ID
+            if worker_id is not None:
+                listen_topic = f'$share/' \
+                    f'{server_constants.MQTT_SHARED_SUBSCRIPTION_GROUP}/' \
+                    f'{listen_topic}'
+                client_id = f'{client_id}-{worker_id}'
             return MQTTConsumer(
                 url=config.get_value_at('vcd.host'),
-                listen_topic=config.get_value_at(f'mqtt.{MQTTExtKey.EXT_LISTEN_TOPIC}'),  # noqa: E501
+                listen_topic=listen_topic,
+                client_id=client_id,
                 respond_topic=config.get_value_at(f'mqtt.{MQTTExtKey.EXT_RESPOND_TOPIC}'),  # noqa: E501
                 verify_ssl=config.get_value_at('mqtt.verify_ssl'),
                 token=config.get_value_at(f'mqtt.{MQTTExtTokenKey.TOKEN}'),
                 client_username=f'{server_constants.MQTT_EXTENSION_VENDOR}/'
                                 f'{server_constants.CSE_SERVICE_NAME}/'
                                 f'{server_constants.MQTT_EXTENSION_VERSION}',
-                num_processors=num_processors
+                num_processors=num_processors,
+                num_write_processors=num_write_processors,
+                max_queue_size=max_queue_size,
+                max_queue_wait_time=max_queue_wait_time
             )
         else:
+            try:
+                prefetch_count = config.get_value_at('amqp.prefetch_count')
+            except KeyError:
+                prefetch_count = None
             return AMQPConsumer(
                 host=config.get_value_at('amqp.host'),
                 port=config.get_value_at('amqp.port'),
@@ -43,5 +79,9 @@ class MessageConsumer:
                 password=config.get_value_at('amqp.password'),
                 exchange=config.get_value_at('amqp.exchange'),
                 routing_key=config.get_value_at('amqp.routing_key'),
-                num_processors=num_processors
+                num_processors=num_processors,
+                num_write_processors=num_write_processors,
+                max_queue_size=max_queue_size,
+                max_queue_wait_time=max_queue_wait_time,
+                prefetch_count=prefetch_count
             )
@@ -4,19 +4,40 @@
 
 from concurrent.futures import ThreadPoolExecutor
 from threading import Lock
+import time
 
 
 class ConsumerThreadPoolExecutor(ThreadPoolExecutor):
-    def __init__(self, max_workers):
+    """Thread pool executor with a bounded admission queue.
+
+    Up to max_workers requests are processed concurrently, and up to
+    max_queue_size additional requests wait in line for a free thread.
+    A request that waits longer than max_queue_wait_time seconds before a
+    thread picks it up is not processed; its expiry callback is invoked
+    instead.
+    """
+
+    def __init__(self, max_workers, max_queue_size=0,
+                 max_queue_wait_time=0):
         super().__init__(max_workers=max_workers,
                          initializer=lambda: self.increment_num_total_threads())  # noqa: E501
 
         self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.max_queue_wait_time = max_queue_wait_time
         self._num_active_threads = 0
         self._num_active_threads_lock = Lock()
         self._num_total_threads = 0
         self._num_total_threads_lock = Lock()
 
+        self._queue_stats_lock = Lock()
+        self._num_running = 0
+        self._num_rejected = 0
+        self._num_expired = 0
+        self._num_dequeued = 0
+        self._total_queue_wait_time = 0.0
+        self._max_queue_wait_time_seen = 0.0
+
     def increment_num_total_threads(self):
         """Call when each thread in the TPE is initialized."""
         self._num_total_threads_lock.acquire()
@@ -34,6 +55,7 @@ class ConsumerThreadPoolExecutor(ThreadPoolExecutor):
         return num_total_threads
 
     def get_num_active_threads(self):
+        """Return number of requests in flight, including queued ones."""
         self._num_active_threads_lock.acquire()
         try:
             num_active_threads = self._num_active_threads
@@ -64,4 +86,94 @@ class ConsumerThreadPoolExecutor(ThreadPoolExecutor):
 
     def max_threads_busy(self):
         """Return bool to indicate if max_workers are busy."""
-        return self.get_num_active_threads() == self.max_workers
+        return self.get_num_active_threads() >= self.max_workers
+
+    def is_queue_full(self):
+        """Return bool to indicate if no more requests can be admitted."""
+        return self.get_num_active_threads() >= \
+            self.max_workers + self.max_queue_size
+
+    def try_submit(self, fn, on_expired, on_dequeued=None):
+        """Admit a request into the executor if there is room for it.
+
+        :param callable fn: callable that processes the request.
+        :param callable on_expired: callable invoked in place of fn if the
+            request waited in the queue for longer than max_queue_wait_time.
+        :param callable on_dequeued: optional callable invoked as soon as a
+            thread picks up the request, before fn or on_expired.
+
+        :return: future of the submitted request, or None if the admission
+            queue is full and the request was rejected.
+
+        :rtype: concurrent.futures.Future
+        """
+        if self.is_queue_full():
+            self._queue_stats_lock.acquire()
+            try:
+                self._num_rejected += 1
+            finally:
+                self._queue_stats_lock.release()
+            return None
+
+        enqueue_time = time.monotonic()
+
+        def _run():
+            wait_time = time.monotonic() - enqueue_time
+            expired = 0 < self.max_queue_wait_time < wait_time
+            self._record_dequeue(wait_time, expired)
+            try:
+                if on_dequeued is not None:
+                    on_dequeued()
+                if expired:
+                    on_expired()
+                else:
+                    fn()
+            finally:
+                if not expired:
+                    self._queue_stats_lock.acquire()
+                    try:
+                        self._num_running -= 1
+                    finally:
+                        self._queue_stats_lock.release()
+
+        return self.submit(_run)
+
+    def _record_dequeue(self, wait_time, expired):
+        self._queue_stats_lock.acquire()
+        try:
+            self._num_dequeued += 1
+            self._total_queue_wait_time += wait_time
+            if wait_time > self._max_queue_wait_time_seen:
+                self._max_queue_wait_time_seen = wait_time
+            if expired:
+                self._num_expired += 1
+            else:
+                self._num_running += 1
+        finally:
+            self._queue_stats_lock.release()
+
+    def get_queue_stats(self):
+        """Return admission queue depth and wait time statistics.
+
+        :rtype: dict
+        """
+        num_in_flight = self.get_num_active_threads()
+        self._queue_stats_lock.acquire()
+        try:
+            avg_wait_time = self._total_queue_wait_time / self._num_dequeued \
+                if self._num_dequeued else 0.0
+            return {
+                'max_workers': self.max_workers,
+                'busy_threads': self._num_running,
+                'max_queue_size': self.max_queue_size,
+                'max_queue_wait_time_sec': self.max_queue_wait_time,
+                'queue_depth': max(num_in_flight - self._num_running, 0),
+                'requests_rejected': self._num_rejected,
+                'requests_expired': self._num_expired,
+                'requests_dequeued': self._num_dequeued,
+                'avg_queue_wait_time_sec': round(avg_wait_time, 3),
+                'max_queue_wait_time_seen_sec':
+                    round(self._max_queue_wait_time_seen, 3)
+            }
+        finally:
+            self._queue_stats_lock.release()
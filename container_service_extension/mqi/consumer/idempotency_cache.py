@@ -0,0 +1,211 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Idempotency cache shared by the AMQP and MQTT message consumers.
+
+Message buses may redeliver a request, e.g. after a reconnect or at MQTT QoS
+2 when the acknowledgement got lost. The cache remembers each request id for
+a fixed amount of time, along with the response sent for it, so that a
+redelivered request is answered from the cache instead of being processed
+again.
+
+The cache is split into independently locked stripes, so that consumer
+threads working on different requests rarely contend for the same lock.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+import time
+
+import container_service_extension.mqi.consumer.constants as constants
+
+
+class _Entry:
+    __slots__ = ('response', 'is_complete', 'expiry_time')
+
+    def __init__(self, expiry_time):
+        self.response = None
+        self.is_complete = False
+        self.expiry_time = expiry_time
+
+
+class _Stripe:
+    __slots__ = ('lock', 'entries')
+
+    def __init__(self):
+        self.lock = Lock()
+        # Ordered by expiry time, oldest first
+        self.entries = OrderedDict()
+
+
+class IdempotencyCache:
+    def __init__(self, max_size, ttl, num_stripes):
+        """Create a cache of request ids with TTL based expiry.
+
+        :param int max_size: max number of request ids to remember.
+        :param int ttl: number of seconds a request id is remembered for,
+            measured from the time it was last started or completed.
+        :param int num_stripes: number of independently locked stripes.
+        """
+        self.ttl = ttl
+        self._max_size_per_stripe = max(max_size // num_stripes, 1)
+        self._stripes = [_Stripe() for _ in range(num_stripes)]
+        self._stats_lock = Lock()
+        self._num_hits = 0
+        self._num_misses = 0
+        self._num_evictions = 0
+
+    def _get_stripe(self, request_id):
+        return self._stripes[hash(request_id) % len(self._stripes)]
+
+    def _evict(self, stripe, now):
+        """Remove expired entries and completed entries over capacity.
+
+        Entries of requests still being processed are only removed once
+        expired, so that a redelivery of a request in progress is never
+        processed twice. The stripe may exceed its capacity by the number of
+        such entries, which is bounded by the number of consumer threads.
+
+        Must be called with the stripe lock held.
+
+        :return: number of evicted entries.
+        :rtype: int
+        """
+        num_evicted = 0
+        entries = stripe.entries
+        while entries:
+            request_id, entry = next(iter(entries.items()))
+            if entry.expiry_time > now:
+                break
+            del entries[request_id]
+            num_evicted += 1
+
+        num_over_capacity = len(entries) - self._max_size_per_stripe
+        if num_over_capacity > 0:
+            # Oldest completed entries first
+            evicted_request_ids = []
+            for request_id, entry in entries.items():
+                if len(evicted_request_ids) == num_over_capacity:
+                    break
+                if entry.is_complete:
+                    evicted_request_ids.append(request_id)
+            for request_id in evicted_request_ids:
+                del entries[request_id]
+            num_evicted += len(evicted_request_ids)
+        return num_evicted
+
+    def begin(self, request_id):
+        """Register the start of processing of a request.
+
+        :param str request_id: id of the request.
+
+        :return: a tuple of two values. The first value is True if the
+            request is new and should be processed. Otherwise, the second
+            value is the response previously sent for the request, or None if
+            the request is still being processed.
+        :rtype: tuple
+        """
+        now = time.monotonic()
+        stripe = self._get_stripe(request_id)
+        stripe.lock.acquire()
+        try:
+            entry = stripe.entries.get(request_id)
+            if entry is not None and entry.expiry_time > now:
+                is_new = False
+                response = entry.response
+            else:
+                is_new = True
+                response = None
+                stripe.entries[request_id] = _Entry(now + self.ttl)
+                stripe.entries.move_to_end(request_id)
+            num_evicted = self._evict(stripe, now)
+        finally:
+            stripe.lock.release()
+
+        self._stats_lock.acquire()
+        try:
+            if is_new:
+                self._num_misses += 1
+            else:
+                self._num_hits += 1
+            self._num_evictions += num_evicted
+        finally:
+            self._stats_lock.release()
+        return is_new, response
+
+    def complete(self, request_id, response):
+        """Record the response sent for a request.
+
+        :param str request_id: id of the request.
+        :param response: response sent for the request, in the form it
+            should be resent on redelivery.
+        """
+        now = time.monotonic()
+        stripe = self._get_stripe(request_id)
+        stripe.lock.acquire()
+        try:
+            entry = stripe.entries.get(request_id)
+            if entry is None:
+                entry = _Entry(now + self.ttl)
+                stripe.entries[request_id] = entry
+            entry.response = response
+            entry.is_complete = True
+            entry.expiry_time = now + self.ttl
+            stripe.entries.move_to_end(request_id)
+        finally:
+            stripe.lock.release()
+
+    def discard(self, request_id):
+        """Forget a request, so that a redelivery of it gets processed.
+
+        :param str request_id: id of the request.
+        """
+        stripe = self._get_stripe(request_id)
+        stripe.lock.acquire()
+        try:
+            stripe.entries.pop(request_id, None)
+        finally:
+            stripe.lock.release()
+
+    def get_stats(self):
+        """Return cache hit, miss and eviction counters.
+
+        :rtype: dict
+        """
+        now = time.monotonic()
+        num_in_progress = 0
+        num_complete = 0
+        for stripe in self._stripes:
+            stripe.lock.acquire()
+            try:
+                for entry in stripe.entries.values():
+                    if entry.expiry_time <= now:
+                        continue
+                    if entry.is_complete:
+                        num_complete += 1
+                    else:
+                        num_in_progress += 1
+            finally:
+                stripe.lock.release()
+
+        self._stats_lock.acquire()
+        try:
+            return {
+                'ttl_sec': self.ttl,
+                'requests_in_progress': num_in_progress,
+                'responses_cached': num_complete,
+                'hits': self._num_hits,
+                'misses': self._num_misses,
+                'evictions': self._num_evictions
+            }
+        finally:
+            self._stats_lock.release()
+
+
+# Shared by all consumers in the process, so that it survives the consumer
+# being recreated by the watchdog.
+REQUEST_IDEMPOTENCY_CACHE = IdempotencyCache(
+    max_size=constants.MAX_PROCESSING_REQUEST_CACHE_SIZE,
+    ttl=constants.PROCESSING_REQUEST_CACHE_TTL_SEC,
+    num_stripes=constants.PROCESSING_REQUEST_CACHE_NUM_STRIPES)
@@ -2,7 +2,7 @@
 # Copyright (c) 2020 VMware, Inc. All Rights Reserved.
 # SPDX-License-Identifier: BSD-2-Clause
 
-import json
+from dataclasses import asdict
 import ssl
 import sys
 from typing import Optional
@@ -10,13 +10,19 @@ from typing import Optional
 import paho.mqtt.client as mqtt
 import requests
 
+from container_service_extension.common.constants.server_constants import DEFAULT_WRITE_PROCESSORS  # noqa: E501
 from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER
 import container_service_extension.mqi.consumer.constants as constants
-from container_service_extension.mqi.consumer.consumer_thread_pool_executor \
-    import ConsumerThreadPoolExecutor
+from container_service_extension.mqi.consumer.idempotency_cache import \
+    REQUEST_IDEMPOTENCY_CACHE
 from container_service_extension.mqi.consumer.mqtt_publisher import MQTTPublisher  # noqa: E501
+from container_service_extension.mqi.consumer.request_lane_executor import \
+    RequestLaneExecutor
 import container_service_extension.mqi.consumer.utils as utils
+from container_service_extension.rde.behaviors.behavior_model import \
+    BehaviorError, BehaviorTaskStatus
 import container_service_extension.server.behavior_dispatcher as behavior_dispatcher  # noqa: E501
+import container_service_extension.server.request_dispatcher as request_dispatcher  # noqa: E501
 
 
 class MQTTConsumer:
@@ -27,74 +33,104 @@ class MQTTConsumer:
                  verify_ssl,
                  token,
                  client_username,
-                 num_processors):
+                 num_processors,
+                 num_write_processors=DEFAULT_WRITE_PROCESSORS,
+                 client_id=constants.MQTT_CLIENT_ID,
+                 max_queue_size=0,
+                 max_queue_wait_time=0):
         self.url = url
         self.listen_topic = listen_topic
         self.respond_topic = respond_topic
         self.verify_ssl = verify_ssl
         self.token = token
         self.client_username = client_username
+        self.client_id = client_id
         self.num_processors = num_processors
+        self.num_write_processors = num_write_processors
         self.fsencoding = sys.getfilesystemencoding()
         self._mqtt_client = None
         self._mqtt_publisher: Optional[MQTTPublisher] = None
-        self._ctpe = ConsumerThreadPoolExecutor(self.num_processors)
+        self._ctpe = RequestLaneExecutor(
+            self.num_processors,
+            self.num_write_processors,
+            max_queue_size=max_queue_size,
+            max_queue_wait_time=max_queue_wait_time)
         self._is_closing = False
 
-    def process_behavior_message(self, msg_json):
+    def process_behavior_message(self, request_msg):
+        msg_json = request_msg.message
         task_id: str = msg_json['headers']['taskId']
         entity_id: str = msg_json['headers']['entityId']
         behavior_id: str = msg_json['headers']['behaviorId']
-        payload: dict = json.loads(msg_json['payload'])
-        request_id: str = payload['_metadata']['requestId']
+        request_id: str = request_msg.behavior_payload['_metadata']['requestId']  # noqa: E501
         LOGGER.debug(f"Received behavior invocation: {behavior_id} on "
                      f"entityId:{entity_id} with requestId: {request_id}")
         payload = behavior_dispatcher.process_behavior_request(
-            msg_json, self._mqtt_publisher)
+            request_msg, self._mqtt_publisher)
 
         response_json = self._mqtt_publisher.construct_behavior_response_json(
             task_id=task_id,
             entity_id=entity_id,
             payload=payload)
         self._mqtt_publisher.send_response(response_json)
+        REQUEST_IDEMPOTENCY_CACHE.complete(task_id, response_json)
         LOGGER.debug(f'MQTT response: {response_json}')
 
-    def process_mqtt_message(self, msg):
-        msg_json = json.loads(msg.payload.decode(self.fsencoding))
-        if msg_json.get('type', None) == 'BEHAVIOR_INVOCATION':   # noqa: E501
-            self.process_behavior_message(msg_json=msg_json)
+    def process_mqtt_message(self, msg, request_msg):
+        if request_msg.is_behavior_invocation:
+            self.process_behavior_message(request_msg)
         else:
             msg_json, reply_body, status_code, req_id = utils.get_response_fields(  # noqa: E501
-                request_msg=msg,
-                fsencoding=self.fsencoding,
-                is_mqtt=True,
+                request_msg=request_msg,
                 mqtt_publisher=self._mqtt_publisher)
 
             LOGGER.debug(f"Received message with request_id: {req_id}, mid: "
-                         f"{msg.mid}, and msg json: {msg_json}")
+                         f"{msg.mid}")
 
             task_path = utils.get_task_path_from_reply_body(reply_body)
-            reply_body_str = json.dumps(reply_body)
             response_json = self._mqtt_publisher.construct_response_json(
                 request_id=req_id,
                 status_code=status_code,
-                reply_body_str=reply_body_str,
+                reply_body=utils.encode_response_body(reply_body),
                 task_path=task_path)
 
             self._mqtt_publisher.send_response(response_json)
+            if req_id is not None:
+                REQUEST_IDEMPOTENCY_CACHE.complete(req_id, response_json)
             LOGGER.debug(f'MQTT response: {response_json}')
 
-    def send_too_many_requests_response(self, msg):
-        payload_json = utils.str_to_json(msg.payload, self.fsencoding)
-        request_id = payload_json["headers"]["requestId"]
+    def send_too_many_requests_response(self, msg, request_msg):
+        request_id = request_msg.request_id
         LOGGER.debug(f"Replying with 'too many requests response' for "
                      f"request_id: {request_id} and msg id: {msg.mid}")
-        response_json = self._mqtt_publisher.construct_response_json(
-            request_id=request_id,
-            status_code=requests.codes.too_many_requests,
-            reply_body_str=constants.TOO_MANY_REQUESTS_BODY)
+        if request_msg.is_behavior_invocation:
+            payload = self._mqtt_publisher.construct_behavior_payload(
+                status=BehaviorTaskStatus.ERROR.value,
+                error_details=asdict(BehaviorError(
+                    majorErrorCode=str(requests.codes.too_many_requests),
+                    message=constants.TOO_MANY_REQUESTS_BODY.decode())))
+            response_json = \
+                self._mqtt_publisher.construct_behavior_response_json(
+                    task_id=request_id,
+                    entity_id=request_msg.headers['entityId'],
+                    payload=payload)
+        else:
+            response_json = self._mqtt_publisher.construct_response_json(
+                request_id=request_id,
+                status_code=requests.codes.too_many_requests,
+                reply_body=constants.TOO_MANY_REQUESTS_BODY)
         self._mqtt_publisher.send_response(response_json)
 
+    def get_request_lane(self, request_msg):
+        if request_msg.is_behavior_invocation:
+            return behavior_dispatcher.get_behavior_lane(request_msg)
+        return request_dispatcher.get_request_lane(request_msg)
+
+    def on_request_rejected(self, msg, request_msg):
+        if request_msg.request_id is not None:
+            REQUEST_IDEMPOTENCY_CACHE.discard(request_msg.request_id)
+        self.send_too_many_requests_response(msg, request_msg)
+
     def connect(self):
         def on_connect(mqtt_client, userdata, flags, rc):
             LOGGER.info(f'MQTT client connected with result code {rc} and '
@@ -105,10 +141,30 @@ class MQTTConsumer:
             # No longer processing messages if server is closing
             if self._is_closing:
                 return
-            if self._ctpe.max_threads_busy():
-                self.send_too_many_requests_response(msg)
-            else:
-                self._ctpe.submit(lambda: self.process_mqtt_message(msg))
+
+            request_msg = utils.parse_mqtt_message(msg, self.fsencoding)
+            req_id = request_msg.request_id
+            if req_id is not None:
+                is_new, cached_response_json = \
+                    REQUEST_IDEMPOTENCY_CACHE.begin(req_id)
+                if not is_new:
+                    if cached_response_json is not None:
+                        LOGGER.debug(f"Replying to redelivered request "
+                                     f"({req_id}) with cached response")
+                        self._mqtt_publisher.send_response(
+                            cached_response_json)
+                    else:
+                        LOGGER.debug(f"Ignoring redelivered request "
+                                     f"({req_id}) still being processed")
+                    return
+
+            future = self._ctpe.try_submit(
+                self.get_request_lane(request_msg),
+                lambda: self.process_mqtt_message(msg, request_msg),
+                on_expired=lambda: self.on_request_rejected(
+                    msg, request_msg))
+            if future is None:
+                self.on_request_rejected(msg, request_msg)
 
         def on_subscribe(mqtt_client, userdata, msg_id, given_qos):
             LOGGER.info(f'MQTT client subscribed with given_qos: {given_qos}')
@@ -116,7 +172,7 @@ class MQTTConsumer:
         def on_disconnect(mqtt_client, userdata, rc):
             LOGGER.info(f'MQTT disconnect with reason: {rc}')
 
-        self._mqtt_client = mqtt.Client(client_id=constants.MQTT_CLIENT_ID,
+        self._mqtt_client = mqtt.Client(client_id=self.client_id,
                                         transport=constants.TRANSPORT_WSS)
         self._mqtt_client.username_pw_set(username=self.client_username,
                                           password=self.token)
@@ -150,6 +206,9 @@ class MQTTConsumer:
         LOGGER.info("MQTT consumer stopping")
         self._is_closing = True
         self._ctpe.shutdown(wait=True)  # Let jobs finish before disconnecting
+        if self._mqtt_publisher:
+            # Flush responses of the finished jobs before disconnecting
+            self._mqtt_publisher.stop()
         if self._mqtt_client:
             self._mqtt_client.disconnect()
 
@@ -158,3 +217,9 @@ class MQTTConsumer:
 
     def get_num_total_threads(self):
         return self._ctpe.get_num_total_threads()
+
+    def get_queue_stats(self):
+        return self._ctpe.get_queue_stats()
+
+    def get_idempotency_cache_stats(self):
+        return REQUEST_IDEMPOTENCY_CACHE.get_stats()
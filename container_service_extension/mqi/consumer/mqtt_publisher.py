@@ -1,10 +1,11 @@
 import json
-from threading import Lock
 
 import requests
 
 from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER
 import container_service_extension.mqi.consumer.constants as constants
+from container_service_extension.mqi.consumer.outbound_publisher import \
+    OutboundPublisher
 import container_service_extension.mqi.consumer.utils as utils
 from container_service_extension.rde.behaviors.behavior_model import \
     BehaviorTaskStatus
@@ -16,20 +17,35 @@ class MQTTPublisher:
     It provides methods to construct and send traditional MQTT messages and
     Behavior type MQTT messages.
 
-    It holds a lock to avoid concurrent message publishing to MQTT. Hence,
-    there can only exist one instance of this class and it cannot be
-    initialized outside of the MQTTConsumer. Locking mechanism needs to be
-    changed if we ever decide to have more than one instance of MQTTConsumer.
+    Messages are handed over to a dedicated publisher thread, which
+    serializes and publishes them, so that worker threads never block on
+    each other while sending responses. There should only exist one
+    instance of this class per MQTTConsumer, and it must be stopped along
+    with the consumer.
     """
 
     def __init__(self, mqtt_client, respond_topic, fsencoding):
         self.mqtt_client = mqtt_client
         self.respond_topic = respond_topic
-        self._publish_lock = Lock()
         self._fsencoding = fsencoding
+        # paho-mqtt writes each message to the socket as soon as it is
+        # published and has no way to send several messages at once, so
+        # responses are published one at a time.
+        self._outbound_publisher = OutboundPublisher(
+            self._publish_responses, max_batch_size=1)
 
-    def construct_response_json(self, request_id, status_code, reply_body_str,
+    def construct_response_json(self, request_id, status_code, reply_body,
                                 task_path=None):
+        """Construct the API response to be published onto MQTT.
+
+        :param str request_id: id of the request being replied to.
+        :param int status_code: http status code of the response.
+        :param bytes reply_body: JSON encoded body of the response.
+        :param str task_path: path of the task tracking the request, if any.
+
+        :return: API response
+        :rtype: dict
+        """
         response_json = {
             "type": "API_RESPONSE",
             "headers": {
@@ -39,10 +55,9 @@ class MQTTPublisher:
                 "statusCode": status_code,
                 "headers": {
                     "Content-Type": "application/json",
-                    "Content-Length": len(reply_body_str)
+                    "Content-Length": len(reply_body)
                 },
-                "body": utils.format_response_body(reply_body_str,
-                                                   self._fsencoding)
+                "body": utils.format_response_body(reply_body)
             }
         }
 
@@ -104,13 +119,21 @@ class MQTTPublisher:
         return response_json
 
     def send_response(self, response_json):
-        self._publish_lock.acquire()
-        try:
+        """Hand over a response to the publisher thread and return."""
+        self._outbound_publisher.publish(response_json)
+
+    def _publish_responses(self, response_jsons):
+        for response_json in response_jsons:
             pub_ret = self.mqtt_client.publish(topic=self.respond_topic,
                                                payload=json.dumps(
                                                    response_json),
                                                qos=constants.QOS_LEVEL,
                                                retain=False)
-        finally:
-            self._publish_lock.release()
-        LOGGER.debug(f"publish return (rc, msg_id): {pub_ret}")
+            LOGGER.debug(f"publish return (rc, msg_id): {pub_ret}")
+
+    def get_num_pending_responses(self):
+        return self._outbound_publisher.get_num_pending_messages()
+
+    def stop(self):
+        """Publish all pending responses and stop the publisher thread."""
+        self._outbound_publisher.stop()
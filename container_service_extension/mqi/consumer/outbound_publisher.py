@@ -0,0 +1,82 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+import queue
+from threading import Thread
+import traceback
+
+from container_service_extension.common.constants.server_constants import MESSAGE_PUBLISHER_THREAD  # noqa: E501
+from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER
+import container_service_extension.mqi.consumer.constants as constants
+
+_STOP = object()
+
+
+class OutboundPublisher:
+    """Publish outbound messages from a single dedicated thread.
+
+    Worker threads hand over messages via publish(), which only enqueues the
+    message and returns immediately. The publisher thread drains the queue
+    in batches of up to max_batch_size messages and passes each batch to
+    publish_batch, in the order the messages were enqueued. Serialization of
+    the messages is expected to happen in publish_batch, so that it stays off
+    the worker threads.
+    """
+
+    def __init__(self, publish_batch,
+                 max_batch_size=constants.MAX_PUBLISH_BATCH_SIZE):
+        """Start the publisher thread.
+
+        :param callable publish_batch: callable that accepts a list of
+            messages and publishes them.
+        :param int max_batch_size: max number of messages handed to
+            publish_batch at once.
+        """
+        self._publish_batch = publish_batch
+        self._max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._thread = Thread(name=MESSAGE_PUBLISHER_THREAD,
+                              target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def publish(self, message):
+        """Enqueue a message to be published by the publisher thread."""
+        self._queue.put(message)
+
+    def get_num_pending_messages(self):
+        return self._queue.qsize()
+
+    def stop(self, timeout=constants.PUBLISHER_STOP_TIMEOUT_SEC):
+        """Publish all pending messages and stop the publisher thread.
+
+        :return: False if the publisher thread didn't finish in time.
+        :rtype: bool
+        """
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _run(self):
+        is_stopping = False
+        while not is_stopping:
+            batch = []
+            message = self._queue.get()
+            while True:
+                if message is _STOP:
+                    is_stopping = True
+                    break
+                batch.append(message)
+                if len(batch) >= self._max_batch_size:
+                    break
+                try:
+                    message = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if not batch:
+                continue
+            try:
+                self._publish_batch(batch)
+            except Exception:
+                LOGGER.error(traceback.format_exc())
@@ -0,0 +1,91 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+from container_service_extension.common.constants.server_constants import RequestLane  # noqa: E501
+from container_service_extension.mqi.consumer.consumer_thread_pool_executor \
+    import ConsumerThreadPoolExecutor
+
+# Queue stats that are summed up across lanes
+_ADDITIVE_QUEUE_STATS = ('max_workers', 'busy_threads', 'max_queue_size',
+                         'queue_depth', 'requests_rejected',
+                         'requests_expired', 'requests_dequeued')
+
+
+class RequestLaneExecutor:
+    """Set of thread pool executors, one per request lane.
+
+    Quick read requests and long running mutating requests are processed by
+    separately sized thread pools, each with its own admission queue, so
+    that a burst of requests in one lane can't starve the other lane.
+    """
+
+    def __init__(self, num_read_workers, num_write_workers,
+                 max_queue_size=0, max_queue_wait_time=0):
+        """Create one thread pool executor per lane.
+
+        :param int num_read_workers: number of threads processing read
+            requests.
+        :param int num_write_workers: number of threads processing long
+            running mutating requests.
+        :param int max_queue_size: max number of requests that may wait for
+            a free thread, per lane.
+        :param int max_queue_wait_time: max number of seconds a request may
+            wait for a free thread.
+        """
+        lane_max_workers = {
+            RequestLane.READ: num_read_workers,
+            RequestLane.WRITE: num_write_workers
+        }
+        self._executors = {
+            lane: ConsumerThreadPoolExecutor(
+                max_workers,
+                max_queue_size=max_queue_size,
+                max_queue_wait_time=max_queue_wait_time)
+            for lane, max_workers in lane_max_workers.items()
+        }
+
+    def try_submit(self, lane, fn, on_expired, on_dequeued=None):
+        """Admit a request into the executor of its lane.
+
+        :param RequestLane lane: lane of the request.
+
+        See ConsumerThreadPoolExecutor.try_submit for the rest of the params
+        and the return value.
+        """
+        return self._executors[lane].try_submit(
+            fn, on_expired, on_dequeued=on_dequeued)
+
+    def shutdown(self, wait=True):
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait)
+
+    def get_num_active_threads(self):
+        return sum(executor.get_num_active_threads()
+                   for executor in self._executors.values())
+
+    def get_num_total_threads(self):
+        return sum(executor.get_num_total_threads()
+                   for executor in self._executors.values())
+
+    def get_queue_stats(self):
+        """Return queue stats summed up across lanes, and stats of each lane.
+
+        :rtype: dict
+        """
+        lane_stats = {lane.value: executor.get_queue_stats()
+                      for lane, executor in self._executors.items()}
+        stats = {key: sum(s[key] for s in lane_stats.values())
+                 for key in _ADDITIVE_QUEUE_STATS}
+        total_wait_time = sum(
+            s['avg_queue_wait_time_sec'] * s['requests_dequeued']
+            for s in lane_stats.values())
+        stats['max_queue_wait_time_sec'] = max(
+            s['max_queue_wait_time_sec'] for s in lane_stats.values())
+        stats['avg_queue_wait_time_sec'] = \
+            round(total_wait_time / stats['requests_dequeued'], 3) \
+            if stats['requests_dequeued'] else 0.0
+        stats['max_queue_wait_time_seen_sec'] = max(
+            s['max_queue_wait_time_seen_sec'] for s in lane_stats.values())
+        stats['lanes'] = lane_stats
+        return stats
@@ -0,0 +1,138 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+import base64
+import json
+import time
+
+BEHAVIOR_INVOCATION_TYPE = 'BEHAVIOR_INVOCATION'
+
+_NOT_DECODED = object()
+
+
+class RequestMessage:
+    """Request received over AMQP or MQTT, parsed once per delivery.
+
+    Only the envelope of the message, which carries the request id, is
+    parsed on construction. The base64 encoded http request of an MQTT
+    message, the request body and the behavior invocation payload are decoded
+    on first access, so that requests rejected by the consumer never pay for
+    decoding them.
+
+    Instances are not thread safe, they are meant to be handed from the
+    consumer thread to exactly one worker thread.
+    """
+
+    def __init__(self, request_id, fsencoding, message=None,
+                 encoded_http_request=None, is_behavior_invocation=False,
+                 parse_error=None):
+        self.request_id = request_id
+        # Deadline of the request is measured from this time
+        self.received_time = time.monotonic()
+        self.is_behavior_invocation = is_behavior_invocation
+        self._fsencoding = fsencoding
+        self._message = message
+        self._encoded_http_request = encoded_http_request
+        self._parse_error = parse_error
+        self._body = _NOT_DECODED
+        self._behavior_payload = _NOT_DECODED
+        # Set by the request dispatcher, if the request is routed before
+        # being handed to a worker thread
+        self.route = None
+
+    @classmethod
+    def from_amqp(cls, body, fsencoding):
+        """Parse the body of an AMQP message.
+
+        :param bytes body: body of the AMQP message.
+        :param str fsencoding: encoding of the message.
+
+        :rtype: RequestMessage
+        """
+        message = json.loads(body.decode(fsencoding))[0]
+        return cls(message['id'], fsencoding, message=message)
+
+    @classmethod
+    def from_mqtt(cls, payload, fsencoding):
+        """Parse the payload of an MQTT message.
+
+        :param bytes payload: payload of the MQTT message.
+        :param str fsencoding: encoding of the message.
+
+        :rtype: RequestMessage
+        """
+        payload_json = json.loads(payload.decode(fsencoding))
+        if payload_json.get('type') == BEHAVIOR_INVOCATION_TYPE:
+            return cls(payload_json['headers']['taskId'], fsencoding,
+                       message=payload_json, is_behavior_invocation=True)
+        return cls(payload_json['headers']['requestId'], fsencoding,
+                   encoded_http_request=payload_json['httpRequest'])
+
+    @classmethod
+    def from_error(cls, parse_error, fsencoding):
+        """Create a message that failed to parse.
+
+        Accessing the contents of such a message raises the parse error, so
+        that it gets reported back like any other request processing error.
+
+        :param Exception parse_error: error raised while parsing the message.
+        :param str fsencoding: encoding of the message.
+
+        :rtype: RequestMessage
+        """
+        return cls(None, fsencoding, parse_error=parse_error)
+
+    @property
+    def message(self):
+        """Dictionary representing the incoming REST request.
+
+        For behavior invocations, this is the whole behavior message.
+
+        :rtype: dict
+        """
+        if self._parse_error is not None:
+            raise self._parse_error
+        if self._message is None:
+            http_req_json = json.loads(
+                base64.b64decode(self._encoded_http_request))
+            message = http_req_json['message']
+            # Use api access token as authorization token -- this may
+            # involve overwriting the current authorization token
+            message['headers']['Authorization'] = \
+                'Bearer ' + http_req_json['securityContext']['apiAccessToken']
+            self._message = message
+            self._encoded_http_request = None
+        return self._message
+
+    @property
+    def headers(self):
+        return self.message['headers']
+
+    @property
+    def body(self):
+        """Request body decoded from base64 encoded JSON.
+
+        :return: decoded body, or None if the request has no body.
+        """
+        if self._body is _NOT_DECODED:
+            encoded_body = self.message.get('body')
+            self._body = None
+            if encoded_body:
+                self._body = json.loads(
+                    base64.b64decode(encoded_body).decode(self._fsencoding))
+        return self._body
+
+    @property
+    def behavior_payload(self):
+        """Payload of a behavior invocation decoded from JSON.
+
+        :rtype: dict
+        """
+        if self._behavior_payload is _NOT_DECODED:
+            self._behavior_payload = json.loads(self.message['payload'])
+        return self._behavior_payload
+
+    def __str__(self):
+        # Only invoked if the message actually gets logged
+        return json.dumps(self.message)
@@ -15,46 +15,59 @@ from container_service_extension.common.constants.shared_constants import RESPON
 import container_service_extension.common.thread_local_data as thread_local_data  # noqa: E501
 from container_service_extension.exception.exceptions import CseRequestError
 from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER
+from container_service_extension.mqi.consumer.request_message import \
+    RequestMessage
 from container_service_extension.rde.models.common_models import DefEntity
 import container_service_extension.server.request_dispatcher as request_dispatcher  # noqa: E501
 
 
-# Note : Only being used by AMQP to reject request that has been already
-# processed, or are being currently processed.
-def get_request_id(request_msg, fsencoding):
-    """."""
-    request_id = None
+def parse_amqp_message(body, fsencoding):
+    """Parse an AMQP message into a RequestMessage.
+
+    :param bytes body: body of the AMQP message.
+    :param str fsencoding: encoding of the message.
+
+    :return: parsed message. If parsing failed, the returned message has no
+        request id and raises the parse error once its contents are accessed.
+
+    :rtype: RequestMessage
+    """
     try:
-        msg_json = json.loads(request_msg.decode(fsencoding))[0]
-        request_id = msg_json['id']
-    except Exception:
+        return RequestMessage.from_amqp(body, fsencoding)
+    except Exception as err:
         LOGGER.error(traceback.format_exc())
-    return request_id
+        return RequestMessage.from_error(err, fsencoding)
 
 
-def get_response_fields(request_msg, fsencoding, is_mqtt, mqtt_publisher=None):
-    """Get the msg json and response fields request message."""
-    msg_json, request_id = None, None
+def parse_mqtt_message(msg, fsencoding):
+    """Parse an MQTT message into a RequestMessage.
+
+    API requests are identified by their request id, and behavior
+    invocations by the id of the task tracking them.
+
+    :param paho.mqtt.client.MQTTMessage msg: the MQTT message.
+    :param str fsencoding: encoding of the message.
+
+    :return: parsed message. If parsing failed, the returned message has no
+        request id and raises the parse error once its contents are accessed.
+
+    :rtype: RequestMessage
+    """
     try:
-        # Parse the message
-        if is_mqtt:
-            payload_json = json.loads(request_msg.payload.decode(fsencoding))
-            http_req_json = json.loads(base64.b64decode(
-                payload_json['httpRequest']))
-            request_id = payload_json["headers"]["requestId"]
-            msg_json = http_req_json['message']
-
-            # Use api access token as authorization token -- this may involve
-            # overwriting the current authorization token
-            msg_json['headers']['Authorization'] = \
-                'Bearer ' + http_req_json['securityContext']['apiAccessToken']
-        else:
-            msg_json = json.loads(request_msg.decode(fsencoding))[0]
-            request_id = msg_json['id']
+        return RequestMessage.from_mqtt(msg.payload, fsencoding)
+    except Exception as err:
+        LOGGER.error(traceback.format_exc())
+        return RequestMessage.from_error(err, fsencoding)
+
 
+def get_response_fields(request_msg: RequestMessage, mqtt_publisher=None):
+    """Get the msg json and response fields request message."""
+    msg_json, request_id = None, request_msg.request_id
+    try:
+        msg_json = request_msg.message
         thread_local_data.set_thread_local_data(ThreadLocalData.REQUEST_ID, request_id)  # noqa: E501
         thread_local_data.set_thread_local_data(ThreadLocalData.USER_AGENT, msg_json['headers'].get('User-Agent'))  # noqa: E501
-        result = request_dispatcher.process_request(msg_json, mqtt_publisher=mqtt_publisher)  # noqa: E501
+        result = request_dispatcher.process_request(request_msg, mqtt_publisher=mqtt_publisher)  # noqa: E501
         status_code = result['status_code']
         reply_body = result['body']
 
@@ -70,12 +83,24 @@ def get_response_fields(request_msg, fsencoding, is_mqtt, mqtt_publisher=None):
     return msg_json, reply_body, status_code, request_id
 
 
-def str_to_json(json_str, fsencoding):
-    return json.loads(json_str.decode(fsencoding))
+def encode_response_body(body):
+    """Serialize a response body to JSON encoded bytes.
+
+    :param body: JSON serializable response body.
+
+    :rtype: bytes
+    """
+    return json.dumps(body).encode()
+
+
+def format_response_body(body):
+    """Base64 encode a response body for the message bus.
 
+    :param bytes body: JSON encoded response body.
 
-def format_response_body(body, fsencoding):
-    return base64.b64encode(body.encode()).decode(fsencoding)
+    :rtype: str
+    """
+    return base64.b64encode(body).decode('ascii')
 
 
 def get_task_href(body):
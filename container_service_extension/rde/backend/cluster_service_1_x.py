@@ -5,7 +5,6 @@ import random
 import re
 import string
 import threading
-import time
 from typing import Dict, List, Optional
 import urllib
 
@@ -27,6 +26,7 @@ from container_service_extension.common.constants.server_constants import DefEnt
 from container_service_extension.common.constants.server_constants import DefEntityPhase  # noqa: E501
 from container_service_extension.common.constants.server_constants import LocalTemplateKey  # noqa: E501
 from container_service_extension.common.constants.server_constants import NodeType  # noqa: E501
+from container_service_extension.common.constants.server_constants import ReadinessProbePhase  # noqa: E501
 from container_service_extension.common.constants.server_constants import ThreadLocalData  # noqa: E501
 import container_service_extension.common.constants.shared_constants as shared_constants  # noqa: E501
 from container_service_extension.common.constants.shared_constants import \
@@ -37,6 +37,7 @@ import container_service_extension.common.utils.core_utils as utils
 import container_service_extension.common.utils.pyvcloud_utils as vcd_utils
 from container_service_extension.common.utils.script_utils import get_cluster_script_file_contents  # noqa: E501
 import container_service_extension.common.utils.server_utils as server_utils
+from container_service_extension.common.utils.task_watcher import TASK_WATCHER  # noqa: E501
 import container_service_extension.common.utils.thread_utils as thread_utils
 import container_service_extension.common.utils.vsphere_utils as vs_utils
 import container_service_extension.exception.exceptions as exceptions
@@ -48,6 +49,7 @@ from container_service_extension.logging.logger import SERVER_CLOUDAPI_WIRE_LOGG
 from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER
 import container_service_extension.rde.acl_service as acl_service
 import container_service_extension.rde.backend.common.network_expose_helper as nw_exp_helper  # noqa: E501
+import container_service_extension.rde.backend.common.readiness_probes as readiness_probes  # noqa: E501
 import container_service_extension.rde.common.entity_service as def_entity_svc
 import container_service_extension.rde.constants as def_constants
 import container_service_extension.rde.models.common_models as common_models
@@ -99,12 +101,15 @@ class ClusterService(abstract_broker.AbstractBroker):
 
     def get_clusters_by_page(self, filters: dict = None,
                              page_number=CSE_PAGINATION_FIRST_PAGE_NUMBER,
-                             page_size=CSE_PAGINATION_DEFAULT_PAGE_SIZE):
+                             page_size=CSE_PAGINATION_DEFAULT_PAGE_SIZE,
+                             fields: list = None):
         """List clusters by page number and page size.
 
         :param dict filters: filters to use to filter the cluster response
         :param int page_number: page number of the clusters to be fetched
         :param int page_size: page size of the result
+        :param list fields: if set, return cluster summaries with only these
+            fields instead of the defined entities of the clusters
         :return: paginated response containing native clusters
         :rtype: dict
         """
@@ -125,12 +130,15 @@ class ClusterService(abstract_broker.AbstractBroker):
             version=ent_type.version,
             filters=filters,
             page_number=page_number,
-            page_size=page_size)
+            page_size=page_size,
+            summary_fields=fields)
 
-    def list_clusters(self, filters: dict = None) -> list:
+    def list_clusters(self, filters: dict = None, fields: list = None) -> list:
         """List corresponding defined entities of all native clusters.
 
         :param dict filters: filters to use to filter the cluster response
+        :param list fields: if set, return cluster summaries with only these
+            fields instead of the defined entities of the clusters
         :return: list of all native clusters
         :rtype: list
         """
@@ -151,7 +159,8 @@ class ClusterService(abstract_broker.AbstractBroker):
             vendor=ent_type.vendor,
             nss=ent_type.nss,
             version=ent_type.version,
-            filters=filters)
+            filters=filters,
+            summary_fields=fields)
 
     def get_cluster_config(self, cluster_id: str):
         """Get the cluster's kube config contents.
@@ -734,7 +743,7 @@ class ClusterService(abstract_broker.AbstractBroker):
                 LOGGER.error(err, exc_info=True)
                 raise exceptions.ClusterOperationError(
                     f"Error while creating vApp: {err}")
-            client_v35.get_task_monitor().wait_for_status(vapp_resource.Tasks.Task[0])  # noqa: E501
+            TASK_WATCHER.wait_for_status(client_v35, vapp_resource.Tasks.Task[0])  # noqa: E501
 
             template = _get_template(template_name, template_revision)
 
@@ -753,7 +762,7 @@ class ClusterService(abstract_broker.AbstractBroker):
             }
             vapp = vcd_vapp.VApp(client_v35, href=vapp_resource.get('href'))
             task = vapp.set_multiple_metadata(tags)
-            client_v35.get_task_monitor().wait_for_status(task)
+            TASK_WATCHER.wait_for_status(client_v35, task)
 
             msg = f"Creating control plane node for cluster '{cluster_name}'" \
                   f" ({cluster_id})"
@@ -813,9 +822,12 @@ class ClusterService(abstract_broker.AbstractBroker):
                     expose_ip = ''
 
             if server_utils.is_test_mode():
-                # wait for a minute before proceeding to make sure the password
-                # is set in the VM by guest customization
-                time.sleep(60)
+                # make sure the password is set in the VM by guest
+                # customization before proceeding
+                readiness_probes.wait_for_guest_customization(
+                    sysadmin_client_v35, vapp,
+                    _get_node_names(vapp, NodeType.CONTROL_PLANE),
+                    template_os=template.get(LocalTemplateKey.OS))
             _init_cluster(
                 sysadmin_client_v35,
                 vapp,
@@ -826,7 +838,7 @@ class ClusterService(abstract_broker.AbstractBroker):
             )
             task = vapp.set_metadata('GENERAL', 'READWRITE', 'cse.master.ip',
                                      control_plane_ip)
-            client_v35.get_task_monitor().wait_for_status(task)
+            TASK_WATCHER.wait_for_status(client_v35, task)
 
             msg = f"Creating {num_workers} node(s) for cluster " \
                   f"'{cluster_name}' ({cluster_id})"
@@ -856,9 +868,12 @@ class ClusterService(abstract_broker.AbstractBroker):
             self._update_task(vcd_client.TaskStatus.RUNNING, message=msg)
             vapp.reload()
             if server_utils.is_test_mode():
-                # wait for a minute before proceeding to make sure the password
-                # is set in the VM by guest customization
-                time.sleep(60)
+                # make sure the password is set in the VM by guest
+                # customization before proceeding
+                readiness_probes.wait_for_guest_customization(
+                    sysadmin_client_v35, vapp,
+                    _get_node_names(vapp, NodeType.WORKER),
+                    template_os=template.get(LocalTemplateKey.OS))
             _join_cluster(sysadmin_client_v35, vapp)
 
             if nfs_count > 0:
@@ -1260,9 +1275,11 @@ class ClusterService(abstract_broker.AbstractBroker):
                     target_nodes.append(spec['target_vm_name'])
                 vapp.reload()
                 if server_utils.is_test_mode():
-                    # wait for a minute before proceeding to make sure the
-                    # password is set in the VM by guest customization
-                    time.sleep(60)
+                    # make sure the password is set in the VM by guest
+                    # customization before proceeding
+                    readiness_probes.wait_for_guest_customization(
+                        sysadmin_client_v35, vapp, target_nodes,
+                        template_os=template.get(LocalTemplateKey.OS))
                 _join_cluster(sysadmin_client_v35,
                               vapp,
                               target_nodes)
@@ -1549,7 +1566,7 @@ class ClusterService(abstract_broker.AbstractBroker):
             }
 
             task = vapp.set_multiple_metadata(metadata)
-            client_v35.get_task_monitor().wait_for_status(task)
+            TASK_WATCHER.wait_for_status(client_v35, task)
 
             # update defined entity of the cluster
             curr_entity.entity.spec.k8_distribution.template_name = \
@@ -2055,7 +2072,7 @@ def _delete_vapp(client, org_name, ovdc_name, vapp_name):
         vdc_href = vdc_resource.get('href')
         vdc = VDC(client, href=vdc_href)
         task = vdc.delete_vapp(vapp_name, force=True)
-        client.get_task_monitor().wait_for_status(task)
+        TASK_WATCHER.wait_for_status(client, task)
     except Exception as err:
         LOGGER.error(f"Failed to delete vapp {vapp_name} "
                      f"(vdc: {ovdc_name}) with error: {err}")
@@ -2094,13 +2111,13 @@ def _delete_nodes(sysadmin_client: vcd_client.Client, vapp_href, node_names,
         vm = vcd_vm.VM(sysadmin_client, resource=vapp.get_vm(vm_name))
         try:
             task = vm.undeploy()
-            sysadmin_client.get_task_monitor().wait_for_status(task)
+            TASK_WATCHER.wait_for_status(sysadmin_client, task)
         except Exception:
             LOGGER.error(f"Failed to undeploy VM {vm_name} "
                          f"(vapp: {vapp_href})", exc_info=True)
 
     task = vapp.delete_vms(node_names)
-    sysadmin_client.get_task_monitor().wait_for_status(task)
+    TASK_WATCHER.wait_for_status(sysadmin_client, task)
     LOGGER.debug(f"Successfully deleted node(s) {node_names} from "
                  f"cluster '{cluster_name}' (vapp: {vapp_href})")
 
@@ -2236,7 +2253,7 @@ def _add_nodes(sysadmin_client, num_nodes, node_type, org, vdc, vapp,
                 specs.append(spec)
 
             task = vapp.add_vms(specs, power_on=False)
-            sysadmin_client.get_task_monitor().wait_for_status(task)
+            TASK_WATCHER.wait_for_status(sysadmin_client, task)
             vapp.reload()
 
             for spec in specs:
@@ -2245,7 +2262,7 @@ def _add_nodes(sysadmin_client, num_nodes, node_type, org, vdc, vapp,
                 vm = vcd_vm.VM(sysadmin_client, resource=vm_resource)
 
                 task = vm.power_on()
-                sysadmin_client.get_task_monitor().wait_for_status(task)
+                TASK_WATCHER.wait_for_status(sysadmin_client, task)
                 vapp.reload()
 
                 if node_type == NodeType.NFS:
@@ -2257,9 +2274,11 @@ def _add_nodes(sysadmin_client, num_nodes, node_type, org, vdc, vapp,
                         TemplateScriptFile.NFSD)
                     script = utils.read_data_file(script_filepath, logger=LOGGER)  # noqa: E501
                     if server_utils.is_test_mode():
-                        # wait for a minute before proceeding to make sure the
-                        # password is set in the VM by guest customization
-                        time.sleep(60)
+                        # make sure the password is set in the VM by guest
+                        # customization before proceeding
+                        readiness_probes.wait_for_guest_customization(
+                            sysadmin_client, vapp, [vm_name],
+                            template_os=template.get(LocalTemplateKey.OS))
                     exec_results = _execute_script_in_nodes(
                         sysadmin_client, vapp=vapp, node_names=[vm_name],
                         script=script)
@@ -2421,10 +2440,10 @@ def _wait_for_guest_execution_callback(message, exception=None):
 
 
 def _wait_until_ready_to_exec(vs, vm, password, tries=30):
-    ready = False
     script = "#!/usr/bin/env bash\n" \
              "uname -a\n"
-    for _ in range(tries):
+
+    def probe():
         result = vs.execute_script_in_guest(
             vm, 'root', password, script,
             target_file=None,
@@ -2434,12 +2453,15 @@ def _wait_until_ready_to_exec(vs, vm, password, tries=30):
             delete_script=True,
             callback=_wait_for_guest_execution_callback)
         if result[0] == 0:
-            ready = True
-            break
+            return True
         LOGGER.info(f"Script returned {result[0]}; VM is not "
                     f"ready to execute scripts, yet")
-        time.sleep(2)
+        return False
 
+    # Retries back off up to the 2 seconds they used to be apart
+    ready = readiness_probes.wait_until_ready(
+        ReadinessProbePhase.GUEST_EXECUTION, probe, max_tries=tries,
+        max_interval=2)
     if not ready:
         raise exceptions.CseServerError('VM is not ready to execute scripts')
 
@@ -2448,56 +2470,74 @@ def _execute_script_in_nodes(sysadmin_client: vcd_client.Client,
                              vapp, node_names, script,
                              check_tools=True, wait=True):
     vcd_utils.raise_error_if_user_not_from_system_org(sysadmin_client)
-    all_results = []
+
+    # vCD is queried from this thread only, since the vApp isn't thread safe
+    nodes = []
     for node_name in node_names:
         try:
-            LOGGER.debug(f"will try to execute script on {node_name}:\n"
-                         f"{script}")
-
             vs = vs_utils.get_vsphere(sysadmin_client, vapp, vm_name=node_name,
                                       logger=LOGGER)
-            vs.connect()
             moid = vapp.get_vm_moid(node_name)
-            vm = vs.get_vm_by_moid(moid)
             password = vapp.get_admin_password(node_name)
+        except Exception as err:
+            msg = f"Error executing script in node {node_name}: {str(err)}"
+            LOGGER.error(msg, exc_info=True)
+            raise exceptions.ScriptExecutionError(msg)  # noqa: E501
+        nodes.append((node_name, vs, moid, password))
+
+    def execute_script_in_node(node):
+        node_name, vs, moid, password = node
+        try:
+            LOGGER.debug(f"will try to execute script on {node_name}:\n"
+                         f"{script}")
+
+            with vs_utils.guest_operation_slot(vs):
+                vs.connect()
+                vm = vs.get_vm_by_moid(moid)
             if check_tools:
                 LOGGER.debug(f"waiting for tools on {node_name}")
-                vs.wait_until_tools_ready(
-                    vm,
-                    sleep=5,
-                    callback=_wait_for_tools_ready_callback)
-                _wait_until_ready_to_exec(vs, vm, password)
+                with vs_utils.guest_operation_slot(vs):
+                    vs.wait_until_tools_ready(
+                        vm,
+                        sleep=5,
+                        callback=_wait_for_tools_ready_callback)
+                    _wait_until_ready_to_exec(vs, vm, password)
             LOGGER.debug(f"about to execute script on {node_name} "
                          f"(vm={vm}), wait={wait}")
-            if wait:
-                result = vs.execute_script_in_guest(
-                    vm, 'root', password, script,
-                    target_file=None,
-                    wait_for_completion=True,
-                    wait_time=10,
-                    get_output=True,
-                    delete_script=True,
-                    callback=_wait_for_guest_execution_callback)
-                result_stdout = result[1].content.decode()
-                result_stderr = result[2].content.decode()
-            else:
-                result = [
-                    vs.execute_program_in_guest(vm, 'root', password, script,
-                                                wait_for_completion=False,
-                                                get_output=False)
-                ]
-                result_stdout = ''
-                result_stderr = ''
+            with vs_utils.guest_operation_slot(vs):
+                if wait:
+                    result = vs.execute_script_in_guest(
+                        vm, 'root', password, script,
+                        target_file=None,
+                        wait_for_completion=True,
+                        wait_time=10,
+                        get_output=True,
+                        delete_script=True,
+                        callback=_wait_for_guest_execution_callback)
+                    result_stdout = result[1].content.decode()
+                    result_stderr = result[2].content.decode()
+                else:
+                    result = [
+                        vs.execute_program_in_guest(vm, 'root', password,
+                                                    script,
+                                                    wait_for_completion=False,  # noqa: E501
+                                                    get_output=False)
+                    ]
+                    result_stdout = ''
+                    result_stderr = ''
             LOGGER.debug(result[0])
             LOGGER.debug(result_stderr)
             LOGGER.debug(result_stdout)
-            all_results.append(result)
+            return result
         except Exception as err:
             msg = f"Error executing script in node {node_name}: {str(err)}"
             LOGGER.error(msg, exc_info=True)
             raise exceptions.ScriptExecutionError(msg)  # noqa: E501
 
-    return all_results
+    # Nodes are handled concurrently, results are in the order of the nodes
+    return list(thread_utils.imap_concurrently(
+        execute_script_in_node, nodes,
+        server_utils.get_max_concurrent_vm_operations()))
 
 
 def _run_script_in_nodes(sysadmin_client: vcd_client.Client, vapp_href,
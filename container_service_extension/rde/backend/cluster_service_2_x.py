@@ -6,7 +6,6 @@ import random
 import re
 import string
 import threading
-import time
 from typing import Dict, List, Optional
 import urllib
 
@@ -28,6 +27,7 @@ from container_service_extension.common.constants.server_constants import DefEnt
 from container_service_extension.common.constants.server_constants import DefEntityPhase  # noqa: E501
 from container_service_extension.common.constants.server_constants import LocalTemplateKey  # noqa: E501
 from container_service_extension.common.constants.server_constants import NodeType  # noqa: E501
+from container_service_extension.common.constants.server_constants import ReadinessProbePhase  # noqa: E501
 from container_service_extension.common.constants.server_constants import ThreadLocalData  # noqa: E501
 from container_service_extension.common.constants.server_constants import UBUNTU_20_04_TEMPLATE_OS  # noqa: E501
 import container_service_extension.common.constants.shared_constants as shared_constants  # noqa: E501
@@ -39,6 +39,7 @@ import container_service_extension.common.utils.core_utils as utils
 import container_service_extension.common.utils.pyvcloud_utils as vcd_utils
 from container_service_extension.common.utils.script_utils import get_cluster_script_file_contents  # noqa: E501
 import container_service_extension.common.utils.server_utils as server_utils
+from container_service_extension.common.utils.task_watcher import TASK_WATCHER  # noqa: E501
 import container_service_extension.common.utils.thread_utils as thread_utils
 import container_service_extension.common.utils.vsphere_utils as vs_utils
 import container_service_extension.exception.exceptions as exceptions
@@ -51,8 +52,11 @@ from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER
 from container_service_extension.mqi.consumer.mqtt_publisher import MQTTPublisher  # noqa: E501
 import container_service_extension.rde.acl_service as acl_service
 import container_service_extension.rde.backend.common.network_expose_helper as nw_exp_helper  # noqa: E501
+import container_service_extension.rde.backend.common.readiness_probes as readiness_probes  # noqa: E501
 from container_service_extension.rde.behaviors.behavior_model import BehaviorError, BehaviorTaskStatus  # noqa: E501
+from container_service_extension.rde.common.cluster_index import CLUSTER_INDEX  # noqa: E501
 import container_service_extension.rde.common.entity_service as def_entity_svc
+from container_service_extension.rde.common.entity_update_buffer import EntityUpdateBuffer  # noqa: E501
 import container_service_extension.rde.constants as def_constants
 import container_service_extension.rde.models.common_models as common_models
 import container_service_extension.rde.models.rde_2_1_0 as rde_2_x
@@ -97,6 +101,9 @@ class ClusterService(abstract_broker.AbstractBroker):
                 api_version=DEFAULT_API_VERSION)
         self.sysadmin_entity_svc = def_entity_svc.DefEntityService(
             sysadmin_cloudapi_client_v36)
+        # Deferred updates of the cluster RDE, written in batches
+        self.entity_update_buffer = EntityUpdateBuffer(
+            self.sysadmin_entity_svc)
 
     def get_cluster_info(self, cluster_id: str) -> common_models.DefEntity:
         """Get the corresponding defined entity of the native cluster.
@@ -116,12 +123,15 @@ class ClusterService(abstract_broker.AbstractBroker):
 
     def get_clusters_by_page(self, filters: dict = None,
                              page_number=CSE_PAGINATION_FIRST_PAGE_NUMBER,
-                             page_size=CSE_PAGINATION_DEFAULT_PAGE_SIZE):
+                             page_size=CSE_PAGINATION_DEFAULT_PAGE_SIZE,
+                             fields: list = None):
         """List clusters by page number and page size.
 
         :param dict filters: filters to use to filter the cluster response
         :param int page_number: page number of the clusters to be fetched
         :param int page_size: page size of the result
+        :param list fields: if set, return cluster summaries with only these
+            fields instead of the defined entities of the clusters
         :return: paginated response containing native clusters
         :rtype: dict
         """
@@ -135,6 +145,13 @@ class ClusterService(abstract_broker.AbstractBroker):
                 telemetry_constants.PayloadKey.SOURCE_DESCRIPTION: thread_local_data.get_thread_local_data(ThreadLocalData.USER_AGENT)  # noqa: E501
             }
         )
+        if fields is not None and self.context.client.is_sysadmin():
+            # Summaries of all clusters are visible to sysadmin, answer
+            # from the cluster index if it can
+            result = CLUSTER_INDEX.query_page(filters, page_number, page_size)  # noqa: E501
+            if result is not None:
+                return result
+
         ent_type: common_models.DefEntityType = server_utils.get_registered_def_entity_type()  # noqa: E501
         return self.entity_svc.get_entities_per_page_by_entity_type(
             vendor=ent_type.vendor,
@@ -142,12 +159,15 @@ class ClusterService(abstract_broker.AbstractBroker):
             version=ent_type.version,
             filters=filters,
             page_number=page_number,
-            page_size=page_size)
+            page_size=page_size,
+            summary_fields=fields)
 
-    def list_clusters(self, filters: dict = None) -> list:
+    def list_clusters(self, filters: dict = None, fields: list = None) -> list:
         """List corresponding defined entities of all native clusters.
 
         :param dict filters: filters to use to filter the cluster response
+        :param list fields: if set, return cluster summaries with only these
+            fields instead of the defined entities of the clusters
         :return: list of all native clusters
         :rtype: list
         """
@@ -162,13 +182,21 @@ class ClusterService(abstract_broker.AbstractBroker):
             }
         )
 
+        if fields is not None and self.context.client.is_sysadmin():
+            # Summaries of all clusters are visible to sysadmin, answer
+            # from the cluster index if it can
+            summaries = CLUSTER_INDEX.query(filters)
+            if summaries is not None:
+                return summaries
+
         ent_type: common_models.DefEntityType = server_utils.get_registered_def_entity_type()  # noqa: E501
 
         return self.entity_svc.list_entities_by_entity_type(
             vendor=ent_type.vendor,
             nss=ent_type.nss,
             version=ent_type.version,
-            filters=filters)
+            filters=filters,
+            summary_fields=fields)
 
     def get_cluster_config(self, cluster_id: str):
         """Get the cluster's kube config contents.
@@ -890,7 +918,7 @@ class ClusterService(abstract_broker.AbstractBroker):
                 LOGGER.error(str(err), exc_info=True)
                 raise exceptions.ClusterOperationError(
                     f"Error while creating vApp: {err}")
-            client_v36.get_task_monitor().wait_for_status(vapp_resource.Tasks.Task[0])  # noqa: E501
+            TASK_WATCHER.wait_for_status(client_v36, vapp_resource.Tasks.Task[0])  # noqa: E501
 
             template = _get_template(template_name, template_revision)
 
@@ -910,7 +938,7 @@ class ClusterService(abstract_broker.AbstractBroker):
             vapp = vcd_vapp.VApp(client_v36,
                                  href=vapp_resource.get('href'))
             task = vapp.set_multiple_metadata(tags)
-            client_v36.get_task_monitor().wait_for_status(task)
+            TASK_WATCHER.wait_for_status(client_v36, task)
 
             msg = f"Creating control plane node for cluster '{cluster_name}'" \
                   f" ({cluster_id})"
@@ -947,9 +975,12 @@ class ClusterService(abstract_broker.AbstractBroker):
             vapp.reload()
 
             if server_utils.is_test_mode():
-                # wait for a minute before proceeding to make sure the
-                # password is set in the VM by guest customization
-                time.sleep(60)
+                # make sure the password is set in the VM by guest
+                # customization before proceeding
+                readiness_probes.wait_for_guest_customization(
+                    sysadmin_client_v36, vapp,
+                    _get_node_names(vapp, NodeType.CONTROL_PLANE),
+                    template_os=template.get('os'))
             control_plane_ip = _get_control_plane_ip(
                 sysadmin_client_v36, vapp, check_tools=True,
                 template_os=template.get('os'))
@@ -981,7 +1012,7 @@ class ClusterService(abstract_broker.AbstractBroker):
                           expose_ip=expose_ip)
             task = vapp.set_metadata('GENERAL', 'READWRITE', 'cse.master.ip',
                                      control_plane_ip)
-            client_v36.get_task_monitor().wait_for_status(task)
+            TASK_WATCHER.wait_for_status(client_v36, task)
 
             msg = f"Creating {num_workers} node(s) for cluster " \
                   f"'{cluster_name}' ({cluster_id})"
@@ -1013,9 +1044,12 @@ class ClusterService(abstract_broker.AbstractBroker):
             self._update_task(BehaviorTaskStatus.RUNNING, message=msg)
             vapp.reload()
             if server_utils.is_test_mode():
-                # wait for a minute before proceeding to make sure the password
-                # is set in the VM by guest customization
-                time.sleep(60)
+                # make sure the password is set in the VM by guest
+                # customization before proceeding
+                readiness_probes.wait_for_guest_customization(
+                    sysadmin_client_v36, vapp,
+                    _get_node_names(vapp, NodeType.WORKER),
+                    template_os=template.get('os'))
             _join_cluster(sysadmin_client_v36, vapp, template_os=template.get('os'))  # noqa: E501
 
             if nfs_count > 0:
@@ -1085,8 +1119,11 @@ class ClusterService(abstract_broker.AbstractBroker):
             msg = f"Error creating cluster '{cluster_name}'"
             LOGGER.error(msg, exc_info=True)
             try:
+                # Without rollback the failed phase goes out with the sync of
+                # the defined entity below
                 self._fail_operation(
-                    cluster_id, DefEntityOperation.CREATE)
+                    cluster_id, DefEntityOperation.CREATE,
+                    defer=not rollback)
             except Exception:
                 msg = f"Failed to update defined entity status for cluster {cluster_id}"  # noqa: E501
                 LOGGER.error(f"{msg}", exc_info=True)
@@ -1134,6 +1171,7 @@ class ClusterService(abstract_broker.AbstractBroker):
             # task to ERROR
             if rollback:
                 try:
+                    self.entity_update_buffer.discard(cluster_id)
                     # Resolve entity state manually (PRE_CREATED --> RESOLVED/RESOLUTION_ERROR)  # noqa: E501
                     # to allow delete operation
                     self.sysadmin_entity_svc.resolve_entity(entity_id=cluster_id)  # noqa: E501
@@ -1153,7 +1191,8 @@ class ClusterService(abstract_broker.AbstractBroker):
             try:
                 self._fail_operation(
                     cluster_id,
-                    DefEntityOperation.CREATE)
+                    DefEntityOperation.CREATE,
+                    defer=True)
             except Exception:
                 msg = f"Failed to update defined entity status for cluster {cluster_id}"  # noqa: E501
                 LOGGER.error(f"{msg}", exc_info=True)
@@ -1324,7 +1363,8 @@ class ClusterService(abstract_broker.AbstractBroker):
             try:
                 self._fail_operation(
                     cluster_id,
-                    DefEntityOperation.UPDATE)
+                    DefEntityOperation.UPDATE,
+                    defer=True)
             except Exception:
                 msg = f"Failed to update defined entity status " \
                       f" for cluster {cluster_id}"
@@ -1445,9 +1485,11 @@ class ClusterService(abstract_broker.AbstractBroker):
                     target_nodes.append(spec['target_vm_name'])
                 vapp.reload()
                 if server_utils.is_test_mode():
-                    # wait for a minute before proceeding to make sure the
-                    # password is set in the VM by guest customization
-                    time.sleep(60)
+                    # make sure the password is set in the VM by guest
+                    # customization before proceeding
+                    readiness_probes.wait_for_guest_customization(
+                        sysadmin_client_v36, vapp, target_nodes,
+                        template_os=template.get('os'))
                 _join_cluster(sysadmin_client_v36,
                               vapp,
                               target_nodes=target_nodes,
@@ -1499,7 +1541,8 @@ class ClusterService(abstract_broker.AbstractBroker):
                                  exc_info=True)
             try:
                 self._fail_operation(
-                    cluster_id, DefEntityOperation.UPDATE)
+                    cluster_id, DefEntityOperation.UPDATE,
+                    defer=True)
             except Exception:
                 msg = f"Failed to update defined entity status " \
                       f" for cluster {cluster_id}"
@@ -1522,7 +1565,8 @@ class ClusterService(abstract_broker.AbstractBroker):
             msg = f"Error adding nodes to cluster '{cluster_name}'"
             try:
                 self._fail_operation(
-                    cluster_id, DefEntityOperation.UPDATE)
+                    cluster_id, DefEntityOperation.UPDATE,
+                    defer=True)
             except Exception:
                 msg = f"Failed to update defined entity status " \
                       f" for cluster {cluster_id}"
@@ -1760,7 +1804,7 @@ class ClusterService(abstract_broker.AbstractBroker):
             task = vapp.set_multiple_metadata(metadata)
             client_v36 = self.context.get_client(
                 api_version=DEFAULT_API_VERSION)
-            client_v36.get_task_monitor().wait_for_status(task)
+            TASK_WATCHER.wait_for_status(client_v36, task)
 
             # update defined entity of the cluster
             changes = {
@@ -1797,7 +1841,8 @@ class ClusterService(abstract_broker.AbstractBroker):
             try:
                 self._fail_operation(
                     cluster_id,
-                    DefEntityOperation.UPGRADE)
+                    DefEntityOperation.UPGRADE,
+                    defer=True)
             except Exception:
                 msg = f"Failed to update defined entity status " \
                       f" for cluster {cluster_id}"
@@ -1864,7 +1909,8 @@ class ClusterService(abstract_broker.AbstractBroker):
             try:
                 self._fail_operation(
                     cluster_id,
-                    DefEntityOperation.UPDATE)
+                    DefEntityOperation.UPDATE,
+                    defer=True)
             except Exception:
                 msg = f"Failed to update defined entity status " \
                       f" for cluster {cluster_id}"
@@ -1963,7 +2009,8 @@ class ClusterService(abstract_broker.AbstractBroker):
             try:
                 self._fail_operation(
                     cluster_id,
-                    DefEntityOperation.UPDATE)
+                    DefEntityOperation.UPDATE,
+                    defer=True)
             except Exception:
                 msg = f"Failed to update defined entity status " \
                       f" for cluster {cluster_id}"
@@ -2104,7 +2151,7 @@ class ClusterService(abstract_broker.AbstractBroker):
         # unless it is sure that the Vapp with the cluster-id exists
         curr_rde: common_models.DefEntity = self.entity_svc.get_entity(cluster_id)  # noqa: E501
         if not curr_rde.externalId and not vapp:
-            return curr_rde
+            return self.entity_update_buffer.flush(cluster_id) or curr_rde
         if not vapp:
             client_v36 = self.context.get_client(
                 api_version=DEFAULT_API_VERSION)
@@ -2122,7 +2169,8 @@ class ClusterService(abstract_broker.AbstractBroker):
 
     def _update_cluster_entity(self, cluster_id: str,
                                changes: dict = None,
-                               external_id: Optional[str] = None):
+                               external_id: Optional[str] = None,
+                               defer: bool = False):
         """Update status part of the cluster rde.
 
         This method serves as a placeholder where we make changes for
@@ -2134,7 +2182,10 @@ class ClusterService(abstract_broker.AbstractBroker):
             indicates the value for this field.
         :param str external_id: Vapp ID to update the defined entity of the
             cluster with.
-        :returns: Updated defined entity
+        :param bool defer: True to merge the changes with the next update
+            of the defined entity instead of writing them now. Pending changes
+            are written at the latest when the operation completes.
+        :returns: Updated defined entity, None if the update was deferred
         :rtype: common_models.DefEntity
         """
         # TODO update function to use optimistic locking feature by VCD
@@ -2145,19 +2196,27 @@ class ClusterService(abstract_broker.AbstractBroker):
         if external_id is not None:
             changes['externalId'] = external_id
 
-        # Update cluster rde
-        return self.sysadmin_entity_svc.update_entity(
-            cluster_id, invoke_hooks=False, changes=changes
+        # Update cluster rde, along with the changes deferred so far
+        return self.entity_update_buffer.update(
+            cluster_id, changes=changes, defer=defer
         )
 
-    def _fail_operation(self, cluster_id: str, op: DefEntityOperation):
+    def _fail_operation(self, cluster_id: str, op: DefEntityOperation,
+                        defer: bool = False):
         changes = {
             'entity.status.phase':
                 str(DefEntityPhase(op, DefEntityOperationStatus.FAILED))
         }
-        self._update_cluster_entity(cluster_id, changes=changes)
+        self._update_cluster_entity(cluster_id, changes=changes, defer=defer)
 
     def _update_task(self, status, message='', error_message='', progress=None):  # noqa: E501
+        if status in (BehaviorTaskStatus.SUCCESS, BehaviorTaskStatus.ERROR):
+            # The defined entity must be up to date once the task completes
+            try:
+                self.entity_update_buffer.flush_all()
+            except Exception:
+                LOGGER.error("Failed to write deferred updates of the defined "
+                             "entity", exc_info=True)
         if status == BehaviorTaskStatus.ERROR:
             error_details = asdict(BehaviorError(majorErrorCode='500',
                                                  minorErrorCode=message,
@@ -2444,7 +2503,7 @@ def _delete_vapp(client, org_name, ovdc_name, vapp_name):
         vdc_href = vdc_resource.get('href')
         vdc = VDC(client, href=vdc_href)
         task = vdc.delete_vapp(vapp_name, force=True)
-        client.get_task_monitor().wait_for_status(task)
+        TASK_WATCHER.wait_for_status(client, task)
     except Exception as err:
         LOGGER.error(f"Failed to delete vapp {vapp_name} "
                      f"(vdc: {ovdc_name}) with error: {err}", exc_info=True)
@@ -2483,13 +2542,13 @@ def _delete_nodes(sysadmin_client: vcd_client.Client, vapp_href, node_names,
         vm = vcd_vm.VM(sysadmin_client, resource=vapp.get_vm(vm_name))
         try:
             task = vm.undeploy()
-            sysadmin_client.get_task_monitor().wait_for_status(task)
+            TASK_WATCHER.wait_for_status(sysadmin_client, task)
         except Exception:
             LOGGER.error(f"Failed to undeploy VM {vm_name} "
                          f"(vapp: {vapp_href})", exc_info=True)
 
     task = vapp.delete_vms(node_names)
-    sysadmin_client.get_task_monitor().wait_for_status(task)
+    TASK_WATCHER.wait_for_status(sysadmin_client, task)
     LOGGER.debug(f"Successfully deleted node(s) {node_names} from "
                  f"cluster '{cluster_name}' (vapp: {vapp_href})")
 
@@ -2630,27 +2689,51 @@ def _add_nodes(sysadmin_client, num_nodes, node_type, org, vdc, vapp,
                 specs.append(spec)
 
             task = vapp.add_vms(specs, power_on=False)
-            sysadmin_client.get_task_monitor().wait_for_status(task)
+            TASK_WATCHER.wait_for_status(sysadmin_client, task)
+            vapp.reload()
+
+            vm_resources = [vapp.get_vm(spec['target_vm_name'])
+                            for spec in specs]
+
+            def customize_and_power_on_vm(vm_resource):
+                vm_name = vm_resource.get('name')
+                try:
+                    vm = vcd_vm.VM(sysadmin_client, resource=vm_resource)
+                    if cpu_count and cpu_count > 0:
+                        # updating cpu count on the VM
+                        vm_task = vm.modify_cpu(cpu_count)
+                        TASK_WATCHER.wait_for_status(sysadmin_client, vm_task)
+                    if memory_mb and memory_mb > 0:
+                        # updating memory
+                        vm_task = vm.modify_memory(memory_mb)
+                        TASK_WATCHER.wait_for_status(sysadmin_client, vm_task)
+                    vm_task = vm.power_on()
+                    TASK_WATCHER.wait_for_status(sysadmin_client, vm_task)
+                    return vm_name, vm_task, None
+                except Exception as vm_err:
+                    LOGGER.error(f"Failed to customize and power on node "
+                                 f"{vm_name}", exc_info=True)
+                    return vm_name, None, vm_err
+
+            # The VMs are customized and powered on concurrently, and every
+            # VM is given a chance to come up before failures are reported
+            node_errors = {}
+            max_workers = server_utils.get_max_concurrent_vm_operations(config)
+            for vm_name, vm_task, vm_err in thread_utils.imap_concurrently(
+                    customize_and_power_on_vm, vm_resources, max_workers):
+                if vm_err is not None:
+                    node_errors[vm_name] = vm_err
+                else:
+                    task = vm_task
+            if node_errors:
+                raise exceptions.NodeCreationError(
+                    [spec['target_vm_name'] for spec in specs],
+                    "; ".join(f"{vm_name}: {vm_err}"
+                              for vm_name, vm_err in node_errors.items()))
             vapp.reload()
 
             for spec in specs:
                 vm_name = spec['target_vm_name']
-                vm_resource = vapp.get_vm(vm_name)
-                vm = vcd_vm.VM(sysadmin_client, resource=vm_resource)
-
-                if cpu_count and cpu_count > 0:
-                    # updating cpu count on the VM
-                    task = vm.modify_cpu(cpu_count)
-                    sysadmin_client.get_task_monitor().wait_for_status(task)
-                if memory_mb and memory_mb > 0:
-                    # updating memory
-                    task = vm.modify_memory(memory_mb)
-                    sysadmin_client.get_task_monitor().wait_for_status(task)
-
-                task = vm.power_on()
-                sysadmin_client.get_task_monitor().wait_for_status(task)
-                vapp.reload()
-
                 if node_type == NodeType.NFS:
                     LOGGER.debug(f"Enabling NFS server on {vm_name}")
                     script_filepath = ltm.get_script_filepath(
@@ -2660,9 +2743,11 @@ def _add_nodes(sysadmin_client, num_nodes, node_type, org, vdc, vapp,
                         TemplateScriptFile.NFSD)
                     script = utils.read_data_file(script_filepath, logger=LOGGER)  # noqa: E501
                     if server_utils.is_test_mode():
-                        # wait for a minute before proceeding to make sure the
-                        # password is set in the VM by guest customization
-                        time.sleep(60)
+                        # make sure the password is set in the VM by guest
+                        # customization before proceeding
+                        readiness_probes.wait_for_guest_customization(
+                            sysadmin_client, vapp, [vm_name],
+                            template_os=template.get('os'))
                     exec_results = _execute_script_in_nodes(
                         sysadmin_client, vapp=vapp, node_names=[vm_name],
                         script=script)
@@ -2671,6 +2756,8 @@ def _add_nodes(sysadmin_client, num_nodes, node_type, org, vdc, vapp,
                         raise exceptions.ScriptExecutionError(
                             f"VM customization script execution failed "
                             f"on node {vm_name}:{errors}")
+        except exceptions.NodeCreationError:
+            raise
         except Exception as err:
             LOGGER.error(err, exc_info=True)
             # TODO: get details of the exception to determine cause of failure,
@@ -2826,10 +2913,10 @@ def _wait_for_guest_execution_callback(message, exception=None):
 
 
 def _wait_until_ready_to_exec(vs, vm, password, tries=30):
-    ready = False
     script = "#!/usr/bin/env bash\n" \
              "uname -a\n"
-    for _ in range(tries):
+
+    def probe():
         result = vs.execute_script_in_guest(
             vm, 'root', password, script,
             target_file=None,
@@ -2839,12 +2926,15 @@ def _wait_until_ready_to_exec(vs, vm, password, tries=30):
             delete_script=True,
             callback=_wait_for_guest_execution_callback)
         if result[0] == 0:
-            ready = True
-            break
+            return True
         LOGGER.info(f"Script returned {result[0]}; VM is not "
                     f"ready to execute scripts, yet")
-        time.sleep(2)
+        return False
 
+    # Retries back off up to the 2 seconds they used to be apart
+    ready = readiness_probes.wait_until_ready(
+        ReadinessProbePhase.GUEST_EXECUTION, probe, max_tries=tries,
+        max_interval=2)
     if not ready:
         raise exceptions.CseServerError('VM is not ready to execute scripts')
 
@@ -2853,60 +2943,82 @@ def _execute_script_in_nodes(sysadmin_client: vcd_client.Client,
                              vapp, node_names, script,
                              check_tools=True, wait=True, template_os=None):
     vcd_utils.raise_error_if_user_not_from_system_org(sysadmin_client)
-    all_results = []
+
+    # vCD is queried from this thread only, since the vApp isn't thread safe
+    nodes = []
     for node_name in node_names:
         try:
-            LOGGER.debug(f"will try to execute script on {node_name}:\n"
-                         f"{script}")
-
             vs = vs_utils.get_vsphere(sysadmin_client, vapp, vm_name=node_name,
                                       logger=LOGGER)
-            vs.connect()
             moid = vapp.get_vm_moid(node_name)
-            vm = vs.get_vm_by_moid(moid)
             password = vapp.get_admin_password(node_name)
+            vm_href = vapp.get_vm(node_name).get('href')
+        except Exception as err:
+            msg = f"Error executing script in node {node_name}: {str(err)}"
+            LOGGER.error(msg, exc_info=True)
+            raise exceptions.ScriptExecutionError(msg)  # noqa: E501
+        nodes.append((node_name, vs, moid, password, vm_href))
+
+    def execute_script_in_node(node):
+        node_name, vs, moid, password, vm_href = node
+        try:
+            LOGGER.debug(f"will try to execute script on {node_name}:\n"
+                         f"{script}")
+
+            with vs_utils.guest_operation_slot(vs):
+                vs.connect()
+                vm = vs.get_vm_by_moid(moid)
+            if (check_tools or wait) and template_os is not None and \
+                    UBUNTU_20_04_TEMPLATE_OS == template_os:
+                # wait for processes to be ready
+                readiness_probes.wait_for_vm_ready(
+                    sysadmin_client, vm_href, vs, vm, node_name,
+                    template_os=template_os)
             if check_tools:
-                if template_os is not None and UBUNTU_20_04_TEMPLATE_OS == template_os:  # noqa: E501
-                    time.sleep(120)  # sleep for process to be ready
                 LOGGER.debug(f"waiting for tools on {node_name}")
-                vs.wait_until_tools_ready(
-                    vm,
-                    sleep=5,
-                    callback=_wait_for_tools_ready_callback)
-                _wait_until_ready_to_exec(vs, vm, password)
+                with vs_utils.guest_operation_slot(vs):
+                    vs.wait_until_tools_ready(
+                        vm,
+                        sleep=5,
+                        callback=_wait_for_tools_ready_callback)
+                    _wait_until_ready_to_exec(vs, vm, password)
             LOGGER.debug(f"about to execute script on {node_name} "
                          f"(vm={vm}), wait={wait}")
             if wait:
-                if template_os is not None and UBUNTU_20_04_TEMPLATE_OS == template_os:  # noqa: E501
-                    time.sleep(120)  # sleep for process to be ready
-                result = vs.execute_script_in_guest(
-                    vm, 'root', password, script,
-                    target_file=None,
-                    wait_for_completion=True,
-                    wait_time=10,
-                    get_output=True,
-                    delete_script=True,
-                    callback=_wait_for_guest_execution_callback)
+                with vs_utils.guest_operation_slot(vs):
+                    result = vs.execute_script_in_guest(
+                        vm, 'root', password, script,
+                        target_file=None,
+                        wait_for_completion=True,
+                        wait_time=10,
+                        get_output=True,
+                        delete_script=True,
+                        callback=_wait_for_guest_execution_callback)
                 result_stdout = result[1].content.decode()
                 result_stderr = result[2].content.decode()
             else:
-                result = [
-                    vs.execute_program_in_guest(vm, 'root', password, script,
-                                                wait_for_completion=False,
-                                                get_output=False)
-                ]
+                with vs_utils.guest_operation_slot(vs):
+                    result = [
+                        vs.execute_program_in_guest(vm, 'root', password,
+                                                    script,
+                                                    wait_for_completion=False,  # noqa: E501
+                                                    get_output=False)
+                    ]
                 result_stdout = ''
                 result_stderr = ''
             LOGGER.debug(result[0])
             LOGGER.debug(result_stderr)
             LOGGER.debug(result_stdout)
-            all_results.append(result)
+            return result
         except Exception as err:
             msg = f"Error executing script in node {node_name}: {str(err)}"
             LOGGER.error(msg, exc_info=True)
             raise exceptions.ScriptExecutionError(msg)  # noqa: E501
 
-    return all_results
+    # Nodes are handled concurrently, results are in the order of the nodes
+    return list(thread_utils.imap_concurrently(
+        execute_script_in_node, nodes,
+        server_utils.get_max_concurrent_vm_operations()))
 
 
 def _run_script_in_nodes(sysadmin_client: vcd_client.Client, vapp_href,
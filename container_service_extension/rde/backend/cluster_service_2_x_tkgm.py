@@ -28,7 +28,6 @@ from container_service_extension.common.constants.server_constants import \
     CPI_NAME, \
     CSI_DEFAULT_VERSION, \
     CSI_NAME, \
-    DEFAULT_POST_CUSTOMIZATION_TIMEOUT_SEC, \
     DISK_ENABLE_UUID, \
     PostCustomizationKubeconfig
 from container_service_extension.common.constants.server_constants import ClusterMetadataKey  # noqa: E501
@@ -56,6 +55,7 @@ import container_service_extension.common.utils.core_utils as utils
 import container_service_extension.common.utils.pyvcloud_utils as vcd_utils
 from container_service_extension.common.utils.script_utils import get_cluster_script_file_contents  # noqa: E501
 import container_service_extension.common.utils.server_utils as server_utils
+from container_service_extension.common.utils.task_watcher import TASK_WATCHER  # noqa: E501
 import container_service_extension.common.utils.thread_utils as thread_utils
 import container_service_extension.exception.exceptions as exceptions
 import container_service_extension.lib.oauth_client.oauth_service as oauth_service  # noqa: E501
@@ -69,7 +69,9 @@ from container_service_extension.mqi.consumer.mqtt_publisher import MQTTPublishe
 import container_service_extension.rde.acl_service as acl_service
 import container_service_extension.rde.backend.common.network_expose_helper as nw_exp_helper  # noqa: E501
 from container_service_extension.rde.behaviors.behavior_model import BehaviorError, BehaviorTaskStatus  # noqa: E501
+from container_service_extension.rde.common.cluster_index import CLUSTER_INDEX  # noqa: E501
 import container_service_extension.rde.common.entity_service as def_entity_svc
+from container_service_extension.rde.common.entity_update_buffer import EntityUpdateBuffer  # noqa: E501
 import container_service_extension.rde.constants as def_constants
 import container_service_extension.rde.models.common_models as common_models
 import container_service_extension.rde.models.rde_2_1_0 as rde_2_x
@@ -116,6 +118,9 @@ class ClusterService(abstract_broker.AbstractBroker):
                 api_version=DEFAULT_API_VERSION)
         self.sysadmin_entity_svc = def_entity_svc.DefEntityService(
             cloudapi_client=sysadmin_cloudapi_client_v36)
+        # Deferred updates of the cluster RDE, written in batches
+        self.entity_update_buffer = EntityUpdateBuffer(
+            self.sysadmin_entity_svc)
 
     def get_cluster_info(self, cluster_id: str) -> common_models.DefEntity:
         """Get the corresponding defined entity of the native cluster.
@@ -135,18 +140,28 @@ class ClusterService(abstract_broker.AbstractBroker):
 
     def get_clusters_by_page(self, filters: dict = None,
                              page_number=CSE_PAGINATION_FIRST_PAGE_NUMBER,
-                             page_size=CSE_PAGINATION_DEFAULT_PAGE_SIZE):
+                             page_size=CSE_PAGINATION_DEFAULT_PAGE_SIZE,
+                             fields: list = None):
         """List clusters by page number and page size.
 
         :param dict filters: filters to use to filter the cluster response
         :param int page_number: page number of the clusters to be fetched
         :param int page_size: page size of the result
+        :param list fields: if set, return cluster summaries with only these
+            fields instead of the defined entities of the clusters
         :return: paginated response containing native clusters
         :rtype: dict
         """
         if not filters:
             filters = {}
 
+        if fields is not None and self.context.client.is_sysadmin():
+            # Summaries of all clusters are visible to sysadmin, answer
+            # from the cluster index if it can
+            result = CLUSTER_INDEX.query_page(filters, page_number, page_size)  # noqa: E501
+            if result is not None:
+                return result
+
         ent_type: common_models.DefEntityType = server_utils.get_registered_def_entity_type()  # noqa: E501
         return self.entity_svc.get_entities_per_page_by_entity_type(
             vendor=ent_type.vendor,
@@ -154,25 +169,36 @@ class ClusterService(abstract_broker.AbstractBroker):
             version=ent_type.version,
             filters=filters,
             page_number=page_number,
-            page_size=page_size)
+            page_size=page_size,
+            summary_fields=fields)
 
-    def list_clusters(self, filters: dict = None) -> list:
+    def list_clusters(self, filters: dict = None, fields: list = None) -> list:
         """List corresponding defined entities of all native clusters.
 
         :param dict filters: filters to use to filter the cluster response
+        :param list fields: if set, return cluster summaries with only these
+            fields instead of the defined entities of the clusters
         :return: list of all native clusters
         :rtype: list
         """
         if not filters:
             filters = {}
 
+        if fields is not None and self.context.client.is_sysadmin():
+            # Summaries of all clusters are visible to sysadmin, answer
+            # from the cluster index if it can
+            summaries = CLUSTER_INDEX.query(filters)
+            if summaries is not None:
+                return summaries
+
         ent_type: common_models.DefEntityType = server_utils.get_registered_def_entity_type()  # noqa: E501
 
         return self.entity_svc.list_entities_by_entity_type(
             vendor=ent_type.vendor,
             nss=ent_type.nss,
             version=ent_type.version,
-            filters=filters)
+            filters=filters,
+            summary_fields=fields)
 
     def get_cluster_config(self, cluster_id: str):
         """Get the cluster's kube config contents.
@@ -826,7 +852,7 @@ class ClusterService(abstract_broker.AbstractBroker):
                 LOGGER.error(str(err), exc_info=True)
                 raise exceptions.ClusterOperationError(
                     f"Error while creating vApp: {err}")
-            client_v36.get_task_monitor().wait_for_status(vapp_resource.Tasks.Task[0])  # noqa: E501
+            TASK_WATCHER.wait_for_status(client_v36, vapp_resource.Tasks.Task[0])  # noqa: E501
 
             sysadmin_client_v36 = self.context.get_sysadmin_client(api_version=DEFAULT_API_VERSION)  # noqa: E501
             # Extra config elements of VApp are visible only for admin client
@@ -851,7 +877,7 @@ class ClusterService(abstract_broker.AbstractBroker):
             }
 
             task = vapp.set_multiple_metadata(tags)
-            client_v36.get_task_monitor().wait_for_status(task)
+            TASK_WATCHER.wait_for_status(client_v36, task)
 
             # Get refresh token
             config = server_utils.get_server_runtime_config()
@@ -928,24 +954,25 @@ class ClusterService(abstract_broker.AbstractBroker):
                 sysadmin_client=sysadmin_client_v36,
                 vapp=admin_vapp
             )
-            # have the kubeconfig in the RDE so that worker nodes
-            # can use the kubeconfig when installing core packages
-            kubeconfig_changes = {
-                'entity.status.private': rde_2_x.Private(
-                    kube_token=control_plane_join_cmd,
-                    kube_config=_get_kube_config_from_control_plane_vm(
-                        sysadmin_client=sysadmin_client_v36,
-                        vapp=vapp
-                    )
+            # worker nodes use the kubeconfig when installing core packages.
+            # It is handed to them through the native entity below, the RDE
+            # write is deferred until the next phase transition.
+            kubeconfig = rde_2_x.Private(
+                kube_token=control_plane_join_cmd,
+                kube_config=_get_kube_config_from_control_plane_vm(
+                    sysadmin_client=sysadmin_client_v36,
+                    vapp=vapp
                 )
-            }
+            )
             self._update_cluster_entity(
                 cluster_id,
-                changes=kubeconfig_changes,
-                external_id=vapp_resource.get('href')
+                changes={'entity.status.private': kubeconfig},
+                external_id=vapp_resource.get('href'),
+                defer=True
             )
             curr_rde = self.entity_svc.get_entity(cluster_id)
             curr_native_entity: rde_2_x.NativeEntity = curr_rde.entity
+            curr_native_entity.status.private = kubeconfig
 
             msg = f"Creating {num_workers} node(s) for cluster " \
                   f"'{cluster_name}' ({cluster_id})"
@@ -1059,8 +1086,11 @@ class ClusterService(abstract_broker.AbstractBroker):
             if is_refresh_token_created:
                 self._delete_refresh_token(cluster_id)
             try:
+                # Without rollback the failed phase goes out with the sync of
+                # the defined entity below
                 self._fail_operation(
-                    cluster_id, DefEntityOperation.CREATE)
+                    cluster_id, DefEntityOperation.CREATE,
+                    defer=not rollback)
             except Exception:
                 msg = f"Failed to update defined entity status for cluster {cluster_id}"  # noqa: E501
                 LOGGER.error(f"{msg}", exc_info=True)
@@ -1108,6 +1138,7 @@ class ClusterService(abstract_broker.AbstractBroker):
             # task to ERROR
             if rollback:
                 try:
+                    self.entity_update_buffer.discard(cluster_id)
                     # Resolve entity state manually (PRE_CREATED --> RESOLVED/RESOLUTION_ERROR)  # noqa: E501
                     # to allow delete operation
                     self.sysadmin_entity_svc.resolve_entity(entity_id=cluster_id)  # noqa: E501
@@ -1136,7 +1167,8 @@ class ClusterService(abstract_broker.AbstractBroker):
             try:
                 self._fail_operation(
                     cluster_id,
-                    DefEntityOperation.CREATE)
+                    DefEntityOperation.CREATE,
+                    defer=True)
             except Exception:
                 msg = f"Failed to update defined entity status for cluster {cluster_id}"  # noqa: E501
                 LOGGER.error(f"{msg}", exc_info=True)
@@ -1305,7 +1337,8 @@ class ClusterService(abstract_broker.AbstractBroker):
             try:
                 self._fail_operation(
                     cluster_id,
-                    DefEntityOperation.UPDATE)
+                    DefEntityOperation.UPDATE,
+                    defer=True)
             except Exception:
                 msg = f"Failed to update defined entity status " \
                       f" for cluster {cluster_id}"
@@ -1466,7 +1499,8 @@ class ClusterService(abstract_broker.AbstractBroker):
                                  exc_info=True)
             try:
                 self._fail_operation(
-                    cluster_id, DefEntityOperation.UPDATE)
+                    cluster_id, DefEntityOperation.UPDATE,
+                    defer=True)
             except Exception:
                 msg = f"Failed to update defined entity status " \
                       f" for cluster {cluster_id}"
@@ -1491,7 +1525,8 @@ class ClusterService(abstract_broker.AbstractBroker):
             msg = f"Error adding nodes to cluster '{cluster_name}'"
             try:
                 self._fail_operation(
-                    cluster_id, DefEntityOperation.UPDATE)
+                    cluster_id, DefEntityOperation.UPDATE,
+                    defer=True)
             except Exception:
                 msg = f"Failed to update defined entity status " \
                       f" for cluster {cluster_id}"
@@ -1630,7 +1665,8 @@ class ClusterService(abstract_broker.AbstractBroker):
             try:
                 self._fail_operation(
                     cluster_id,
-                    DefEntityOperation.UPDATE)
+                    DefEntityOperation.UPDATE,
+                    defer=True)
             except Exception:
                 msg = f"Failed to update defined entity status " \
                       f" for cluster {cluster_id}"
@@ -1730,7 +1766,8 @@ class ClusterService(abstract_broker.AbstractBroker):
             try:
                 self._fail_operation(
                     cluster_id,
-                    DefEntityOperation.UPDATE)
+                    DefEntityOperation.UPDATE,
+                    defer=True)
             except Exception:
                 msg = f"Failed to update defined entity status " \
                       f" for cluster {cluster_id}"
@@ -1763,7 +1800,7 @@ class ClusterService(abstract_broker.AbstractBroker):
         # unless it is sure that the Vapp with the cluster-id exists
         curr_rde: common_models.DefEntity = self.entity_svc.get_entity(cluster_id)  # noqa: E501
         if not curr_rde.externalId and not vapp:
-            return curr_rde
+            return self.entity_update_buffer.flush(cluster_id) or curr_rde
         if not vapp:
             client_v36 = self.context.get_client(api_version=DEFAULT_API_VERSION)  # noqa: E501
             vapp = vcd_vapp.VApp(client_v36, href=curr_rde.externalId)
@@ -1778,7 +1815,8 @@ class ClusterService(abstract_broker.AbstractBroker):
 
     def _update_cluster_entity(self, cluster_id: str,
                                changes: dict = None,
-                               external_id: Optional[str] = None):
+                               external_id: Optional[str] = None,
+                               defer: bool = False):
         """Update status part of the cluster rde.
 
         This method serves as a placeholder where we make changes for
@@ -1790,7 +1828,10 @@ class ClusterService(abstract_broker.AbstractBroker):
             indicates the value for this field.
         :param str external_id: Vapp ID to update the defined entity of the
             cluster with.
-        :returns: Updated defined entity
+        :param bool defer: True to merge the changes with the next update
+            of the defined entity instead of writing them now. Pending changes
+            are written at the latest when the operation completes.
+        :returns: Updated defined entity, None if the update was deferred
         :rtype: common_models.DefEntity
         """
         # update the cluster_rde with external_id if provided by the caller
@@ -1799,18 +1840,26 @@ class ClusterService(abstract_broker.AbstractBroker):
         if external_id is not None:
             changes['externalId'] = external_id
 
-        # Update cluster rde
-        return self.sysadmin_entity_svc.update_entity(
-            cluster_id, invoke_hooks=False, changes=changes
+        # Update cluster rde, along with the changes deferred so far
+        return self.entity_update_buffer.update(
+            cluster_id, changes=changes, defer=defer
         )
 
-    def _fail_operation(self, cluster_id: str, op: DefEntityOperation):
+    def _fail_operation(self, cluster_id: str, op: DefEntityOperation,
+                        defer: bool = False):
         changes = {
             'entity.status.phase': str(DefEntityPhase(op, DefEntityOperationStatus.FAILED))  # noqa: E501
         }
-        self._update_cluster_entity(cluster_id, changes=changes)
+        self._update_cluster_entity(cluster_id, changes=changes, defer=defer)
 
     def _update_task(self, status, message='', error_message='', progress=None):  # noqa: E501
+        if status in (BehaviorTaskStatus.SUCCESS, BehaviorTaskStatus.ERROR):
+            # The defined entity must be up to date once the task completes
+            try:
+                self.entity_update_buffer.flush_all()
+            except Exception:
+                LOGGER.error("Failed to write deferred updates of the defined "
+                             "entity", exc_info=True)
         if status == BehaviorTaskStatus.ERROR:
             error_details = asdict(BehaviorError(majorErrorCode='500',
                                                  minorErrorCode=message,
@@ -2139,7 +2188,7 @@ def _delete_vapp(client, org_name, ovdc_name, vapp_name):
         vdc_href = vdc_resource.get('href')
         vdc = VDC(client, href=vdc_href)
         task = vdc.delete_vapp(vapp_name, force=True)
-        client.get_task_monitor().wait_for_status(task)
+        TASK_WATCHER.wait_for_status(client, task)
     except Exception as err:
         LOGGER.error(f"Failed to delete vapp {vapp_name} "
                      f"(vdc: {ovdc_name}) with error: {err}", exc_info=True)
@@ -2159,13 +2208,13 @@ def _delete_nodes(sysadmin_client: vcd_client.Client, vapp_href, node_names,
         vm = vcd_vm.VM(sysadmin_client, resource=vapp.get_vm(vm_name))
         try:
             task = vm.undeploy()
-            sysadmin_client.get_task_monitor().wait_for_status(task)
+            TASK_WATCHER.wait_for_status(sysadmin_client, task)
         except Exception:
             LOGGER.error(f"Failed to undeploy VM {vm_name} "
                          f"(vapp: {vapp_href})", exc_info=True)
 
     task = vapp.delete_vms(node_names)
-    sysadmin_client.get_task_monitor().wait_for_status(task)
+    TASK_WATCHER.wait_for_status(sysadmin_client, task)
     LOGGER.debug(f"Successfully deleted node(s) {node_names} from "
                  f"cluster '{cluster_name}' (vapp: {vapp_href})")
 
@@ -2251,7 +2300,8 @@ def _set_cloud_init_spec(
         cloud_init_spec: str) -> None:
     base64_encoded_cloud_init_spec = base64.b64encode(cloud_init_spec.encode("utf-8"))  # noqa: E501
     task = vm.add_extra_config_element(CLOUDINIT_GUEST_USERDATA, base64_encoded_cloud_init_spec, True)  # noqa: E501
-    sysadmin_client.get_task_monitor().wait_for_status(
+    TASK_WATCHER.wait_for_status(
+        sysadmin_client,
         task,
         callback=wait_for_updating_cloud_init_spec,
     )
@@ -2259,7 +2309,8 @@ def _set_cloud_init_spec(
     vapp.reload()
 
     task = vm.add_extra_config_element(CLOUDINIT_GUEST_USERDATA_ENCODING, "base64", True)  # noqa: E501
-    sysadmin_client.get_task_monitor().wait_for_status(
+    TASK_WATCHER.wait_for_status(
+        sysadmin_client,
         task,
         callback=wait_for_updating_cloud_init_spec_encoding,
     )
@@ -2373,7 +2424,8 @@ def _add_control_plane_nodes(
             deploy=False,
             all_eulas_accepted=True
         )
-        sysadmin_client.get_task_monitor().wait_for_status(
+        TASK_WATCHER.wait_for_status(
+            sysadmin_client,
             task,
             callback=wait_for_adding_control_plane_vm_to_vapp
         )
@@ -2415,7 +2467,8 @@ def _add_control_plane_nodes(
             elif not sizing_class_name:
                 task = vm.modify_cpu(TkgmNodeSizing.SMALL.cpu)
             if task is not None:
-                sysadmin_client.get_task_monitor().wait_for_status(
+                TASK_WATCHER.wait_for_status(
+                    sysadmin_client,
                     task,
                     callback=wait_for_cpu_update)
                 vm.reload()
@@ -2428,7 +2481,8 @@ def _add_control_plane_nodes(
             elif not sizing_class_name:
                 task = vm.modify_memory(TkgmNodeSizing.SMALL.memory)
             if task is not None:
-                sysadmin_client.get_task_monitor().wait_for_status(
+                TASK_WATCHER.wait_for_status(
+                    sysadmin_client,
                     task,
                     callback=wait_for_memory_update)
                 vm.reload()
@@ -2475,7 +2529,8 @@ def _add_control_plane_nodes(
 
             task = vm.power_on()
             # wait_for_vm_power_on is reused for all vm creation callback
-            sysadmin_client.get_task_monitor().wait_for_status(
+            TASK_WATCHER.wait_for_status(
+                sysadmin_client,
                 task,
                 callback=wait_for_vm_power_on
             )
@@ -2483,28 +2538,29 @@ def _add_control_plane_nodes(
             admin_vapp.reload()
 
             # Note that this is an ordered list.
-            for customization_phase in [
-                PostCustomizationPhase.NETWORK_CONFIGURATION,
-                PostCustomizationPhase.STORE_SSH_KEY,
-                PostCustomizationPhase.PROXY_SETTING,
-                PostCustomizationPhase.TKR_GET_VERSIONS,
-                PostCustomizationPhase.KUBEADM_INIT,
-                PostCustomizationPhase.KUBECTL_APPLY_CNI,
-                PostCustomizationPhase.KUBECTL_APPLY_CPI,
-                PostCustomizationPhase.KUBECTL_APPLY_CSI,
-                PostCustomizationPhase.KUBECTL_APPLY_DEFAULT_STORAGE_CLASS,
-                PostCustomizationPhase.KUBEADM_TOKEN_GENERATE,
-            ]:
-                admin_vapp.reload()
-                vcd_utils.wait_for_completion_of_post_customization_procedure(
-                    admin_vm,
-                    customization_phase=customization_phase.value,  # noqa: E501
-                    logger=LOGGER
-                )
+            vcd_utils.wait_for_completion_of_post_customization_procedures(
+                [admin_vm],
+                customization_phases=[
+                    customization_phase.value for customization_phase in [
+                        PostCustomizationPhase.NETWORK_CONFIGURATION,
+                        PostCustomizationPhase.STORE_SSH_KEY,
+                        PostCustomizationPhase.PROXY_SETTING,
+                        PostCustomizationPhase.TKR_GET_VERSIONS,
+                        PostCustomizationPhase.KUBEADM_INIT,
+                        PostCustomizationPhase.KUBECTL_APPLY_CNI,
+                        PostCustomizationPhase.KUBECTL_APPLY_CPI,
+                        PostCustomizationPhase.KUBECTL_APPLY_CSI,
+                        PostCustomizationPhase.KUBECTL_APPLY_DEFAULT_STORAGE_CLASS,  # noqa: E501
+                        PostCustomizationPhase.KUBEADM_TOKEN_GENERATE,
+                    ]
+                ],
+                logger=LOGGER
+            )
             admin_vm.reload()
 
             task = admin_vm.add_extra_config_element(DISK_ENABLE_UUID, "1", True)  # noqa: E501
-            sysadmin_client.get_task_monitor().wait_for_status(
+            TASK_WATCHER.wait_for_status(
+                sysadmin_client,
                 task,
                 callback=wait_for_updating_disk_enable_uuid
             )
@@ -2639,7 +2695,8 @@ def _add_worker_nodes(sysadmin_client, user_client, num_nodes, org, vdc, vapp,
             deploy=False,
             all_eulas_accepted=True
         )
-        sysadmin_client.get_task_monitor().wait_for_status(
+        TASK_WATCHER.wait_for_status(
+            sysadmin_client,
             task,
             callback=wait_for_adding_worker_vm_to_vapp
         )
@@ -2648,105 +2705,121 @@ def _add_worker_nodes(sysadmin_client, user_client, num_nodes, org, vdc, vapp,
         kube_config = None
         if len(core_pkg_versions_to_install) > 0 and native_entity is not None:
             kube_config = _get_kube_config_from_native_entity(native_entity)
-        for ind in range(num_vm_specs):
-            spec = vm_specs[ind]
-            vm_name = spec['target_vm_name']
-            vm_resource = vapp.get_vm(vm_name)
-            vm = vcd_vm.VM(user_client, resource=vm_resource)
-            admin_vm = vcd_vm.VM(sysadmin_client, resource=vm_resource)
-
-            task = None
-            # updating cpu count on the VM
-            if cpu_count and cpu_count > 0:
-                task = vm.modify_cpu(cpu_count)
-            elif not sizing_class_name:
-                task = vm.modify_cpu(TkgmNodeSizing.SMALL.cpu)
-            if task is not None:
-                sysadmin_client.get_task_monitor().wait_for_status(
-                    task,
-                    callback=wait_for_cpu_update)
-                vm.reload()
-                vapp.reload()
-
-            task = None
-            # updating memory
-            if memory_mb and memory_mb > 0:
-                task = vm.modify_memory(memory_mb)
-            elif not sizing_class_name:
-                task = vm.modify_memory(TkgmNodeSizing.SMALL.memory)
-            if task is not None:
-                sysadmin_client.get_task_monitor().wait_for_status(
-                    task,
-                    callback=wait_for_memory_update)
-                vm.reload()
-                vapp.reload()
+        # kapp controller is installed by the 0th worker node before the other
+        # nodes are customized, so that it is ready for the last worker node
+        # to install the tanzu cli packages. Nodes of a batch go through post
+        # customization together.
+        if to_install_tkr_kapp_controller_version and num_vm_specs > 1:
+            batches = [[0], list(range(1, num_vm_specs))]
+        else:
+            batches = [list(range(num_vm_specs))]
+        for batch in batches:
+            admin_vms = {}
+            for ind in batch:
+                spec = vm_specs[ind]
+                vm_name = spec['target_vm_name']
+                vm_resource = vapp.get_vm(vm_name)
+                vm = vcd_vm.VM(user_client, resource=vm_resource)
+                admin_vm = vcd_vm.VM(sysadmin_client, resource=vm_resource)
+
+                task = None
+                # updating cpu count on the VM
+                if cpu_count and cpu_count > 0:
+                    task = vm.modify_cpu(cpu_count)
+                elif not sizing_class_name:
+                    task = vm.modify_cpu(TkgmNodeSizing.SMALL.cpu)
+                if task is not None:
+                    TASK_WATCHER.wait_for_status(
+                        sysadmin_client,
+                        task,
+                        callback=wait_for_cpu_update)
+                    vm.reload()
+                    vapp.reload()
+
+                task = None
+                # updating memory
+                if memory_mb and memory_mb > 0:
+                    task = vm.modify_memory(memory_mb)
+                elif not sizing_class_name:
+                    task = vm.modify_memory(TkgmNodeSizing.SMALL.memory)
+                if task is not None:
+                    TASK_WATCHER.wait_for_status(
+                        sysadmin_client,
+                        task,
+                        callback=wait_for_memory_update)
+                    vm.reload()
+                    vapp.reload()
+
+                # NOTE: admin-vapp reload is mandatory; else Extra-Config-Element XML section won't be found.  # noqa: E501
+                # Setting Cloud init spec and customization requires extra config section to be visible for updates.  # noqa: E501
+                admin_vm.reload()
+                admin_vapp.reload()
 
-            # NOTE: admin-vapp reload is mandatory; else Extra-Config-Element XML section won't be found.  # noqa: E501
-            # Setting Cloud init spec and customization requires extra config section to be visible for updates.  # noqa: E501
-            admin_vm.reload()
-            admin_vapp.reload()
+                # create a cloud-init spec and update the VMs with it
+                _set_cloud_init_spec(sysadmin_client, admin_vapp, admin_vm, spec['cloudinit_node_spec'])  # noqa: E501
+
+                should_use_kubeconfig: bool = ((ind == 0) or (ind == num_vm_specs - 1)) and len(core_pkg_versions_to_install) > 0  # noqa: E501
+                if should_use_kubeconfig:
+                    # The worker node will clear this value upon reading it or
+                    # failure
+                    task = admin_vm.add_extra_config_element(PostCustomizationKubeconfig, kube_config)  # noqa: E501
+                    TASK_WATCHER.wait_for_status(
+                        sysadmin_client,
+                        task,
+                        callback=wait_for_updating_kubeconfig
+                    )
 
-            # create a cloud-init spec and update the VMs with it
-            _set_cloud_init_spec(sysadmin_client, admin_vapp, admin_vm, spec['cloudinit_node_spec'])  # noqa: E501
-
-            should_use_kubeconfig: bool = ((ind == 0) or (ind == num_vm_specs - 1)) and len(core_pkg_versions_to_install) > 0  # noqa: E501
-            if should_use_kubeconfig:
-                # The worker node will clear this value upon reading it or
-                # failure
-                task = admin_vm.add_extra_config_element(PostCustomizationKubeconfig, kube_config)  # noqa: E501
-                sysadmin_client.get_task_monitor().wait_for_status(
+                task = vm.power_on()
+                # wait_for_vm_power_on is reused for all vm creation callback
+                TASK_WATCHER.wait_for_status(
+                    sysadmin_client,
                     task,
-                    callback=wait_for_updating_kubeconfig
+                    callback=wait_for_vm_power_on
                 )
+                vapp.reload()
+                admin_vapp.reload()
 
-            task = vm.power_on()
-            # wait_for_vm_power_on is reused for all vm creation callback
-            sysadmin_client.get_task_monitor().wait_for_status(
-                task,
-                callback=wait_for_vm_power_on
-            )
-            vapp.reload()
-            admin_vapp.reload()
-
-            LOGGER.debug(f"worker {vm_name} to join cluster using:{control_plane_join_cmd}")  # noqa: E501
+                LOGGER.debug(f"worker {vm_name} to join cluster using:{control_plane_join_cmd}")  # noqa: E501
+                admin_vms[ind] = admin_vm
 
             # Note that this is an ordered list.
-            for customization_phase in [
-                PostCustomizationPhase.NETWORK_CONFIGURATION,
-                PostCustomizationPhase.STORE_SSH_KEY,
-                PostCustomizationPhase.PROXY_SETTING,
-                PostCustomizationPhase.KUBEADM_NODE_JOIN,
-                PostCustomizationPhase.CORE_PACKAGES_ATTEMPTED_INSTALL,
-            ]:
-                is_core_pkg_phase = customization_phase == PostCustomizationPhase.CORE_PACKAGES_ATTEMPTED_INSTALL  # noqa: E501
-                admin_vapp.reload()
-                vcd_utils.wait_for_completion_of_post_customization_procedure(
-                    admin_vm,
-                    customization_phase=customization_phase.value,  # noqa: E501
-                    logger=LOGGER,
-                    timeout=750 if is_core_pkg_phase else DEFAULT_POST_CUSTOMIZATION_TIMEOUT_SEC  # noqa: E501
-                )
-            admin_vm.reload()
+            vcd_utils.wait_for_completion_of_post_customization_procedures(
+                list(admin_vms.values()),
+                customization_phases=[
+                    customization_phase.value for customization_phase in [
+                        PostCustomizationPhase.NETWORK_CONFIGURATION,
+                        PostCustomizationPhase.STORE_SSH_KEY,
+                        PostCustomizationPhase.PROXY_SETTING,
+                        PostCustomizationPhase.KUBEADM_NODE_JOIN,
+                        PostCustomizationPhase.CORE_PACKAGES_ATTEMPTED_INSTALL,  # noqa: E501
+                    ]
+                ],
+                phase_timeouts={
+                    PostCustomizationPhase.CORE_PACKAGES_ATTEMPTED_INSTALL.value: 750  # noqa: E501
+                },
+                logger=LOGGER
+            )
 
-            # get installed core pkg versions
-            if should_use_kubeconfig:
-                sysadmin_client.get_task_monitor().wait_for_status(
+            for ind, admin_vm in admin_vms.items():
+                admin_vm.reload()
+
+                # get installed core pkg versions
+                should_use_kubeconfig: bool = ((ind == 0) or (ind == num_vm_specs - 1)) and len(core_pkg_versions_to_install) > 0  # noqa: E501
+                if should_use_kubeconfig:
+                    installed_core_pkg_versions[CorePkgVersionKeys.KAPP_CONTROLLER.value] = vcd_utils.get_vm_extra_config_element(  # noqa: E501
+                        admin_vm,
+                        PostCustomizationVersions.INSTALLED_VERSION_OF_KAPP_CONTROLLER.value)  # noqa: E501
+                    installed_core_pkg_versions[CorePkgVersionKeys.METRICS_SERVER.value] = vcd_utils.get_vm_extra_config_element(  # noqa: E501
+                        admin_vm,
+                        PostCustomizationVersions.INSTALLED_VERSION_OF_METRICS_SERVER.value)  # noqa: E501
+
+                task = admin_vm.add_extra_config_element(DISK_ENABLE_UUID, "1", True)  # noqa: E501
+                TASK_WATCHER.wait_for_status(
+                    sysadmin_client,
                     task,
-                    callback=wait_for_updating_kubeconfig
+                    callback=wait_for_updating_disk_enable_uuid
                 )
-                installed_core_pkg_versions[CorePkgVersionKeys.KAPP_CONTROLLER.value] = vcd_utils.get_vm_extra_config_element(  # noqa: E501
-                    admin_vm,
-                    PostCustomizationVersions.INSTALLED_VERSION_OF_KAPP_CONTROLLER.value)  # noqa: E501
-                installed_core_pkg_versions[CorePkgVersionKeys.METRICS_SERVER.value] = vcd_utils.get_vm_extra_config_element(  # noqa: E501
-                    admin_vm,
-                    PostCustomizationVersions.INSTALLED_VERSION_OF_METRICS_SERVER.value)  # noqa: E501
-
-            task = admin_vm.add_extra_config_element(DISK_ENABLE_UUID, "1", True)  # noqa: E501
-            sysadmin_client.get_task_monitor().wait_for_status(
-                task,
-                callback=wait_for_updating_disk_enable_uuid
-            )
-            admin_vapp.reload()
+                admin_vapp.reload()
 
     except Exception as err:
         LOGGER.error(err, exc_info=True)
@@ -0,0 +1,199 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Readiness probes of the VMs of native cluster nodes.
+
+Instead of sleeping for a fixed time before using a new VM, the native
+backends probe it until it is ready, with exponential backoff, for at most
+the readiness budget of its template OS. Running out of budget isn't an
+error in itself: callers go on as they did after the fixed sleeps, and fail
+if the VM isn't ready by then.
+
+Time spent waiting is recorded per phase, see ReadinessProbePhase.
+"""
+
+import threading
+import time
+
+import pyvcloud.vcd.vm as vcd_vm
+
+import container_service_extension.common.constants.server_constants as server_constants  # noqa: E501
+from container_service_extension.common.constants.server_constants import ReadinessProbePhase  # noqa: E501
+from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER  # noqa: E501
+
+# vCD guest customization statuses after which the status doesn't change
+_GUEST_CUSTOMIZATION_FINAL_STATUSES = ('GC_COMPLETE', 'GC_FAILED')
+
+_stats_lock = threading.Lock()
+# phase -> [number of waits, number of waits out of budget, seconds waited]
+_stats = {phase: [0, 0, 0.0] for phase in ReadinessProbePhase}
+
+
+def get_budget(template_os=None):
+    """Get the max number of seconds to wait for a VM to be ready.
+
+    :param str template_os: OS of the template of the VM.
+
+    :rtype: float
+    """
+    return server_constants.READINESS_PROBE_BUDGETS_SEC.get(
+        template_os, server_constants.DEFAULT_READINESS_PROBE_BUDGET_SEC)
+
+
+def wait_until_ready(phase: ReadinessProbePhase, probe, budget=None,
+                     max_tries=None,
+                     max_interval=server_constants.READINESS_PROBE_MAX_INTERVAL_SEC):  # noqa: E501
+    """Call a probe until it reports ready, with exponential backoff.
+
+    Exceptions raised by the probe are propagated.
+
+    :param ReadinessProbePhase phase: phase the time waited is recorded for.
+    :param callable probe: function without arguments returning whether the
+        VM is ready.
+    :param float budget: max number of seconds to wait, None for no limit.
+    :param int max_tries: max number of calls of the probe, None for no
+        limit.
+    :param float max_interval: max number of seconds between two calls.
+
+    :return: whether the VM got ready within budget and tries.
+    :rtype: bool
+    """
+    start_time = time.monotonic()
+    interval = min(server_constants.READINESS_PROBE_MIN_INTERVAL_SEC,
+                   max_interval)
+    num_tries = 0
+    is_ready = False
+    try:
+        while True:
+            num_tries += 1
+            is_ready = probe()
+            if is_ready:
+                return True
+            if max_tries is not None and num_tries >= max_tries:
+                return False
+            elapsed = time.monotonic() - start_time
+            if budget is not None and elapsed >= budget:
+                return False
+            if budget is not None:
+                interval = min(interval, budget - elapsed)
+            time.sleep(interval)
+            interval = min(interval * 2, max_interval)
+    finally:
+        _record_wait(phase, time.monotonic() - start_time, is_ready)
+
+
+def wait_for_guest_customization(sysadmin_client, vapp, node_names,
+                                 template_os=None):
+    """Wait for vCD guest customization of VMs to complete.
+
+    Guest customization sets the password of the VM, scripts can't be run
+    in it before.
+
+    :param pyvcloud.vcd.client.Client sysadmin_client:
+    :param pyvcloud.vcd.vapp.VApp vapp: vApp of the VMs.
+    :param list node_names: names of the VMs to wait for.
+    :param str template_os: OS of the template of the VMs.
+
+    :return: whether all VMs completed guest customization within budget.
+    :rtype: bool
+    """
+    deadline = time.monotonic() + get_budget(template_os)
+    is_ready = True
+    # VMs are customized in parallel, so waiting for them one after the
+    # other takes about as long as for the slowest one
+    for node_name in node_names:
+        vm_href = vapp.get_vm(node_name).get('href')
+        if not _wait_for_guest_customization(sysadmin_client, vm_href,
+                                             node_name, deadline):
+            is_ready = False
+    return is_ready
+
+
+def wait_for_vm_ready(sysadmin_client, vm_href, vs, vm, node_name,
+                      template_os=None):
+    """Wait for a VM to be customized and to accept guest operations.
+
+    The VM is ready once vCD guest customization is complete, VMware Tools
+    are running with a healthy heartbeat, and guest operations are
+    available.
+
+    :param pyvcloud.vcd.client.Client sysadmin_client:
+    :param str vm_href: href of the VM in vCD.
+    :param vsphere_guest_run.vsphere.VSphere vs: connected VSphere object.
+    :param vim.VirtualMachine vm: VM, as returned by vs.get_vm_by_moid().
+    :param str node_name: name of the node, for logging.
+    :param str template_os: OS of the template of the VM.
+
+    :return: whether the VM got ready within budget.
+    :rtype: bool
+    """
+    deadline = time.monotonic() + get_budget(template_os)
+    if not _wait_for_guest_customization(sysadmin_client, vm_href, node_name,
+                                         deadline):
+        return False
+
+    def probe_tools_heartbeat():
+        return vm.guest.toolsRunningStatus == 'guestToolsRunning' and \
+            vm.guestHeartbeatStatus == 'green'
+
+    def probe_guest_operations():
+        return bool(vm.guest.guestOperationsReady)
+
+    for phase, probe in ((ReadinessProbePhase.TOOLS_HEARTBEAT,
+                          probe_tools_heartbeat),
+                         (ReadinessProbePhase.GUEST_OPERATIONS,
+                          probe_guest_operations)):
+        if not wait_until_ready(phase, probe,
+                                budget=max(deadline - time.monotonic(), 0)):
+            LOGGER.warning(f"{node_name} not ready for {phase.value} within "
+                           f"budget, going on")
+            return False
+    return True
+
+
+def _wait_for_guest_customization(sysadmin_client, vm_href, node_name,
+                                  deadline):
+    vm = vcd_vm.VM(sysadmin_client, href=vm_href)
+
+    def probe():
+        try:
+            status = str(vm.get_guest_customization_status())
+        except Exception as err:
+            LOGGER.debug(f"Failed to get guest customization status of "
+                         f"{node_name}: {err}")
+            return False
+        LOGGER.debug(f"Guest customization of {node_name} is {status}")
+        if status == 'GC_FAILED':
+            LOGGER.warning(f"Guest customization of {node_name} failed")
+        return status in _GUEST_CUSTOMIZATION_FINAL_STATUSES
+
+    if wait_until_ready(ReadinessProbePhase.GUEST_CUSTOMIZATION, probe,
+                        budget=max(deadline - time.monotonic(), 0)):
+        return True
+    LOGGER.warning(f"Guest customization of {node_name} not complete within "
+                   f"budget, going on")
+    return False
+
+
+def get_stats():
+    """Return the number of waits and time waited per phase.
+
+    :rtype: dict
+    """
+    stats = {}
+    with _stats_lock:
+        for phase, (num_waits, num_timeouts, wait_time) in _stats.items():
+            stats[f"{phase.value}_waits"] = num_waits
+            stats[f"{phase.value}_waits_out_of_budget"] = num_timeouts
+            stats[f"{phase.value}_wait_sec"] = round(wait_time, 3)
+    return stats
+
+
+def _record_wait(phase, wait_time, is_ready):
+    with _stats_lock:
+        phase_stats = _stats[phase]
+        phase_stats[0] += 1
+        if not is_ready:
+            phase_stats[1] += 1
+        phase_stats[2] += wait_time
@@ -0,0 +1,347 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""In-memory index of the summaries of the clusters managed by CSE server.
+
+Cluster list requests are answered by listing the entities of the native
+cluster entity type in vCD. The index keeps the summary of every such
+entity in memory, so that list requests for cluster summaries can be
+answered without going to vCD.
+
+The index is warmed by listing all clusters when CSE server starts, and
+updated by DefEntityService whenever CSE server updates, resolves or
+deletes the entity of a cluster, be it from a behavior invocation or a
+cluster operation. Changes made outside of CSE server are picked up by
+listing all clusters again every refresh interval. The index only answers
+queries while the last such reconciliation is recent enough, so that the
+staleness of the answers stays bounded.
+
+Every worker process of CSE server has its own index, and only sees the
+changes made by the worker itself between reconciliations.
+"""
+
+import threading
+import time
+import traceback
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from container_service_extension.common.constants.shared_constants import ClusterSummaryField  # noqa: E501
+from container_service_extension.common.constants.shared_constants import CSE_PAGINATION_DEFAULT_PAGE_SIZE  # noqa: E501
+from container_service_extension.common.constants.shared_constants import CSE_PAGINATION_FIRST_PAGE_NUMBER  # noqa: E501
+from container_service_extension.common.constants.shared_constants import PaginationKey  # noqa: E501
+from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER  # noqa: E501
+import container_service_extension.rde.constants as def_constants
+from container_service_extension.rde.models.common_models import ClusterSummary  # noqa: E501
+
+CLUSTER_INDEX_RECONCILE_THREAD = 'ClusterIndexReconciler'
+
+# Names of all the summary fields, i.e. what the index keeps per cluster
+CLUSTER_INDEX_FIELDS = [field.value for field in ClusterSummaryField]
+
+# Summary fields with a lookup table from value to clusters
+_INDEXED_FIELDS = (ClusterSummaryField.ORG.value,
+                   ClusterSummaryField.VDC.value,
+                   ClusterSummaryField.OWNER.value,
+                   ClusterSummaryField.PHASE.value)
+
+# Filter of cluster list requests -> summary field it matches. CSE creates
+# the entity of a cluster in the org of the cluster, so metadata.orgName is
+# the org of the entity. Filters on any other property are sent to vCD.
+_FILTER_KEY_TO_FIELD = {
+    def_constants.RDEFilterKey.NAME.value: ClusterSummaryField.NAME.value,
+    'id': ClusterSummaryField.ID.value,
+    'org.name': ClusterSummaryField.ORG.value,
+    'owner.name': ClusterSummaryField.OWNER.value,
+    def_constants.ClusterEntityFilterKey2X.ORG_NAME.value:
+        ClusterSummaryField.ORG.value,
+    def_constants.ClusterEntityFilterKey2X.OVDC_NAME.value:
+        ClusterSummaryField.VDC.value,
+    def_constants.ClusterEntityFilterKey2X.KIND.value:
+        ClusterSummaryField.KIND.value,
+    def_constants.ClusterEntityFilterKey2X.PHASE.value:
+        ClusterSummaryField.PHASE.value,
+    def_constants.ClusterEntityFilterKey1X.ORG_NAME.value:
+        ClusterSummaryField.ORG.value,
+    def_constants.ClusterEntityFilterKey1X.OVDC_NAME.value:
+        ClusterSummaryField.VDC.value,
+}
+
+
+class ClusterIndex:
+    def __init__(self):
+        """Create an empty, disabled index."""
+        self._lock = threading.Lock()
+        # cluster id -> summary
+        self._summaries: Dict[str, ClusterSummary] = {}
+        # indexed field -> value -> ids of the clusters with that value
+        self._ids_by_field: Dict[str, Dict[str, Set[str]]] = \
+            {field: {} for field in _INDEXED_FIELDS}
+        # cluster id -> time of the last change made by CSE server, so that
+        # a reconciliation doesn't undo changes made while it was listing
+        # the clusters
+        self._change_times: Dict[str, float] = {}
+        self._entity_type_id: Optional[str] = None
+        self._refresh_interval = 0
+        self._last_reconcile_time: Optional[float] = None
+        self._stop_event = threading.Event()
+        self._reconcile_thread = None
+        self._num_queries = 0
+        self._num_stale_queries = 0
+        self._num_unsupported_queries = 0
+        self._num_updates = 0
+        self._num_removals = 0
+        self._num_reconciles = 0
+        self._num_reconcile_failures = 0
+        self._num_drifts = 0
+
+    def start(self, entity_type_id: str, refresh_interval: float,
+              list_clusters: Callable[[], Iterable[ClusterSummary]]):
+        """Enable the index, and start reconciling it in the background.
+
+        :param str entity_type_id: id of the entity type of the clusters.
+        :param float refresh_interval: seconds between reconciliations.
+        :param callable list_clusters: function returning the summaries,
+            with all fields, of all the clusters in vCD.
+        """
+        with self._lock:
+            if self._reconcile_thread is not None:
+                return
+            self._entity_type_id = entity_type_id
+            self._refresh_interval = refresh_interval
+            self._stop_event.clear()
+            reconcile_thread = threading.Thread(
+                name=CLUSTER_INDEX_RECONCILE_THREAD,
+                target=self._reconcile_thread_run,
+                args=(list_clusters, ))
+            reconcile_thread.daemon = True
+            reconcile_thread.start()
+            self._reconcile_thread = reconcile_thread
+
+    def stop(self):
+        """Disable the index and stop reconciling it."""
+        with self._lock:
+            self._entity_type_id = None
+            self._reconcile_thread = None
+            self._last_reconcile_time = None
+            self._summaries.clear()
+            for ids_by_value in self._ids_by_field.values():
+                ids_by_value.clear()
+            self._change_times.clear()
+        self._stop_event.set()
+
+    def is_fresh(self) -> bool:
+        """Tell whether the index may answer queries.
+
+        :rtype: bool
+        """
+        with self._lock:
+            return self._is_fresh(time.monotonic())
+
+    def put(self, entity_body: dict, entity_type_id: str = None):
+        """Index the summary of an entity created or updated by CSE server.
+
+        Entities of other entity types than the indexed one are ignored.
+
+        :param dict entity_body: response body of the entity returned by vCD.
+        :param str entity_type_id: entity type id of the entity, if missing
+            from the response body.
+        """
+        if self._entity_type_id is None or not isinstance(entity_body, dict):
+            return
+        if (entity_type_id or entity_body.get('entityType')) != \
+                self._entity_type_id:
+            return
+        summary = ClusterSummary.from_entity_body(entity_body,
+                                                  CLUSTER_INDEX_FIELDS)
+        if summary.id is None:
+            return
+        summary.entityType = self._entity_type_id
+        with self._lock:
+            if self._entity_type_id is None:
+                return
+            self._set(summary)
+            self._change_times[summary.id] = time.monotonic()
+            self._num_updates += 1
+
+    def remove(self, entity_id: str):
+        """Remove an entity deleted by CSE server from the index.
+
+        :param str entity_id: id of the entity.
+        """
+        if self._entity_type_id is None:
+            return
+        with self._lock:
+            if self._entity_type_id is None:
+                return
+            if self._unset(entity_id):
+                self._num_removals += 1
+            self._change_times[entity_id] = time.monotonic()
+
+    def query(self, filters: dict = None) -> Optional[List[ClusterSummary]]:
+        """Return the summaries of the clusters matching list filters.
+
+        :param dict filters: filters of the cluster list request, property
+            -> value.
+
+        :return: summaries sorted by name, or None if the index can't answer
+            the query, i.e. it isn't fresh, or some filters are not on a
+            summary field.
+        :rtype: list
+        """
+        criteria = {}
+        for key, value in (filters or {}).items():
+            if not key or not value:
+                # Not sent to vCD either
+                continue
+            field = _FILTER_KEY_TO_FIELD.get(key)
+            if field is None or not isinstance(value, str) or '*' in value:
+                with self._lock:
+                    self._num_unsupported_queries += 1
+                return None
+            criteria[field] = value
+
+        with self._lock:
+            if not self._is_fresh(time.monotonic()):
+                self._num_stale_queries += 1
+                return None
+            self._num_queries += 1
+            candidate_ids = None
+            for field, value in criteria.items():
+                if field in self._ids_by_field:
+                    ids = self._ids_by_field[field].get(value, set())
+                    if candidate_ids is None or len(ids) < len(candidate_ids):
+                        candidate_ids = ids
+            if candidate_ids is None:
+                candidate_ids = self._summaries.keys()
+            summaries = [self._summaries[entity_id]
+                         for entity_id in candidate_ids]
+        summaries = [summary for summary in summaries
+                     if all(getattr(summary, field) == value
+                            for field, value in criteria.items())]
+        summaries.sort(key=lambda summary: (summary.name or '', summary.id))
+        return summaries
+
+    def query_page(self, filters: dict = None,
+                   page_number: int = CSE_PAGINATION_FIRST_PAGE_NUMBER,
+                   page_size: int = CSE_PAGINATION_DEFAULT_PAGE_SIZE) -> Optional[dict]:  # noqa: E501
+        """Return a page of the summaries of clusters matching list filters.
+
+        :param dict filters: filters of the cluster list request.
+        :param int page_number: page to return, starting at 1.
+        :param int page_size: number of summaries per page.
+
+        :return: total number of matches and the summaries of the page, like
+            DefEntityService.get_entities_per_page_by_entity_type returns
+            them, or None if the index can't answer the query.
+        :rtype: dict
+        """
+        summaries = self.query(filters)
+        if summaries is None:
+            return None
+        start = (page_number - CSE_PAGINATION_FIRST_PAGE_NUMBER) * page_size
+        return {
+            PaginationKey.RESULT_TOTAL: len(summaries),
+            PaginationKey.VALUES: summaries[start:start + page_size]
+        }
+
+    def reconcile(self, summaries: Iterable[ClusterSummary],
+                  started_at: float):
+        """Replace the content of the index with the clusters listed in vCD.
+
+        Clusters CSE server changed after the listing started keep their
+        indexed state, since the listing may predate the change.
+
+        :param summaries: summaries of all the clusters in vCD.
+        :param float started_at: monotonic time the listing started at.
+        """
+        summaries = list(summaries)
+        with self._lock:
+            if self._entity_type_id is None:
+                return
+            listed_ids = set()
+            for summary in summaries:
+                listed_ids.add(summary.id)
+                if self._change_times.get(summary.id, started_at) > \
+                        started_at:
+                    continue
+                if self._summaries.get(summary.id) != summary:
+                    self._set(summary)
+                    self._num_drifts += 1
+            for entity_id in list(self._summaries):
+                if entity_id not in listed_ids and \
+                        self._change_times.get(entity_id, started_at) <= \
+                        started_at:
+                    self._unset(entity_id)
+                    self._num_drifts += 1
+            self._change_times = {
+                entity_id: change_time
+                for entity_id, change_time in self._change_times.items()
+                if change_time > started_at
+            }
+            self._last_reconcile_time = started_at
+            self._num_reconciles += 1
+
+    def get_stats(self):
+        """Return index size, query and reconciliation counters.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'clusters_indexed': len(self._summaries),
+                'queries': self._num_queries,
+                'stale_queries': self._num_stale_queries,
+                'unsupported_queries': self._num_unsupported_queries,
+                'updates': self._num_updates,
+                'removals': self._num_removals,
+                'reconciles': self._num_reconciles,
+                'reconcile_failures': self._num_reconcile_failures,
+                # Clusters added, changed or removed by reconciliations
+                'drifts': self._num_drifts
+            }
+
+    def _is_fresh(self, now):
+        # Must be called with the lock held
+        return self._last_reconcile_time is not None and \
+            now - self._last_reconcile_time <= self._refresh_interval * \
+            def_constants.CLUSTER_INDEX_MAX_STALENESS_REFRESH_INTERVALS
+
+    def _set(self, summary: ClusterSummary):
+        # Must be called with the lock held
+        self._unset(summary.id)
+        self._summaries[summary.id] = summary
+        for field, ids_by_value in self._ids_by_field.items():
+            ids_by_value.setdefault(getattr(summary, field), set()).add(
+                summary.id)
+
+    def _unset(self, entity_id: str) -> bool:
+        # Must be called with the lock held
+        summary = self._summaries.pop(entity_id, None)
+        if summary is None:
+            return False
+        for field, ids_by_value in self._ids_by_field.items():
+            value = getattr(summary, field)
+            ids = ids_by_value.get(value)
+            if ids is not None:
+                ids.discard(entity_id)
+                if not ids:
+                    del ids_by_value[value]
+        return True
+
+    def _reconcile_thread_run(self, list_clusters):
+        while not self._stop_event.is_set():
+            started_at = time.monotonic()
+            try:
+                self.reconcile(list_clusters(), started_at)
+                LOGGER.debug(f"Reconciled cluster index in "
+                             f"{time.monotonic() - started_at:.2f} seconds")
+            except Exception:
+                with self._lock:
+                    self._num_reconcile_failures += 1
+                LOGGER.error(f"Failed to reconcile cluster index: "
+                             f"{traceback.format_exc()}")
+            self._stop_event.wait(self._refresh_interval)
+
+
+CLUSTER_INDEX = ClusterIndex()
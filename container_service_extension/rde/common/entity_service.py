@@ -4,7 +4,9 @@
 
 import functools
 import json
-from typing import List, Tuple, Union
+import random
+import time
+from typing import List, Optional, Tuple, Union
 
 import pyvcloud.vcd.client as vcd_client
 from pyvcloud.vcd.vcd_api_version import VCDApiVersion
@@ -18,14 +20,18 @@ from container_service_extension.common.constants.shared_constants import CSE_PA
 from container_service_extension.common.constants.shared_constants import HttpResponseHeader  # noqa: E501
 from container_service_extension.common.constants.shared_constants import RequestMethod  # noqa: E501
 import container_service_extension.common.utils.core_utils as utils
+import container_service_extension.common.utils.thread_utils as thread_utils
 import container_service_extension.exception.exceptions as cse_exception
 from container_service_extension.exception.minor_error_codes import MinorErrorCode  # noqa: E501
 from container_service_extension.lib.cloudapi.cloudapi_client import CloudApiClient  # noqa: E501
 from container_service_extension.lib.cloudapi.constants import CloudApiResource
 from container_service_extension.lib.cloudapi.constants import CloudApiVersion
 from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER
+from container_service_extension.rde.common.cluster_index import CLUSTER_INDEX  # noqa: E501
+from container_service_extension.rde.common.rde_cache import RDE_CACHE
 import container_service_extension.rde.constants as def_constants
 from container_service_extension.rde.models.abstractNativeEntity import AbstractNativeEntity  # noqa: E501
+from container_service_extension.rde.models.common_models import ClusterSummary  # noqa: E501
 from container_service_extension.rde.models.common_models import DefEntity
 from container_service_extension.rde.models.common_models import DefEntityType
 from container_service_extension.rde.models.common_models import GenericClusterEntity  # noqa: E501
@@ -33,6 +39,23 @@ from container_service_extension.rde.models.common_models import TKGEntity
 import container_service_extension.rde.utils as def_utils
 
 
+def _backoff_rde_update(entity_id, attempt):
+    """Sleep before retrying an update that conflicted with another one.
+
+    The delay is drawn at random up to an exponentially growing cap, so that
+    concurrent updaters of the same entity don't retry in lockstep.
+
+    :param str entity_id: id of the entity being updated.
+    :param int attempt: number of attempts made so far.
+    """
+    max_delay = min(server_constants.RDE_UPDATE_BACKOFF_MAX_SEC,
+                    server_constants.RDE_UPDATE_BACKOFF_BASE_SEC * 2 ** (attempt - 1))  # noqa: E501
+    delay = random.uniform(0, max_delay)
+    LOGGER.debug(f"Entity {entity_id} was modified concurrently, retrying "
+                 f"update in {delay:.2f} seconds")
+    time.sleep(delay)
+
+
 def handle_entity_service_exception(func):
     """Decorate to trap exceptions and process them.
 
@@ -119,11 +142,13 @@ class DefEntityService:
             #   202 - location header,
             #   200 - xvcloud-task-location needs to be used
             return response[0], response[1][HttpResponseHeader.LOCATION.value]
+        CLUSTER_INDEX.put(response)
         return response
 
     @handle_entity_service_exception
     def list_entities_by_entity_type(self, vendor: str, nss: str, version: str,
-                                     filters: dict = None) -> List[DefEntity]:
+                                     filters: dict = None,
+                                     summary_fields: list = None) -> List[DefEntity]:  # noqa: E501
         """List entities of a given entity type.
 
         vCD's behavior when invalid filter keys are passed:
@@ -136,31 +161,76 @@ class DefEntityService:
         :param str nss: nss of the entity type
         :param str version: version of the entity type
         :param dict filters: Key-value pairs representing filter options
+        :param list summary_fields: if set, the entities are returned as
+            cluster summaries with only these fields read, instead of being
+            parsed into DefEntity
         :return: List of entities of that entity type
         :rtype: Generator[DefEntity, None, None]
         """
         filter_string = utils.construct_filter_string(filters)
-        page_num = 0
-        while True:
-            page_num += 1
+
+        def get_page(cloudapi_client, page_num):
             query_string = f"page={page_num}&sortAsc=name"
             if filter_string:
                 query_string = f"filter={filter_string}&{query_string}"
-            response_body = self._cloudapi_client.do_request(
+            return cloudapi_client.do_request(
                 method=RequestMethod.GET,
                 cloudapi_version=CloudApiVersion.VERSION_1_0_0,
                 resource_url_relative_path=f"{CloudApiResource.ENTITIES}/"
                                            f"{CloudApiResource.ENTITY_TYPES_TOKEN}/"  # noqa: E501
                                            f"{vendor}/{nss}/{version}?{query_string}")  # noqa: E501
-            if len(response_body['values']) == 0:
-                break
-            for entity in response_body['values']:
-                yield DefEntity(**entity)
+
+        for values in self._list_all_pages(get_page):
+            for entity in values:
+                if summary_fields is not None:
+                    yield ClusterSummary.from_entity_body(entity,
+                                                          summary_fields)
+                else:
+                    yield DefEntity(**entity)
+
+    def _list_all_pages(self, get_page):
+        """Fetch all pages of a paginated list of entities.
+
+        The first page tells how many pages there are. The remaining pages
+        are fetched concurrently, at most DEF_ENTITY_LIST_MAX_CONCURRENT_PAGES
+        at a time.
+
+        :param callable get_page: function that takes the cloudapi client to
+            use and a page number, starting at 1, and returns the response
+            body of the page. Pages fetched concurrently are fetched with
+            copies of the client, which track their own last response.
+
+        :return: generator of the values of each page, in order of pages.
+        :rtype: Generator[List[dict], None, None]
+        """
+        response_body = get_page(self._cloudapi_client,
+                                 CSE_PAGINATION_FIRST_PAGE_NUMBER)
+        yield response_body['values']
+
+        page_count = response_body.get(PaginationKey.PAGE_COUNT.value)
+        if page_count is None:
+            # Keep going until an empty page is returned
+            page_num = CSE_PAGINATION_FIRST_PAGE_NUMBER
+            while len(response_body['values']) > 0:
+                page_num += 1
+                response_body = get_page(self._cloudapi_client, page_num)
+                yield response_body['values']
+            return
+
+        remaining_page_nums = range(CSE_PAGINATION_FIRST_PAGE_NUMBER + 1,
+                                    int(page_count) + 1)
+        for response_body in thread_utils.imap_concurrently(
+                lambda page_num: get_page(self._cloudapi_client.copy(),
+                                          page_num),
+                remaining_page_nums,
+                max_workers=def_constants.DEF_ENTITY_LIST_MAX_CONCURRENT_PAGES):  # noqa: E501
+            yield response_body['values']
 
     @handle_entity_service_exception
     def get_entities_per_page_by_entity_type(self, vendor: str, nss: str, version: str,  # noqa: E501
                                              filters: dict = None, page_number: int = CSE_PAGINATION_FIRST_PAGE_NUMBER,  # noqa: E501
-                                             page_size: int = CSE_PAGINATION_DEFAULT_PAGE_SIZE):  # noqa: E501
+                                             page_size: int = CSE_PAGINATION_DEFAULT_PAGE_SIZE,  # noqa: E501
+                                             summary_fields: list = None):
         """List all the entities per page and entity type.
 
         :param str vendor: entity type vendor name
@@ -169,6 +239,9 @@ class DefEntityService:
         :param dict filters: additional filters
         :param int page_number: page to return
         :param int page_size: number of records per page
+        :param list summary_fields: if set, the entities are returned as
+            cluster summaries with only these fields read, instead of being
+            parsed into DefEntity
         :rtype: Generator[(List[DefEntity], int), None, None]
         """
         filter_string = utils.construct_filter_string(filters)
@@ -184,7 +257,11 @@ class DefEntityService:
         result = {}
         entity_list: List[DefEntity] = []
         for v in response_body['values']:
-            entity_list.append(DefEntity(**v))
+            if summary_fields is not None:
+                entity_list.append(
+                    ClusterSummary.from_entity_body(v, summary_fields))
+            else:
+                entity_list.append(DefEntity(**v))
         result[PaginationKey.RESULT_TOTAL] = int(response_body['resultTotal'])
         result[PaginationKey.VALUES] = entity_list
         return result
@@ -204,25 +281,24 @@ class DefEntityService:
         """
         # TODO Yet to be verified. Waiting for the build from Extensibility
         #  team.
-        page_num = 0
-        while True:
-            page_num += 1
-            response_body = self._cloudapi_client.do_request(
+        def get_page(cloudapi_client, page_num):
+            return cloudapi_client.do_request(
                 method=RequestMethod.GET,
                 cloudapi_version=CloudApiVersion.VERSION_1_0_0,
                 resource_url_relative_path=f"{CloudApiResource.ENTITIES}/"
                                            f"{CloudApiResource.INTERFACES}/{vendor}/{nss}/{version}?"  # noqa: E501
                                            f"page={page_num}")
-            if len(response_body['values']) == 0:
-                break
-            for entity in response_body['values']:
+
+        for values in self._list_all_pages(get_page):
+            for entity in values:
                 yield DefEntity(**entity)
 
     def get_all_entities_per_page_by_interface(self, vendor: str, nss: str, version: str,  # noqa: E501
                                                filters: dict = None,
                                                page_number: int = CSE_PAGINATION_FIRST_PAGE_NUMBER,  # noqa: E501
                                                page_size: int = CSE_PAGINATION_DEFAULT_PAGE_SIZE, # noqa: E501
-                                               include_entity_type_ids: list = None):  # noqa: E501
+                                               include_entity_type_ids: list = None,  # noqa: E501
+                                               summary_fields: list = None):
         """Get a page of entities belonging to an interface.
 
         An interface is uniquely identified by properties vendor, nss and
@@ -235,6 +311,9 @@ class DefEntityService:
         :param int page_number:
         :param int page_size:
         :param list include_entity_type_ids: include entity types
+        :param list summary_fields: if set, the entities are returned as
+            cluster summaries with only these fields read, instead of being
+            parsed into GenericClusterEntity
 
         :return: Generator of entities of that interface type
         :rtype: Generator[List, None, None]
@@ -263,7 +342,11 @@ class DefEntityService:
         result = {}
         entity_list = []
         for entity in response_body['values']:
-            entity_list.append(GenericClusterEntity(**entity))
+            if summary_fields is not None:
+                entity_list.append(
+                    ClusterSummary.from_entity_body(entity, summary_fields))
+            else:
+                entity_list.append(GenericClusterEntity(**entity))
         result[PaginationKey.RESULT_TOTAL] = int(response_body['resultTotal'])
         result[PaginationKey.PAGE_COUNT] = int(response_body['pageCount'])
         result[PaginationKey.PAGE_NUMBER] = page_number
@@ -272,9 +355,8 @@ class DefEntityService:
         return result
 
     def _form_updated_entity(self, entity_id: str, changes: dict):
-        entity = self.get_entity(entity_id)
-        # get entity call updates _cloudapi_client headers to get etag
-        etag = self._cloudapi_client.get_last_response_etag()
+        response_body, etag = self._get_entity_response_body(entity_id)
+        entity = DefEntity(**response_body)
 
         # form updated RDE
         for attr_str, value in changes.items():
@@ -331,7 +413,9 @@ class DefEntityService:
         if api_at_least_36 and self._cloudapi_client.is_sys_admin and not invoke_hooks:  # noqa: E501
             resource_url_relative_path += f"?invokeHooks={str(invoke_hooks).lower()}"  # noqa: E501
 
-        for _ in range(server_constants.MAX_RDE_UPDATE_ATTEMPTS):
+        for attempt in range(server_constants.MAX_RDE_UPDATE_ATTEMPTS):
+            if attempt > 0:
+                _backoff_rde_update(entity_id, attempt)
             # get entity
             etag = ""
             if changes:
@@ -364,6 +448,7 @@ class DefEntityService:
             #   200 - xvcloud-task-location needs to be used
             try:
                 additional_request_headers = {"If-Match": etag} if api_at_least_36 else None  # noqa: E501
+                RDE_CACHE.invalidate(entity_id)
                 response_body, headers = self._cloudapi_client.do_request(
                     method=RequestMethod.PUT,
                     cloudapi_version=CloudApiVersion.VERSION_1_0_0,
@@ -373,6 +458,7 @@ class DefEntityService:
                     additional_request_headers=additional_request_headers
                 )
 
+                CLUSTER_INDEX.put(response_body)
                 def_entity = DefEntity(**response_body)
                 if is_request_async:
                     return def_entity, headers[HttpResponseHeader.X_VMWARE_VCLOUD_TASK_LOCATION.value]  # noqa: E501
@@ -392,12 +478,52 @@ class DefEntityService:
         :return: Details of the entity.
         :rtype: DefEntity
     """
-        response_body = self._cloudapi_client.do_request(
+        response_body, _ = self._get_entity_response_body(entity_id)
+        return DefEntity(**response_body)
+
+    def _get_entity_response_body(self, entity_id: str) -> Tuple[dict, Optional[str]]:  # noqa: E501
+        """Get the response body of an entity, along with its ETag.
+
+        For sysadmin, if the entity is in RDE_CACHE, the cached version is
+        used unless vCD reports that the entity has been modified since.
+        Tenants get what vCD shows them, which lacks the private parts of the
+        entity, so their reads are never cached.
+
+        :param str entity_id: Id of the entity.
+
+        :return: response body and ETag, which is None if vCD didn't
+            return one.
+        :rtype: tuple
+        """
+        is_cacheable = self._cloudapi_client.is_sys_admin
+        api_version = self._cloudapi_client.get_api_version()
+        cached_etag = None
+        if is_cacheable:
+            cached_etag = RDE_CACHE.get_etag(entity_id, api_version)
+        additional_request_headers = None
+        if cached_etag:
+            additional_request_headers = {'If-None-Match': cached_etag}
+        response_body, headers = self._cloudapi_client.do_request(
             method=RequestMethod.GET,
             cloudapi_version=CloudApiVersion.VERSION_1_0_0,
             resource_url_relative_path=f"{CloudApiResource.ENTITIES}/"
-                                       f"{entity_id}")
-        return DefEntity(**response_body)
+                                       f"{entity_id}",
+            additional_request_headers=additional_request_headers,
+            return_response_headers=True)
+        if response_body is None and cached_etag:
+            # 304 Not Modified
+            cached = RDE_CACHE.get_not_modified(entity_id, api_version,
+                                                cached_etag)
+            if cached is not None:
+                return cached
+            # Invalidated meanwhile, read the entity again
+            RDE_CACHE.invalidate(entity_id)
+            return self._get_entity_response_body(entity_id)
+
+        etag = headers.get(HttpResponseHeader.ETAG.value)
+        if etag and is_cacheable:
+            RDE_CACHE.put(entity_id, api_version, etag, response_body)
+        return response_body, etag
 
     @handle_entity_service_exception
     def get_tkg_or_def_entity(self, entity_id: str) -> DefEntity:
@@ -408,11 +534,7 @@ class DefEntityService:
         :return: Details of the entity.
         :rtype: DefEntity
         """
-        response_body = self._cloudapi_client.do_request(
-            method=RequestMethod.GET,
-            cloudapi_version=CloudApiVersion.VERSION_1_0_0,
-            resource_url_relative_path=f"{CloudApiResource.ENTITIES}/"
-                                       f"{entity_id}")
+        response_body, _ = self._get_entity_response_body(entity_id)
         entity: dict = response_body['entity']
         entity_kind: dict = entity['kind']
         if entity_kind in [shared_constants.ClusterEntityKind.NATIVE.value,
@@ -531,11 +653,13 @@ class DefEntityService:
         ):
             resource_url_relative_path += f"?invokeHooks={str(invoke_hooks).lower()}"  # noqa: E501
 
+        RDE_CACHE.invalidate(entity_id)
         response = self._cloudapi_client.do_request(
             method=RequestMethod.DELETE,
             cloudapi_version=CloudApiVersion.VERSION_1_0_0,
             resource_url_relative_path=resource_url_relative_path,  # noqa: E501
             return_response_headers=is_request_async)
+        CLUSTER_INDEX.remove(entity_id)
         if is_request_async:
             # if request is async, return the location header as well
             # TODO: Use the Http response status code to decide which
@@ -565,11 +689,13 @@ class DefEntityService:
         if vcd_api_version >= VCDApiVersion(vcd_client.ApiVersion.VERSION_36.value):  # noqa: E501
             resource_url_relative_path += "?invokeHooks=false"
 
+        RDE_CACHE.invalidate(entity_id)
         response = self._cloudapi_client.do_request(
             method=RequestMethod.DELETE,
             cloudapi_version=CloudApiVersion.VERSION_1_0_0,
             resource_url_relative_path=resource_url_relative_path,  # noqa: E501
             return_response_headers=is_request_async)
+        CLUSTER_INDEX.remove(entity_id)
         if is_request_async:
             return response[0], response[1][HttpResponseHeader.LOCATION.value]
         return response
@@ -589,6 +715,7 @@ class DefEntityService:
         if not entity_type_id:
             rde: DefEntity = self.get_entity(entity_id)
             entity_type_id = rde.entityType
+        RDE_CACHE.invalidate(entity_id)
         response_body = self._cloudapi_client.do_request(
             method=RequestMethod.POST,
             cloudapi_version=CloudApiVersion.VERSION_1_0_0,
@@ -596,6 +723,7 @@ class DefEntityService:
                                        f"{entity_id}/{CloudApiResource.ENTITY_RESOLVE}")  # noqa: E501
         msg = response_body[def_constants.DEF_ERROR_MESSAGE_KEY]
         del response_body[def_constants.DEF_ERROR_MESSAGE_KEY]
+        CLUSTER_INDEX.put(response_body, entity_type_id=entity_type_id)
         entity = DefEntity(entityType=entity_type_id, **response_body)
         # TODO: Just record the error message; revisit after HTTP response code
         # is good enough to decide if exception should be thrown or not
@@ -0,0 +1,176 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Buffer of changes to the RDEs of clusters, written to vCD in batches.
+
+Each update of the RDE of a cluster reads the entity, applies the changes,
+and writes it back with If-Match, retrying if the entity got modified in the
+meantime. Cluster operations can defer updates that nobody needs to see
+immediately: their changes are merged with the changes pending for the same
+entity, and written together by the next update that isn't deferred, when
+too many changes are pending, when the oldest pending change is too old, or
+when the operation completes.
+"""
+
+from collections import OrderedDict
+import threading
+import time
+from typing import Dict, Optional
+
+import container_service_extension.rde.constants as def_constants
+from container_service_extension.rde.models.common_models import DefEntity
+
+_stats_lock = threading.Lock()
+_num_updates = 0
+_num_deferred_updates = 0
+_num_writes = 0
+_num_discards = 0
+
+
+def _record_update(is_deferred):
+    global _num_updates, _num_deferred_updates
+    with _stats_lock:
+        _num_updates += 1
+        if is_deferred:
+            _num_deferred_updates += 1
+
+
+def _record_write():
+    global _num_writes
+    with _stats_lock:
+        _num_writes += 1
+
+
+def _record_discard():
+    global _num_discards
+    with _stats_lock:
+        _num_discards += 1
+
+
+class _PendingChanges:
+    def __init__(self):
+        # key of the changed field -> value, applied in order
+        self.changes = OrderedDict()
+        self.first_change_time: float = time.monotonic()
+
+    def merge(self, changes: dict):
+        for key, value in changes.items():
+            # Move the key to the end, so that the change still applies
+            # after earlier changes to a parent or child field
+            self.changes.pop(key, None)
+            self.changes[key] = value
+
+
+class EntityUpdateBuffer:
+    def __init__(self, entity_svc,
+                 max_delay=def_constants.RDE_UPDATE_BUFFER_MAX_DELAY_SEC,
+                 max_pending_changes=def_constants.RDE_UPDATE_BUFFER_MAX_PENDING_CHANGES):  # noqa: E501
+        """Create an empty buffer of entity updates.
+
+        :param DefEntityService entity_svc: entity service to update the
+            entities with.
+        :param int max_delay: max number of seconds a change is deferred.
+            Checked when an update is made, there is no background flush.
+        :param int max_pending_changes: max number of changes pending for an
+            entity.
+        """
+        self._entity_svc = entity_svc
+        self.max_delay = max_delay
+        self.max_pending_changes = max_pending_changes
+        self._lock = threading.Lock()
+        # Held while writing, so that batches are written in order
+        self._write_lock = threading.Lock()
+        self._pending: Dict[str, _PendingChanges] = {}
+
+    def update(self, entity_id: str, changes: dict,
+               defer=False) -> Optional[DefEntity]:
+        """Update an entity, or defer the update.
+
+        :param str entity_id: id of the entity.
+        :param dict changes: dictionary of changes for the rde. The key
+            indicates the field updated, e.g. 'entity.status'. The value
+            indicates the value for this field.
+        :param bool defer: True to hold back the changes, unless the pending
+            changes of the entity are due to be written.
+
+        :return: the updated entity, or None if the update was deferred.
+        :rtype: DefEntity
+        """
+        _record_update(defer)
+        with self._lock:
+            pending = self._pending.get(entity_id)
+            if pending is None:
+                pending = _PendingChanges()
+                self._pending[entity_id] = pending
+            pending.merge(changes)
+            if defer and not self._is_due(pending):
+                return None
+        return self.flush(entity_id)
+
+    def flush(self, entity_id: str) -> Optional[DefEntity]:
+        """Write the pending changes of an entity.
+
+        :param str entity_id: id of the entity.
+
+        :return: the updated entity, or None if no change was pending.
+        :rtype: DefEntity
+
+        :raises Exception: if the write failed, the changes are then still
+            pending.
+        """
+        with self._write_lock:
+            with self._lock:
+                pending = self._pending.pop(entity_id, None)
+            if pending is None:
+                return None
+            _record_write()
+            try:
+                return self._entity_svc.update_entity(
+                    entity_id, invoke_hooks=False,
+                    changes=dict(pending.changes))
+            except Exception:
+                # Keep the changes for the next write. Changes made in the
+                # meantime are newer, so they are applied last.
+                with self._lock:
+                    newer_pending = self._pending.get(entity_id)
+                    if newer_pending is not None:
+                        pending.merge(newer_pending.changes)
+                    self._pending[entity_id] = pending
+                raise
+
+    def flush_all(self):
+        """Write the pending changes of all entities."""
+        with self._lock:
+            entity_ids = list(self._pending)
+        for entity_id in entity_ids:
+            self.flush(entity_id)
+
+    def discard(self, entity_id: str):
+        """Drop the pending changes of an entity, e.g. before deleting it.
+
+        :param str entity_id: id of the entity.
+        """
+        with self._lock:
+            if self._pending.pop(entity_id, None) is not None:
+                _record_discard()
+
+    def _is_due(self, pending: _PendingChanges):
+        return len(pending.changes) >= self.max_pending_changes or \
+            time.monotonic() - pending.first_change_time >= self.max_delay
+
+
+def get_stats():
+    """Return update and write counters of all entity update buffers.
+
+    :rtype: dict
+    """
+    with _stats_lock:
+        return {
+            'updates': _num_updates,
+            'deferred_updates': _num_deferred_updates,
+            'writes': _num_writes,
+            'discards': _num_discards,
+            # Updates merged into the write of another update
+            'coalesced_updates': max(_num_updates - _num_writes, 0)
+        }
@@ -0,0 +1,122 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Cache of defined entities (RDEs) read by CSE server, along with ETags.
+
+Cluster operations read the RDE of the cluster many times, and each read
+downloads and parses the whole entity, including the kubeconfig. The cache
+remembers the last version of each entity read, so that reads can be
+revalidated with If-None-Match: vCD answers 304 Not Modified if the entity
+didn't change, and the cached version is used.
+
+Only reads made by sysadmin are cached: vCD hides the private parts of the
+status of an entity, such as the kubeconfig, from other users, so the
+version of an entity read by a tenant must not be handed to sysadmin, and the
+other way round. Reads are always revalidated. Entities modified or deleted
+by CSE server are evicted from the cache.
+"""
+
+from collections import OrderedDict
+from copy import deepcopy
+from threading import Lock
+from typing import Optional, Tuple
+
+import container_service_extension.rde.constants as def_constants
+
+
+class RdeCache:
+    def __init__(self, max_size):
+        """Create a cache of entities.
+
+        :param int max_size: max number of entities to remember.
+        """
+        self.max_size = max_size
+        self._lock = Lock()
+        # (entity id, api version) -> (etag, response body), least recently
+        # used first
+        self._entries = OrderedDict()
+        self._num_revalidations = 0
+        self._num_not_modified = 0
+        self._num_invalidations = 0
+
+    def get_etag(self, entity_id, api_version) -> Optional[str]:
+        """Return the ETag of the cached version of an entity.
+
+        :param str entity_id: id of the entity.
+        :param str api_version: api version the entity was read at.
+
+        :return: ETag, or None if the entity isn't cached.
+        :rtype: str
+        """
+        key = (entity_id, api_version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self._num_revalidations += 1
+            return entry[0]
+
+    def get_not_modified(self, entity_id, api_version,
+                         etag) -> Optional[Tuple[dict, str]]:
+        """Return the cached version of an entity that vCD didn't modify.
+
+        :param str entity_id: id of the entity.
+        :param str api_version: api version the entity was read at.
+        :param str etag: ETag sent in If-None-Match.
+
+        :return: a copy of the response body of the entity and its ETag, or
+            None if the cached version has changed since.
+        :rtype: tuple
+        """
+        with self._lock:
+            entry = self._entries.get((entity_id, api_version))
+            if entry is None or entry[0] != etag:
+                return None
+            self._num_not_modified += 1
+        # Callers may modify the entity
+        return deepcopy(entry[1]), entry[0]
+
+    def put(self, entity_id, api_version, etag, response_body: dict):
+        """Cache the version of an entity returned by vCD.
+
+        :param str entity_id: id of the entity.
+        :param str api_version: api version the entity was read at.
+        :param str etag: ETag of the entity.
+        :param dict response_body: response body of the entity.
+        """
+        key = (entity_id, api_version)
+        response_body = deepcopy(response_body)
+        with self._lock:
+            self._entries[key] = (etag, response_body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, entity_id):
+        """Forget an entity, at all api versions.
+
+        :param str entity_id: id of the entity.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == entity_id]
+            for key in keys:
+                del self._entries[key]
+            self._num_invalidations += len(keys)
+
+    def get_stats(self):
+        """Return cache size, revalidation and invalidation counters.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'entities_cached': len(self._entries),
+                'revalidations': self._num_revalidations,
+                'not_modified': self._num_not_modified,
+                'invalidations': self._num_invalidations
+            }
+
+
+RDE_CACHE = RdeCache(max_size=def_constants.RDE_CACHE_MAX_SIZE)
@@ -23,6 +23,17 @@ DEF_API_MIN_VERSION = VCDApiVersion('35.0')
 DEF_SCHEMA_DIRECTORY = 'cse_def_schema'
 DEF_ERROR_MESSAGE_KEY = 'message'
 DEF_RESOLVED_STATE = 'RESOLVED'
+# Max number of pages of entities fetched concurrently by list operations
+DEF_ENTITY_LIST_MAX_CONCURRENT_PAGES = 4
+# Max number of entities, with their ETag, cached by CSE server
+RDE_CACHE_MAX_SIZE = 500
+# Max number of seconds, and max number of changes, deferred RDE updates of
+# a cluster operation are held back before being written to vCD
+RDE_UPDATE_BUFFER_MAX_DELAY_SEC = 10
+RDE_UPDATE_BUFFER_MAX_PENDING_CHANGES = 20
+# Number of refresh intervals after which the in-memory index of clusters is
+# too stale to answer list queries, if reconciliations keep failing
+CLUSTER_INDEX_MAX_STALENESS_REFRESH_INTERVALS = 2
 
 PAYLOAD_VERSION_PREFIX = 'cse.vmware.com/'
 PAYLOAD_VERSION_2_0 = PAYLOAD_VERSION_PREFIX + 'v2.0'
@@ -16,6 +16,7 @@ from container_service_extension.rde.constants import \
     CapvcdRDEVersion, DEF_ENTITY_TYPE_ID_PREFIX, DEF_INTERFACE_ID_PREFIX, \
     Nss, RDEMetadataKey, RDEVersion, RuntimeRDEVersion, SchemaFile, Vendor
 from container_service_extension.rde.models.abstractNativeEntity import AbstractNativeEntity  # noqa: E501
+import container_service_extension.rde.models.compiled_serializers as compiled_serializers  # noqa: E501
 from container_service_extension.rde.models.rde_factory import get_rde_model
 from container_service_extension.rde.utils import load_rde_schema
 
@@ -333,6 +334,134 @@ class TKGEntity:
             if isinstance(metadata, dict) else metadata
 
 
+def _get_entity_property(entity_body: dict, *keys):
+    """Return a nested property of the entity of a defined entity.
+
+    :param dict entity_body: response body of the defined entity
+    :param keys: path of the property in the entity
+
+    :return: value of the property, or None if any part of it is missing
+    """
+    value = entity_body.get('entity')
+    for key in keys:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _get_cluster_summary_vdc(entity_body: dict):
+    # virtualDataCenterName for native clusters >= 2.0 and TKG clusters,
+    # ovdc_name for native clusters 1.0
+    vdc = _get_entity_property(entity_body, 'metadata',
+                               'virtualDataCenterName')
+    if vdc is None:
+        vdc = _get_entity_property(entity_body, 'metadata', 'ovdc_name')
+    return vdc
+
+
+def _get_cluster_summary_version(entity_body: dict):
+    if _get_entity_property(entity_body, 'kind') == \
+            shared_constants.ClusterEntityKind.TKG_S.value:
+        return _get_entity_property(entity_body, 'spec', 'distribution',
+                                    'version')
+    return _get_entity_property(entity_body, 'status', 'kubernetes')
+
+
+# Cluster summary field -> function reading it from a defined entity
+_CLUSTER_SUMMARY_FIELD_GETTERS = {
+    shared_constants.ClusterSummaryField.ID.value:
+        lambda entity_body: entity_body.get('id'),
+    shared_constants.ClusterSummaryField.NAME.value:
+        lambda entity_body: entity_body.get('name'),
+    shared_constants.ClusterSummaryField.ORG.value:
+        lambda entity_body: (entity_body.get('org') or {}).get('name'),
+    shared_constants.ClusterSummaryField.OWNER.value:
+        lambda entity_body: (entity_body.get('owner') or {}).get('name'),
+    shared_constants.ClusterSummaryField.VDC.value: _get_cluster_summary_vdc,
+    shared_constants.ClusterSummaryField.KIND.value:
+        lambda entity_body: _get_entity_property(entity_body, 'kind'),
+    shared_constants.ClusterSummaryField.VERSION.value:
+        _get_cluster_summary_version,
+    shared_constants.ClusterSummaryField.PHASE.value:
+        lambda entity_body: _get_entity_property(entity_body, 'status',
+                                                 'phase'),
+    shared_constants.ClusterSummaryField.ENTITY_TYPE.value:
+        lambda entity_body: entity_body.get('entityType'),
+}
+
+
+@dataclass()
+class ClusterSummary:
+    """Properties of a cluster shown by cluster list.
+
+    The summary is read straight from the response body of the defined
+    entity of a native or TKG cluster. Unlike DefEntity and
+    GenericClusterEntity, the entity isn't parsed into a model: only the
+    requested fields are read, and the spec, nodes and private properties
+    (e.g. kubeconfig) of the cluster are never decoded.
+    """
+
+    id: Optional[str] = None
+    name: Optional[str] = None
+    org: Optional[str] = None
+    owner: Optional[str] = None
+    vdc: Optional[str] = None
+    kind: Optional[str] = None
+    version: Optional[str] = None
+    phase: Optional[str] = None
+    entityType: Optional[str] = None
+
+    @classmethod
+    def from_entity_body(cls, entity_body: dict, fields: list = None):
+        """Read the summary of a cluster from its defined entity.
+
+        :param dict entity_body: response body of the defined entity
+        :param list fields: names of the fields to read, all fields if None.
+            The other fields are left to None.
+
+        :rtype: ClusterSummary
+        """
+        if fields is None:
+            fields = _CLUSTER_SUMMARY_FIELD_GETTERS.keys()
+        return cls(**{field: _CLUSTER_SUMMARY_FIELD_GETTERS[field](entity_body)  # noqa: E501
+                      for field in fields})
+
+    def to_dict(self, fields: list = None) -> dict:
+        """Return the summary as a dict.
+
+        :param list fields: names of the fields to include, all fields if
+            None.
+
+        :rtype: dict
+        """
+        if fields is None:
+            fields = _CLUSTER_SUMMARY_FIELD_GETTERS.keys()
+        return {field: getattr(self, field) for field in fields}
+
+    @staticmethod
+    def parse_fields(fields_param: str) -> list:
+        """Parse the fields query parameter of a cluster list request.
+
+        :param str fields_param: comma separated names of summary fields
+
+        :return: names of the fields, in order, without duplicates
+        :rtype: list
+
+        :raises ValueError: if a field name is unknown
+        """
+        fields = []
+        for field in fields_param.split(','):
+            field = field.strip()
+            if field not in _CLUSTER_SUMMARY_FIELD_GETTERS:
+                raise ValueError(
+                    f"Invalid cluster field '{field}', valid fields are: "
+                    f"{', '.join(_CLUSTER_SUMMARY_FIELD_GETTERS)}")
+            if field not in fields:
+                fields.append(field)
+        return fields
+
+
 @unique
 class K8Interface(Enum):
     VCD_INTERFACE = DefInterface(
@@ -443,3 +572,6 @@ MAP_RDE_VERSION_TO_ITS_METADATA = {
         RDEMetadataKey.ENTITY_TYPE: EntityType.CAPVCD_ENTITY_TYPE_1_0_0.value,
     },
 }
+
+
+compiled_serializers.install_serializers(__name__)
@@ -0,0 +1,304 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Serializers of RDE models, generated when the models are imported.
+
+dataclasses_json inspects the fields, type hints and letter case overrides of
+a class every time one of its instances is converted from or to a dict. RDEs
+are converted for every entity listed, read or updated, so for each model
+class this module generates to_dict() and from_dict() functions with all of
+that resolved once, and replaces the methods added by dataclasses_json.
+
+The generated functions produce the same output as dataclasses_json. Only
+field types whose decoding is well understood are compiled; classes with any
+other field type, or with field level overrides, keep the dataclasses_json
+methods. Inputs the generated functions aren't sure about (unexpected value
+types, missing required fields, None for a non-optional field, etc.) are
+handed over to dataclasses_json as well, so that errors and warnings are
+unchanged.
+"""
+
+from dataclasses import fields, is_dataclass, MISSING
+import sys
+import typing
+
+try:
+    from dataclasses_json import cfg as dataclasses_json_cfg
+    from dataclasses_json import DataClassJsonMixin
+    from dataclasses_json.core import _asdict, _decode_dataclass, \
+        _user_overrides_or_exts
+except ImportError:  # pragma: no cover
+    _asdict = None
+
+from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER  # noqa: E501
+
+# Types whose instances are returned as is by dataclasses_json
+_IMMUTABLE_SCALAR_TYPES = frozenset([str, int, float, bool, type(None)])
+# Field types whose values are returned as is if they are of the right type.
+# Versions of dataclasses_json differ on what happens otherwise, so such
+# values are left to dataclasses_json.
+_SCALAR_TYPES = (str, int, float, bool)
+
+# model class -> generated to_dict function
+_ENCODERS = {}
+# model class -> generated from_dict function
+_DECODERS = {}
+
+
+class _Fallback(Exception):
+    """Raised when dataclasses_json must decode the input instead."""
+
+
+class _UnsupportedModel(Exception):
+    """Raised when no serializer can be generated for a model class."""
+
+
+def _fallback():
+    raise _Fallback()
+
+
+def _encode_value(value):
+    """Convert a field value to its dict representation, like _asdict."""
+    value_type = type(value)
+    if value_type in _IMMUTABLE_SCALAR_TYPES:
+        return value
+    encoder = _ENCODERS.get(value_type)
+    if encoder is not None:
+        return encoder(value)
+    if value_type is list:
+        return [_encode_value(item) for item in value]
+    if value_type is dict:
+        return {_encode_value(k): _encode_value(v) for k, v in value.items()}
+    return _asdict(value)
+
+
+def _get_optional_arg(field_type):
+    """Return X for Optional[X], None if the type isn't Optional."""
+    if getattr(field_type, '__origin__', None) is typing.Union:
+        args = field_type.__args__
+        if len(args) == 2 and type(None) in args:
+            return args[0] if args[1] is type(None) else args[1]
+    return None
+
+
+def _get_item_decoder(item_type, namespace):
+    """Return the expression decoding an item of a list named 'item'."""
+    if item_type in _SCALAR_TYPES:
+        name = f"_t_{item_type.__name__}"
+        namespace[name] = item_type
+        return f"(item if isinstance(item, {name}) else _fallback())"
+    if is_dataclass(item_type):
+        name = f"_decode_{id(item_type)}"
+        namespace[name] = _get_dataclass_decoder(item_type)
+        return f"{name}(item)"
+    raise _UnsupportedModel(f"list of {item_type}")
+
+
+def _get_dataclass_decoder(cls):
+    """Return a function decoding a nested instance, like _decode_dataclass."""
+    def decode(value):
+        if type(value) is dict:
+            decoder = _DECODERS.get(cls)
+            if decoder is not None:
+                return decoder(value)
+            return _decode_dataclass(cls, value, False)
+        if isinstance(value, cls):
+            return value
+        raise _Fallback()
+    return decode
+
+
+def _get_value_decoder(field_type, var, namespace):
+    """Return the lines of code decoding the value of a field, in place.
+
+    :param type field_type: resolved type hint of the field.
+    :param str var: name of the variable holding the value.
+    :param dict namespace: globals of the generated code, updated with the
+        objects the code refers to.
+
+    :rtype: list
+    """
+    if field_type is typing.Any:
+        return []
+    if field_type in _SCALAR_TYPES:
+        name = f"_t_{field_type.__name__}"
+        namespace[name] = field_type
+        return [f"if not isinstance({var}, {name}):",
+                "    raise _Fallback()"]
+    if is_dataclass(field_type):
+        name = f"_decode_{id(field_type)}"
+        namespace[name] = _get_dataclass_decoder(field_type)
+        return [f"{var} = {name}({var})"]
+    origin = getattr(field_type, '__origin__', None)
+    args = getattr(field_type, '__args__', None) or ()
+    if origin is list and len(args) == 1:
+        item_decoder = "item" if args[0] is typing.Any \
+            else _get_item_decoder(args[0], namespace)
+        return [f"if type({var}) is not list:",
+                "    raise _Fallback()",
+                f"{var} = [{item_decoder} for item in {var}]"]
+    if field_type is dict or (origin is dict
+                              and args == (str, typing.Any)):
+        return [f"if type({var}) is not dict:",
+                "    raise _Fallback()",
+                f"{var} = dict({var})"]
+    if origin is None and isinstance(field_type, type) and \
+            field_type.__module__ not in ('builtins', 'datetime', 'decimal',
+                                          'uuid', 'typing', 'enum') and \
+            not issubclass(field_type, (list, dict, tuple, set)):
+        # Plain classes, e.g. AbstractNativeEntity, are passed through
+        return []
+    raise _UnsupportedModel(f"field type {field_type}")
+
+
+def _generate_decoder(cls, type_hints, overrides):
+    namespace = {
+        '_Fallback': _Fallback,
+        '_fallback': _fallback,
+        '_MISSING': MISSING,
+        '_cls': cls,
+    }
+    lines = ["def from_dict(kvs):", "    init_kwargs = {}"]
+    for index, field in enumerate(fields(cls)):
+        if not field.init:
+            continue
+        var = f"v{index}"
+        letter_case = overrides[field.name].letter_case
+        json_key = letter_case(field.name) if letter_case else field.name
+        lines.append(f"    {var} = kvs.get({json_key!r}, _MISSING)")
+        if json_key != field.name:
+            # dataclasses_json accepts the field name as well, the key
+            # that comes last wins
+            lines += [f"    if {var} is _MISSING:",
+                      f"        {var} = kvs.get({field.name!r}, _MISSING)",
+                      f"    elif {field.name!r} in kvs:",
+                      "        raise _Fallback()"]
+        lines.append(f"    if {var} is _MISSING:")
+        if field.default is not MISSING:
+            namespace[f"_default_{index}"] = field.default
+            lines.append(f"        {var} = _default_{index}")
+        elif field.default_factory is not MISSING:
+            namespace[f"_default_factory_{index}"] = field.default_factory
+            lines.append(f"        {var} = _default_factory_{index}()")
+        else:
+            lines.append("        raise _Fallback()")
+
+        field_type = type_hints[field.name]
+        optional_arg = _get_optional_arg(field_type)
+        if optional_arg is not None:
+            decoder_lines = _get_value_decoder(optional_arg, var, namespace)
+            if decoder_lines:
+                lines.append(f"    if {var} is not None:")
+                lines += [f"        {line}" for line in decoder_lines]
+        else:
+            decoder_lines = _get_value_decoder(field_type, var, namespace)
+            if field_type is not typing.Any:
+                # dataclasses_json warns about None in non-optional fields
+                lines += [f"    if {var} is None:",
+                          "        raise _Fallback()"]
+            lines += [f"    {line}" for line in decoder_lines]
+        lines.append(f"    init_kwargs[{field.name!r}] = {var}")
+    lines.append("    return _cls(**init_kwargs)")
+    exec("\n".join(lines), namespace)
+    return namespace['from_dict']
+
+
+def _generate_encoder(cls, overrides):
+    namespace = {
+        '_encode_value': _encode_value,
+        '_immutable_types': _IMMUTABLE_SCALAR_TYPES,
+    }
+    lines = ["def to_dict(obj):", "    result = {}"]
+    json_keys = set()
+    for field in fields(cls):
+        letter_case = overrides[field.name].letter_case
+        json_key = letter_case(field.name) if letter_case else field.name
+        if json_key in json_keys:
+            raise _UnsupportedModel(f"duplicate key {json_key}")
+        json_keys.add(json_key)
+        lines += [f"    value = obj.{field.name}",
+                  f"    result[{json_key!r}] = value "
+                  f"if value.__class__ in _immutable_types "
+                  f"else _encode_value(value)"]
+    lines.append("    return result")
+    exec("\n".join(lines), namespace)
+    return namespace['to_dict']
+
+
+def _check_overrides(cls, overrides):
+    config = getattr(cls, 'dataclass_json_config', None) or {}
+    # Undefined.EXCLUDE only drops unknown keys, which the generated
+    # decoder ignores anyway
+    undefined = config.get('undefined')
+    if undefined is not None and getattr(undefined, 'name', None) != 'EXCLUDE':  # noqa: E501
+        raise _UnsupportedModel(f"undefined parameters {undefined}")
+    for field in fields(cls):
+        override = overrides[field.name]
+        if override.encoder or override.decoder or override.exclude or \
+                override.mm_field:
+            raise _UnsupportedModel(f"overrides of field {field.name}")
+
+
+def _compile_model(cls):
+    overrides = _user_overrides_or_exts(cls)
+    _check_overrides(cls, overrides)
+    type_hints = typing.get_type_hints(cls)
+    decoder = _generate_decoder(cls, type_hints, overrides)
+    encoder = _generate_encoder(cls, overrides)
+
+    def from_dict(model_cls, kvs, *, infer_missing=False):
+        if model_cls is cls and type(kvs) is dict and not infer_missing \
+                and not dataclasses_json_cfg.global_config.decoders:
+            try:
+                return decoder(kvs)
+            except _Fallback:
+                pass
+        return _decode_dataclass(model_cls, kvs, infer_missing)
+
+    def to_dict(self, encode_json=False):
+        if type(self) is cls and not encode_json \
+                and not dataclasses_json_cfg.global_config.encoders:
+            return encoder(self)
+        return _asdict(self, encode_json=encode_json)
+
+    cls.from_dict = classmethod(from_dict)
+    cls.to_dict = to_dict
+    return decoder, encoder
+
+
+def install_serializers(module_name):
+    """Replace the dataclasses_json methods of the models of a module.
+
+    Must be called at the end of the module, once all its models are
+    defined.
+
+    :param str module_name: name of the module, i.e. __name__.
+    """
+    if _asdict is None:
+        return
+    module = sys.modules[module_name]
+    for cls in list(vars(module).values()):
+        if not isinstance(cls, type) or cls.__module__ != module_name or \
+                not is_dataclass(cls) or \
+                vars(cls).get('to_dict') is not DataClassJsonMixin.to_dict:
+            continue
+        try:
+            decoder, encoder = _compile_model(cls)
+        except _UnsupportedModel as err:
+            LOGGER.debug(f"Not compiling serializers of {cls.__name__}: "
+                         f"{err}")
+            continue
+        _DECODERS[cls] = decoder
+        _ENCODERS[cls] = encoder
+
+
+def get_slow_serializers():
+    """Return the dataclasses_json functions the generated ones replace.
+
+    :return: functions converting a model instance to a dict, and a dict to
+        a model instance of a given class.
+    :rtype: tuple
+    """
+    return (lambda obj: _asdict(obj, encode_json=False),
+            lambda cls, kvs: _decode_dataclass(cls, kvs, False))
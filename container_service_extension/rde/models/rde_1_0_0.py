@@ -11,6 +11,7 @@ import yaml
 import container_service_extension.common.constants.server_constants as server_constants  # noqa: E501
 import container_service_extension.common.constants.shared_constants as shared_constants  # noqa: E501
 from container_service_extension.rde.models.abstractNativeEntity import AbstractNativeEntity  # noqa: E501
+import container_service_extension.rde.models.compiled_serializers as compiled_serializers  # noqa: E501
 import container_service_extension.rde.models.rde_2_1_0 as rde_2_1_0
 
 
@@ -493,3 +494,6 @@ class NativeEntity(AbstractNativeEntity):
 
         sample_apply_spec = yaml.dump(native_entity_dict)
         return cluster_spec_field_descriptions + sample_apply_spec
+
+
+compiled_serializers.install_serializers(__name__)
@@ -12,6 +12,7 @@ import container_service_extension.common.constants.server_constants as server_c
 import container_service_extension.common.constants.shared_constants as shared_constants  # noqa: E501
 import container_service_extension.rde.constants as rde_constants
 from container_service_extension.rde.models.abstractNativeEntity import AbstractNativeEntity  # noqa: E501
+import container_service_extension.rde.models.compiled_serializers as compiled_serializers  # noqa: E501
 import container_service_extension.rde.models.rde_1_0_0 as rde_1_0_0
 
 
@@ -748,3 +749,6 @@ class NativeEntity(AbstractNativeEntity):
 
         sample_apply_spec = yaml.dump(native_entity_dict)
         return cluster_spec_field_descriptions + sample_apply_spec
+
+
+compiled_serializers.install_serializers(__name__)
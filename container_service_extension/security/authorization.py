@@ -10,6 +10,16 @@ from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER
 import container_service_extension.server.abstract_broker as abstract_broker
 
 
+def _get_missing_rights(required_rights, user_rights):
+    missing_rights = []
+    for right_name in required_rights:
+        right_name_with_namespace = \
+            f"{{{CSE_SERVICE_NAMESPACE}}}:{right_name}"
+        if right_name_with_namespace not in user_rights:
+            missing_rights.append(right_name_with_namespace)
+    return missing_rights
+
+
 def secure(required_rights=None):
     """Secure methods against unauthorized access using this decorator.
 
@@ -35,13 +45,14 @@ def secure(required_rights=None):
                     and len(required_rights) > 0):
                 class_instance: abstract_broker.AbstractBroker = args[0]
                 user_rights = class_instance.context.user.rights
-
-                missing_rights = []
-                for right_name in required_rights:
-                    right_name_with_namespace = \
-                        f"{{{CSE_SERVICE_NAMESPACE}}}:{right_name}"
-                    if right_name_with_namespace not in user_rights:
-                        missing_rights.append(right_name_with_namespace)
+                missing_rights = _get_missing_rights(required_rights,
+                                                     user_rights)
+                if len(missing_rights) > 0:
+                    # Rights of the user are cached, the missing rights may
+                    # have been granted since
+                    user_rights = class_instance.context.user.refresh_rights()  # noqa: E501
+                    missing_rights = _get_missing_rights(required_rights,
+                                                         user_rights)
 
                 if len(missing_rights) > 0:
                     LOGGER.debug(f"Authorization failed for user "
@@ -4,9 +4,16 @@
 
 from typing import Dict, Optional
 
+import container_service_extension.common.utils.deadline_utils as deadline_utils  # noqa: E501
 import container_service_extension.common.utils.pyvcloud_utils as vcd_utils
 import container_service_extension.common.utils.server_utils as server_utils
+from container_service_extension.exception.exceptions import \
+    RequestTimeoutError
 import container_service_extension.logging.logger as logger
+from container_service_extension.security.context.sysadmin_session_pool import PooledSysadminSession  # noqa: E501
+from container_service_extension.security.context.sysadmin_session_pool import SYSADMIN_SESSION_POOL  # noqa: E501
+from container_service_extension.security.context.tenant_session_cache import TENANT_SESSION_CACHE  # noqa: E501
+from container_service_extension.security.context.tenant_session_cache import TenantSession  # noqa: E501
 import container_service_extension.security.context.user_context as user_context  # noqa: E501
 
 
@@ -15,7 +22,8 @@ class OperationContext:
             self,
             auth_token: str,
             request_id: Optional[str] = None,
-            mqtt_publisher=None
+            mqtt_publisher=None,
+            deadline: Optional[deadline_utils.RequestDeadline] = None
     ):
         self._auth_token: str = auth_token
         # Request ID; may be None if OperationContext is initialized outside of
@@ -27,16 +35,42 @@ class OperationContext:
         # by the vCD and pyvcloud
         self._user_context_map: Dict[Optional[str], user_context.UserContext] = {}  # noqa: E501
 
+        # map for storing the cached sessions the user's contexts were
+        # created from, see TenantSessionCache
+        self._tenant_session_map: Dict[Optional[str], TenantSession] = {}
+
         # map for storing sys admin user's context at different api versions
         # `None` key maps to the client at the highest api version supported
         # by the vCD and pyvcloud
         self._sysadmin_user_context_map: Dict[Optional[str], user_context.UserContext] = {}  # noqa: E501
 
+        # map for storing the pooled sessions the sys admin user's contexts
+        # were created from, they are returned to the pool by end()
+        self._sysadmin_session_map: Dict[Optional[str], PooledSysadminSession] = {}  # noqa: E501
+
         # async operations should call end() when they are finished
-        self.is_async: bool = False
+        self._is_async: bool = False
 
         self.mqtt_publisher = mqtt_publisher
 
+        # Outbound calls to VCD time out at the deadline of the request. The
+        # deadline is cleared once the request has been replied to, so that
+        # async operations can outlive it.
+        self._deadline: Optional[deadline_utils.RequestDeadline] = deadline
+
+    @property
+    def is_async(self) -> bool:
+        return self._is_async
+
+    @is_async.setter
+    def is_async(self, is_async: bool):
+        # Async operations hold their sysadmin sessions until end(), so the
+        # sessions must not count against the cap of the pool
+        self._is_async = is_async
+        if is_async:
+            for pooled_session in self._sysadmin_session_map.values():
+                SYSADMIN_SESSION_POOL.detach(pooled_session)
+
     @property
     def client(self):
         return self.user.client
@@ -75,6 +109,30 @@ class OperationContext:
     def get_sysadmin_cloudapi_client(self, api_version: Optional[str]):
         return self.get_sysadmin_user_context(api_version).cloud_api_client
 
+    def get_remaining_time(self) -> Optional[float]:
+        """Return number of seconds left until the deadline of the request.
+
+        :return: remaining time, or None if the request has no deadline.
+
+        :raises RequestTimeoutError: if the deadline has passed.
+        """
+        deadline = self._deadline
+        if deadline is None:
+            return None
+        remaining_time = deadline.get_remaining_time()
+        if remaining_time <= 0:
+            raise RequestTimeoutError(
+                error_message=f"Request did not finish within "
+                              f"{deadline.timeout} seconds")
+        return remaining_time
+
+    def is_past_deadline(self) -> bool:
+        deadline = self._deadline
+        return deadline is not None and deadline.has_passed()
+
+    def clear_deadline(self):
+        self._deadline = None
+
     def get_user_context(self, api_version: Optional[str]):
         if api_version not in self._user_context_map:
             self._update_user_context_map(api_version=api_version)
@@ -86,10 +144,25 @@ class OperationContext:
         return self._sysadmin_user_context_map[api_version]
 
     def _update_user_context_map(self, api_version: Optional[str]):
-        _client = vcd_utils.connect_vcd_user_via_token(
-            tenant_auth_token=self._auth_token,
-            api_version=api_version
-        )
+        # Skip the login round trip if the session of the token is cached
+        tenant_session = TENANT_SESSION_CACHE.get(self._auth_token,
+                                                  api_version)
+        if tenant_session is not None:
+            _client = vcd_utils.connect_vcd_user_via_session(
+                tenant_auth_token=self._auth_token,
+                api_version=api_version,
+                vcloud_session=tenant_session.vcloud_session,
+                vcloud_auth_token=tenant_session.vcloud_auth_token
+            )
+        else:
+            _client = vcd_utils.connect_vcd_user_via_token(
+                tenant_auth_token=self._auth_token,
+                api_version=api_version
+            )
+            tenant_session = TENANT_SESSION_CACHE.put(
+                self._auth_token, api_version, _client)
+        deadline_utils.mount_deadline_adapter(
+            _client._session, self.get_remaining_time)
 
         log_wire = server_utils.get_server_runtime_config().get_value_at('service.log_wire')  # noqa: E501
         logger_wire = logger.NULL_LOGGER
@@ -98,15 +171,25 @@ class OperationContext:
         _cloudapi_client = vcd_utils.get_cloudapi_client_from_vcd_client(
             client=_client,
             logger_debug=logger.SERVER_LOGGER,
-            logger_wire=logger_wire)
+            logger_wire=logger_wire,
+            timeout_provider=self.get_remaining_time)
 
         _user_context = user_context.UserContext(
-            client=_client, cloud_api_client=_cloudapi_client)
+            client=_client, cloud_api_client=_cloudapi_client,
+            org_href=None if tenant_session is None
+            else tenant_session.org_href)
         self._user_context_map[api_version] = _user_context
+        if tenant_session is not None:
+            self._tenant_session_map[api_version] = tenant_session
 
     def _update_sysadmin_user_context_map(self, api_version: Optional[str]):
-        _sysadmin_client = vcd_utils.get_sys_admin_client(
-            api_version=api_version)
+        pooled_session = SYSADMIN_SESSION_POOL.borrow(
+            api_version, timeout=self.get_remaining_time(),
+            is_detached=self._is_async)
+        self._sysadmin_session_map[api_version] = pooled_session
+        pooled_session.deadline_adapter.set_timeout_provider(
+            self.get_remaining_time)
+        _sysadmin_client = pooled_session.client
 
         log_wire = server_utils.get_server_runtime_config().get_value_at('service.log_wire')  # noqa: E501
         logger_wire = logger.NULL_LOGGER
@@ -116,23 +199,36 @@ class OperationContext:
             vcd_utils.get_cloudapi_client_from_vcd_client(
                 client=_sysadmin_client,
                 logger_debug=logger.SERVER_LOGGER,
-                logger_wire=logger_wire)
+                logger_wire=logger_wire,
+                timeout_provider=self.get_remaining_time)
 
         _sysadmin_user_context = user_context.UserContext(
             client=_sysadmin_client,
             cloud_api_client=_sysadmin_cloudapi_client)
         self._sysadmin_user_context_map[api_version] = _sysadmin_user_context
 
+    def discard_cached_sessions(self):
+        """Forget the cached sessions of the user.
+
+        Should be called when vCD rejects a session with 401 Unauthorized.
+        Most likely, vCD rejected the token of the user, so the sys admin
+        sessions are only checked when they are returned to the pool.
+        """
+        TENANT_SESSION_CACHE.evict(self._auth_token)
+        self._tenant_session_map.clear()
+        for pooled_session in self._sysadmin_session_map.values():
+            pooled_session.needs_check = True
+
     def end(self):
-        for api_version, sysadmin_user_context in \
-                self._sysadmin_user_context_map.items():
-            try:
-                sysadmin_user_context.client.logout()
-            except Exception:
-                if not api_version:
-                    api_version = "Default api version"
-                msg = f"Failed to logout user: {sysadmin_user_context.name}" \
-                    f"at api_version: {api_version}."
-                logger.SERVER_LOGGER.debug(msg, exc_info=True)
+        # Remember the org of the user for the next requests with the token
+        for api_version, tenant_session in self._tenant_session_map.items():
+            _user_context = self._user_context_map.get(api_version)
+            if tenant_session.org_href is None and _user_context is not None \
+                    and _user_context.is_org_href_loaded():
+                tenant_session.org_href = _user_context.org_href
+        for pooled_session in self._sysadmin_session_map.values():
+            SYSADMIN_SESSION_POOL.release(pooled_session)
         self._user_context_map.clear()
         self._sysadmin_user_context_map.clear()
+        self._sysadmin_session_map.clear()
+        self._tenant_session_map.clear()
@@ -0,0 +1,119 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Cache of the rights of vCD roles, shared by all requests of the process.
+
+Listing the rights of a user takes several round trips to vCD (org, role
+resource, rights of the role), and the rights of a role rarely change. The
+cache remembers the rights of each role of each org for a fixed amount of
+time. Entries can be invalidated explicitly, e.g. when a user appears to be
+missing a right that might just have been granted.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+import time
+from typing import List, Optional
+
+import container_service_extension.common.constants.server_constants as server_constants  # noqa: E501
+from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER  # noqa: E501
+
+
+class RoleRightsCache:
+    def __init__(self, max_size, ttl):
+        """Create a cache of role rights with TTL based expiry.
+
+        :param int max_size: max number of roles to remember rights of.
+        :param int ttl: number of seconds the rights of a role are remembered
+            for.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = Lock()
+        # (org href, role name) -> (rights, expiry time), least recently
+        # used first
+        self._entries = OrderedDict()
+        self._num_hits = 0
+        self._num_misses = 0
+        self._num_invalidations = 0
+
+    def get(self, org_href, role_name) -> Optional[List[str]]:
+        """Return the cached rights of a role.
+
+        :param str org_href: href of the org of the role.
+        :param str role_name: name of the role.
+
+        :return: names of the rights, or None if they aren't cached.
+        :rtype: list
+        """
+        key = (org_href, role_name)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._num_misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self._num_hits += 1
+        if entry is None:
+            LOGGER.debug(f"Role rights cache miss for role '{role_name}' of "
+                         f"org '{org_href}'")
+            return None
+        LOGGER.debug(f"Role rights cache hit for role '{role_name}' of org "
+                     f"'{org_href}'")
+        # Callers may modify the list
+        return list(entry[0])
+
+    def put(self, org_href, role_name, rights: List[str]):
+        """Cache the rights of a role.
+
+        :param str org_href: href of the org of the role.
+        :param str role_name: name of the role.
+        :param list rights: names of the rights of the role.
+        """
+        key = (org_href, role_name)
+        with self._lock:
+            self._entries[key] = (tuple(rights), time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, org_href=None, role_name=None):
+        """Forget the rights of roles.
+
+        :param str org_href: href of the org whose roles to forget, None for
+            all orgs.
+        :param str role_name: name of the role to forget, None for all roles.
+        """
+        with self._lock:
+            keys = [key for key in self._entries
+                    if (org_href is None or key[0] == org_href)
+                    and (role_name is None or key[1] == role_name)]
+            for key in keys:
+                del self._entries[key]
+            self._num_invalidations += len(keys)
+        LOGGER.debug(f"Invalidated rights of {len(keys)} roles "
+                     f"(org: {org_href}, role: {role_name})")
+
+    def get_stats(self):
+        """Return cache size, hit, miss and invalidation counters.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'ttl_sec': self.ttl,
+                'roles_cached': len(self._entries),
+                'hits': self._num_hits,
+                'misses': self._num_misses,
+                'invalidations': self._num_invalidations
+            }
+
+
+ROLE_RIGHTS_CACHE = RoleRightsCache(
+    max_size=server_constants.ROLE_RIGHTS_CACHE_MAX_SIZE,
+    ttl=server_constants.ROLE_RIGHTS_CACHE_TTL_SEC)
@@ -0,0 +1,381 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Pool of vCD sessions of the sysadmin user.
+
+Logging in as sysadmin takes a username/password login, and logging out
+another round trip. Instead of doing both for every request, requests borrow
+a logged in client from the pool, and return it once they are done.
+
+The pool keeps separate sessions per api version, and caps the number of
+sessions per api version; requests wait for a session to be returned if all
+of them are borrowed. Sessions of async operations, which can be held for
+as long as it takes to create a cluster, are detached from the pool and
+don't count against the cap. A background thread keeps idle sessions alive,
+and replaces sessions that reach their max age before vCD expires them.
+"""
+
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+
+import container_service_extension.common.constants.server_constants as server_constants  # noqa: E501
+import container_service_extension.common.utils.deadline_utils as deadline_utils  # noqa: E501
+import container_service_extension.common.utils.pyvcloud_utils as vcd_utils
+import container_service_extension.common.utils.server_utils as server_utils
+from container_service_extension.exception.exceptions import \
+    RequestTimeoutError
+from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER  # noqa: E501
+
+SYSADMIN_SESSION_KEEPALIVE_THREAD = 'SysadminSessionKeepAlive'
+
+
+class PooledSysadminSession:
+    """Logged in sysadmin client, owned by the pool."""
+
+    def __init__(self, client, api_version, deadline_adapter):
+        self.client = client
+        self.api_version: str = api_version
+        # Limits requests to the deadline of the borrower
+        self.deadline_adapter: deadline_utils.DeadlineHTTPAdapter = \
+            deadline_adapter
+        self.login_time: float = time.monotonic()
+        self.last_used_time: float = self.login_time
+        # Set if vCD rejected the session, it is then logged out on return
+        self.is_broken: bool = False
+        # Set if a request made with the session got 401 Unauthorized, which
+        # is usually vCD rejecting the token of the user, not the session.
+        # The session is checked on return.
+        self.needs_check: bool = False
+        # Set if the session doesn't count against the cap of the pool
+        self.is_detached: bool = False
+
+    def get_age(self, now):
+        return now - self.login_time
+
+
+class SysadminSessionPool:
+    def __init__(self, max_sessions_per_api_version, max_wait_time,
+                 keepalive_interval, max_session_age):
+        """Create an empty pool of sysadmin sessions.
+
+        :param int max_sessions_per_api_version: max number of sessions,
+            idle or borrowed, per api version.
+        :param int max_wait_time: max number of seconds to wait for a
+            session, if the caller doesn't specify a timeout.
+        :param int keepalive_interval: number of seconds after which an idle
+            session is used, so that vCD doesn't expire it.
+        :param int max_session_age: number of seconds after login after which
+            a session is replaced.
+        """
+        self.max_sessions_per_api_version = max_sessions_per_api_version
+        self.max_wait_time = max_wait_time
+        self.keepalive_interval = keepalive_interval
+        self.max_session_age = max_session_age
+        self._condition = threading.Condition()
+        # api version -> idle sessions, most recently returned last
+        self._idle_sessions: Dict[str, List[PooledSysadminSession]] = {}
+        # api version -> number of sessions, idle, borrowed or logging in
+        self._num_sessions: Dict[str, int] = {}
+        self._keepalive_thread: Optional[threading.Thread] = None
+        self._is_closed = False
+        self._num_logins = 0
+        self._num_login_failures = 0
+        self._num_logouts = 0
+        self._num_refreshes = 0
+        self._num_keepalives = 0
+        self._num_borrows = 0
+        self._num_waits = 0
+        self._num_wait_timeouts = 0
+        self._num_detached_sessions = 0
+        self._num_detaches = 0
+
+    @staticmethod
+    def _resolve_api_version(api_version):
+        if not api_version:
+            server_config = server_utils.get_server_runtime_config()
+            api_version = server_config.get_value_at(
+                'service.default_api_version')
+        return api_version
+
+    def borrow(self, api_version: Optional[str],
+               timeout: Optional[float] = None,
+               is_detached: bool = False) -> PooledSysadminSession:
+        """Borrow a logged in sysadmin client.
+
+        The session must be returned with release() once the caller is done
+        with it.
+
+        :param str api_version: api version of the client, None for the
+            default api version.
+        :param float timeout: max number of seconds to wait if all sessions
+            are borrowed, defaults to the max wait time of the pool.
+        :param bool is_detached: True to get a detached session, see
+            detach(). Detached sessions are never waited for.
+
+        :rtype: PooledSysadminSession
+
+        :raises RequestTimeoutError: if no session got returned in time.
+        """
+        api_version = self._resolve_api_version(api_version)
+        if timeout is None:
+            timeout = self.max_wait_time
+        wait_end_time = time.monotonic() + timeout
+        expired_sessions = []
+        pooled_session = None
+        with self._condition:
+            self._start_keepalive_thread()
+            has_waited = False
+            while True:
+                now = time.monotonic()
+                idle_sessions = self._idle_sessions.setdefault(
+                    api_version, [])
+                while idle_sessions:
+                    idle_session = idle_sessions.pop()
+                    if idle_session.get_age(now) < self.max_session_age:
+                        pooled_session = idle_session
+                        break
+                    expired_sessions.append(idle_session)
+                    self._num_sessions[api_version] -= 1
+                if pooled_session is not None:
+                    break
+                num_sessions = self._num_sessions.get(api_version, 0)
+                if num_sessions < self.max_sessions_per_api_version or \
+                        is_detached:
+                    # Reserve the slot, and log in without holding the lock
+                    self._num_sessions[api_version] = num_sessions + 1
+                    break
+                remaining_time = wait_end_time - now
+                if remaining_time <= 0:
+                    self._num_wait_timeouts += 1
+                    raise RequestTimeoutError(
+                        error_message=f"Timed out waiting for one of "
+                                      f"{num_sessions} sysadmin sessions at "
+                                      f"api version {api_version}")
+                if not has_waited:
+                    self._num_waits += 1
+                    has_waited = True
+                self._condition.wait(remaining_time)
+            self._num_borrows += 1
+
+        for expired_session in expired_sessions:
+            self._logout(expired_session)
+        if pooled_session is None:
+            try:
+                pooled_session = self._login(api_version)
+            except Exception:
+                with self._condition:
+                    self._num_sessions[api_version] -= 1
+                    self._condition.notify()
+                raise
+        if is_detached:
+            self.detach(pooled_session)
+        return pooled_session
+
+    def detach(self, pooled_session: PooledSysadminSession):
+        """Stop counting a borrowed session against the cap of the pool.
+
+        For sessions held for long, such as by async operations, so that they
+        don't keep other requests waiting. The session must still be returned
+        with release(); the pool keeps it if there is room for it then.
+
+        :param PooledSysadminSession pooled_session: the borrowed session.
+        """
+        with self._condition:
+            if pooled_session.is_detached:
+                return
+            pooled_session.is_detached = True
+            self._num_sessions[pooled_session.api_version] -= 1
+            self._num_detached_sessions += 1
+            self._num_detaches += 1
+            self._condition.notify()
+
+    def release(self, pooled_session: PooledSysadminSession):
+        """Return a borrowed session to the pool.
+
+        :param PooledSysadminSession pooled_session: the borrowed session.
+        """
+        pooled_session.deadline_adapter.set_timeout_provider(None)
+        if pooled_session.needs_check and not pooled_session.is_broken:
+            pooled_session.needs_check = False
+            self._check(pooled_session)
+        now = time.monotonic()
+        pooled_session.last_used_time = now
+        should_logout = pooled_session.is_broken or \
+            pooled_session.get_age(now) >= self.max_session_age
+        api_version = pooled_session.api_version
+        with self._condition:
+            if self._is_closed:
+                should_logout = True
+            if pooled_session.is_detached:
+                pooled_session.is_detached = False
+                self._num_detached_sessions -= 1
+                # Take the session back if there is room for it
+                num_sessions = self._num_sessions.get(api_version, 0)
+                if num_sessions >= self.max_sessions_per_api_version:
+                    should_logout = True
+                elif not should_logout:
+                    self._num_sessions[api_version] = num_sessions + 1
+            elif should_logout:
+                self._num_sessions[api_version] -= 1
+            if not should_logout:
+                self._idle_sessions.setdefault(api_version, []).append(
+                    pooled_session)
+            self._condition.notify()
+        if should_logout:
+            self._logout(pooled_session)
+
+    def close(self):
+        """Log out idle sessions, borrowed sessions are logged out on return.
+
+        Once closed, sessions are still lent to requests that finish after
+        the server stopped, but each one is logged out when returned.
+        """
+        with self._condition:
+            self._is_closed = True
+            idle_sessions = [s for sessions in self._idle_sessions.values()
+                             for s in sessions]
+            for api_version in self._idle_sessions:
+                self._num_sessions[api_version] -= \
+                    len(self._idle_sessions[api_version])
+            self._idle_sessions.clear()
+            self._condition.notify_all()
+        for idle_session in idle_sessions:
+            self._logout(idle_session)
+
+    def get_stats(self):
+        """Return session counts, and login and borrow counters.
+
+        :rtype: dict
+        """
+        with self._condition:
+            num_idle = sum(len(sessions)
+                           for sessions in self._idle_sessions.values())
+            num_sessions = sum(self._num_sessions.values())
+            return {
+                'max_sessions_per_api_version':
+                    self.max_sessions_per_api_version,
+                'sessions': num_sessions,
+                'sessions_idle': num_idle,
+                'sessions_borrowed': num_sessions - num_idle,
+                'sessions_detached': self._num_detached_sessions,
+                'logins': self._num_logins,
+                'login_failures': self._num_login_failures,
+                'logouts': self._num_logouts,
+                'refreshes': self._num_refreshes,
+                'keepalives': self._num_keepalives,
+                'borrows': self._num_borrows,
+                'waits': self._num_waits,
+                'wait_timeouts': self._num_wait_timeouts,
+                'detaches': self._num_detaches
+            }
+
+    def _login(self, api_version):
+        try:
+            client = vcd_utils.get_sys_admin_client(api_version=api_version)
+        except Exception:
+            with self._condition:
+                self._num_login_failures += 1
+            raise
+        deadline_adapter = deadline_utils.mount_deadline_adapter(
+            client._session, None)
+        with self._condition:
+            self._num_logins += 1
+        LOGGER.debug(f"Logged in sysadmin session at api version "
+                     f"{api_version}")
+        return PooledSysadminSession(client, api_version, deadline_adapter)
+
+    def _logout(self, pooled_session):
+        try:
+            pooled_session.client.logout()
+        except Exception:
+            LOGGER.debug(f"Failed to logout sysadmin session at api version "
+                         f"{pooled_session.api_version}", exc_info=True)
+        with self._condition:
+            self._num_logouts += 1
+
+    def _start_keepalive_thread(self):
+        # Must be called with the lock held
+        if self._keepalive_thread is not None:
+            return
+        keepalive_thread = threading.Thread(
+            name=SYSADMIN_SESSION_KEEPALIVE_THREAD,
+            target=self._keepalive_thread_run)
+        keepalive_thread.daemon = True
+        keepalive_thread.start()
+        self._keepalive_thread = keepalive_thread
+
+    def _keepalive_thread_run(self):
+        # Check often enough that no session stays idle for much longer than
+        # the keep alive interval
+        check_interval = max(self.keepalive_interval / 5, 1)
+        while True:
+            with self._condition:
+                if self._is_closed:
+                    return
+                self._condition.wait(check_interval)
+                if self._is_closed:
+                    return
+                now = time.monotonic()
+                sessions_to_check = []
+                for sessions in self._idle_sessions.values():
+                    for idle_session in list(sessions):
+                        if idle_session.get_age(now) >= \
+                                self.max_session_age or \
+                                now - idle_session.last_used_time >= \
+                                self.keepalive_interval:
+                            # Nobody can borrow it in the meantime
+                            sessions.remove(idle_session)
+                            sessions_to_check.append(idle_session)
+            for idle_session in sessions_to_check:
+                try:
+                    self._keep_alive(idle_session, now)
+                except Exception:
+                    LOGGER.error(traceback.format_exc())
+
+    def _keep_alive(self, idle_session, now):
+        api_version = idle_session.api_version
+        if idle_session.get_age(now) >= self.max_session_age:
+            # Replace the session before vCD expires it
+            try:
+                new_session = self._login(api_version)
+            except Exception:
+                LOGGER.warning(f"Failed to refresh sysadmin session at api "
+                               f"version {api_version}", exc_info=True)
+                new_session = None
+            self._logout(idle_session)
+            if new_session is None:
+                with self._condition:
+                    self._num_sessions[api_version] -= 1
+                    self._condition.notify()
+            else:
+                with self._condition:
+                    self._num_refreshes += 1
+                self.release(new_session)
+            return
+
+        self._check(idle_session)
+        with self._condition:
+            self._num_keepalives += 1
+        self.release(idle_session)
+
+    def _check(self, pooled_session):
+        """Mark a session broken unless vCD still accepts it."""
+        try:
+            client = pooled_session.client
+            client.get_resource(f"{client.get_api_uri()}/session")
+            pooled_session.last_used_time = time.monotonic()
+        except Exception:
+            LOGGER.debug(f"Sysadmin session at api version "
+                         f"{pooled_session.api_version} expired",
+                         exc_info=True)
+            pooled_session.is_broken = True
+
+
+SYSADMIN_SESSION_POOL = SysadminSessionPool(
+    max_sessions_per_api_version=server_constants.SYSADMIN_SESSION_POOL_MAX_SIZE,  # noqa: E501
+    max_wait_time=server_constants.SYSADMIN_SESSION_POOL_WAIT_SEC,
+    keepalive_interval=server_constants.SYSADMIN_SESSION_KEEPALIVE_INTERVAL_SEC,  # noqa: E501
+    max_session_age=server_constants.SYSADMIN_SESSION_MAX_AGE_SEC)
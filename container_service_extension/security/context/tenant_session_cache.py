@@ -0,0 +1,218 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Cache of vCD sessions of tenant users.
+
+Every request carries the JWT token of the user. Rehydrating a pyvcloud
+client from the token costs a round trip to vCD (GET /session), and looking
+up the org of the user costs another one. The cache remembers the session
+and org of each token, per api version, so that repeated requests of the same
+user create their clients without calling vCD.
+
+Only session state is cached, not clients: each request still gets its own
+client, since clients carry per request state (the deadline of the request,
+the last response of the cloudapi client...).
+
+An entry expires after a fixed amount of time, or when its token expires,
+whichever comes first. Entries of a token are evicted as soon as vCD rejects
+the token with 401 Unauthorized, e.g. because the user logged out.
+"""
+
+import base64
+from collections import OrderedDict
+import hashlib
+import json
+from threading import Lock
+import time
+from typing import Optional
+
+from pyvcloud.vcd.exceptions import UnauthorizedException
+import requests
+
+import container_service_extension.common.constants.server_constants as server_constants  # noqa: E501
+
+
+class TenantSession:
+    """Session state of a tenant user, at one api version."""
+
+    __slots__ = ('vcloud_session', 'vcloud_auth_token', 'org_href',
+                 'expiry_time')
+
+    def __init__(self, vcloud_session, vcloud_auth_token, expiry_time):
+        self.vcloud_session = vcloud_session
+        self.vcloud_auth_token: Optional[str] = vcloud_auth_token
+        self.org_href: Optional[str] = None
+        self.expiry_time: float = expiry_time
+
+
+def _get_token_key(token):
+    # Keyed by a hash, so that tokens don't stay in memory past their requests
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _get_token_expiry_time(token):
+    """Return time.monotonic() at which a JWT token expires.
+
+    The token is not verified, vCD does that. The expiry time only bounds
+    how long the session of the token is cached.
+
+    :return: expiry time, or None if the token doesn't carry one.
+    :rtype: float
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload))['exp']
+        return time.monotonic() + (float(exp) - time.time())
+    except Exception:
+        return None
+
+
+def is_unauthorized_error(err):
+    """Return True if an error is vCD rejecting the auth token of a user.
+
+    Errors that handlers raised while handling such an error count as well.
+
+    :param Exception err: error raised while processing a request.
+
+    :rtype: bool
+    """
+    seen = set()
+    while err is not None and id(err) not in seen:
+        seen.add(id(err))
+        if isinstance(err, UnauthorizedException):
+            return True
+        if isinstance(err, requests.exceptions.HTTPError):
+            response = err.response
+            if response is not None and \
+                    response.status_code == requests.codes.unauthorized:
+                return True
+        err = err.__cause__ or err.__context__
+    return False
+
+
+class TenantSessionCache:
+    def __init__(self, max_size, ttl):
+        """Create a cache of tenant sessions with TTL based expiry.
+
+        :param int max_size: max number of tokens to remember sessions of.
+        :param int ttl: max number of seconds a session is remembered for,
+            measured from the time it was fetched from vCD.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = Lock()
+        # token key -> {api version -> TenantSession}, least recently used
+        # token first
+        self._entries = OrderedDict()
+        self._num_hits = 0
+        self._num_misses = 0
+        self._num_evictions = 0
+
+    def get(self, token, api_version) -> Optional[TenantSession]:
+        """Return the cached session of a token at an api version.
+
+        :param str token: JWT token of the user.
+        :param str api_version: api version of the session, None for the
+            default api version.
+
+        :return: the session, or None if it isn't cached or has expired.
+        :rtype: TenantSession
+        """
+        now = time.monotonic()
+        token_key = _get_token_key(token)
+        with self._lock:
+            sessions = self._entries.get(token_key)
+            tenant_session = None
+            if sessions is not None:
+                tenant_session = sessions.get(api_version)
+                if tenant_session is not None and \
+                        tenant_session.expiry_time <= now:
+                    del sessions[api_version]
+                    self._num_evictions += 1
+                    tenant_session = None
+                if not sessions:
+                    del self._entries[token_key]
+                else:
+                    self._entries.move_to_end(token_key)
+            if tenant_session is None:
+                self._num_misses += 1
+            else:
+                self._num_hits += 1
+            return tenant_session
+
+    def put(self, token, api_version, client) -> Optional[TenantSession]:
+        """Cache the session of a client that was rehydrated from a token.
+
+        :param str token: JWT token the client was rehydrated from.
+        :param str api_version: api version the client was requested at,
+            None for the default api version.
+        :param vcd_client.Client client: the rehydrated client.
+
+        :return: the cached session, or None if the token has already
+            expired.
+        :rtype: TenantSession
+        """
+        now = time.monotonic()
+        expiry_time = now + self.ttl
+        token_expiry_time = _get_token_expiry_time(token)
+        if token_expiry_time is not None:
+            expiry_time = min(expiry_time, token_expiry_time)
+        if expiry_time <= now:
+            return None
+        tenant_session = TenantSession(
+            vcloud_session=client.get_vcloud_session(),
+            vcloud_auth_token=client.get_xvcloud_authorization_token(),
+            expiry_time=expiry_time)
+
+        token_key = _get_token_key(token)
+        with self._lock:
+            sessions = self._entries.setdefault(token_key, {})
+            sessions[api_version] = tenant_session
+            self._entries.move_to_end(token_key)
+            while len(self._entries) > self.max_size:
+                _, evicted_sessions = self._entries.popitem(last=False)
+                self._num_evictions += len(evicted_sessions)
+        return tenant_session
+
+    def evict(self, token):
+        """Forget the sessions of a token, at all api versions.
+
+        :param str token: JWT token of the user.
+        """
+        with self._lock:
+            sessions = self._entries.pop(_get_token_key(token), None)
+            if sessions:
+                self._num_evictions += len(sessions)
+
+    def clear(self):
+        with self._lock:
+            for sessions in self._entries.values():
+                self._num_evictions += len(sessions)
+            self._entries.clear()
+
+    def get_stats(self):
+        """Return cache size, hit, miss and eviction counters.
+
+        :rtype: dict
+        """
+        now = time.monotonic()
+        with self._lock:
+            num_sessions = sum(
+                1 for sessions in self._entries.values()
+                for tenant_session in sessions.values()
+                if tenant_session.expiry_time > now)
+            return {
+                'ttl_sec': self.ttl,
+                'max_size': self.max_size,
+                'sessions_cached': num_sessions,
+                'hits': self._num_hits,
+                'misses': self._num_misses,
+                'evictions': self._num_evictions
+            }
+
+
+TENANT_SESSION_CACHE = TenantSessionCache(
+    max_size=server_constants.TENANT_SESSION_CACHE_MAX_SIZE,
+    ttl=server_constants.TENANT_SESSION_CACHE_TTL_SEC)
@@ -11,6 +11,7 @@ import pyvcloud.vcd.role as vcd_role
 
 import container_service_extension.lib.cloudapi.cloudapi_client as cloudapi_client  # noqa: E501
 import container_service_extension.logging.logger as logger
+from container_service_extension.security.context.role_rights_cache import ROLE_RIGHTS_CACHE  # noqa: E501
 
 ORG_ADMIN_RIGHTS = [
     'General: Administrator Control',
@@ -20,7 +21,8 @@ ORG_ADMIN_RIGHTS = [
 
 class UserContext:
     def __init__(self, client: vcd_client.Client,
-                 cloud_api_client: cloudapi_client.CloudApiClient):
+                 cloud_api_client: cloudapi_client.CloudApiClient,
+                 org_href: Optional[str] = None):
         self.client: vcd_client.Client = client
         self.cloud_api_client: cloudapi_client.CloudApiClient = \
             cloud_api_client
@@ -28,7 +30,7 @@ class UserContext:
         self._name: Optional[str] = None
         self._id: Optional[str] = None
         self._org_name: Optional[str] = None
-        self._org_href: Optional[str] = None
+        self._org_href: Optional[str] = org_href
         self._role: Optional[str] = None
         self._rights: Optional[List[str]] = None
 
@@ -64,6 +66,9 @@ class UserContext:
             self._org_href = self.client.get_org().get('href')
         return self._org_href
 
+    def is_org_href_loaded(self):
+        return self._org_href is not None
+
     @property
     def role(self):
         if self._role is None:
@@ -75,17 +80,21 @@ class UserContext:
         # If the user is unable to fetch the list of rights, then they
         # can't be sys admin or org admin. And anyone other than those
         # two shouldn't be able to see their own set of rights.
+        if self._rights is None:
+            self._rights = ROLE_RIGHTS_CACHE.get(self.org_href, self.role)
         if self._rights is None:
             try:
                 org = vcd_org.Org(self.client, href=self.org_href)
                 role = vcd_role.Role(self.client,
                                      resource=org.get_role_resource(self.role))
 
-                self._rights = []
+                rights = []
                 for right_dict in role.list_rights():
                     right_name = right_dict.get('name')
                     if right_name is not None:
-                        self._rights.append(right_name)
+                        rights.append(right_name)
+                self._rights = rights
+                ROLE_RIGHTS_CACHE.put(self.org_href, self.role, rights)
             # maybe replace with Forbidden exception?
             except Exception:
                 msg = f"Unable to fetch right records for User: {self.name}"
@@ -93,6 +102,17 @@ class UserContext:
 
         return self._rights
 
+    def refresh_rights(self):
+        """Fetch the rights of the user from vCD, bypassing the cache.
+
+        :return: names of the rights, see rights.
+        :rtype: list
+        """
+        ROLE_RIGHTS_CACHE.invalidate(org_href=self.org_href,
+                                     role_name=self.role)
+        self._rights = None
+        return self.rights
+
     @property
     def has_org_admin_rights(self):
         return all(right in self.rights for right in ORG_ADMIN_RIGHTS)
@@ -3,21 +3,31 @@
 # SPDX-License-Identifier: BSD-2-Clause
 
 from dataclasses import asdict
-import json
 
+from container_service_extension.common.constants.server_constants import \
+    REQUEST_LANE_TIMEOUT_SEC, RequestLane
 from container_service_extension.common.constants.shared_constants import \
     ALPHA_API_SUBSTRING, SUPPORTED_VCD_API_VERSIONS
 import container_service_extension.common.utils.core_utils as core_utils
+import container_service_extension.common.utils.deadline_utils as deadline_utils  # noqa: E501
+from container_service_extension.common.utils.import_utils import LazyModule  # noqa: E501
 from container_service_extension.exception.exceptions import CseRequestError
+from container_service_extension.exception.exceptions import \
+    RequestTimeoutError
 from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER
 from container_service_extension.mqi.consumer.mqtt_publisher import \
     MQTTPublisher
+from container_service_extension.mqi.consumer.request_message import \
+    RequestMessage
 from container_service_extension.rde.behaviors.behavior_model import \
     BehaviorError, BehaviorOperation, BehaviorTaskStatus  # noqa: E501
 from container_service_extension.security.context.behavior_request_context \
     import BehaviorUserContext, RequestContext
 from container_service_extension.security.context.operation_context import OperationContext  # noqa: E501
-import container_service_extension.server.behavior_handler as handler
+import container_service_extension.security.context.tenant_session_cache as tenant_session_cache  # noqa: E501
+
+# Imported on the first behavior invocation
+handler = LazyModule('container_service_extension.server.behavior_handler')
 
 
 MAP_BEHAVIOR_ID_TO_HANDLER_METHOD = {
@@ -28,8 +38,27 @@ MAP_BEHAVIOR_ID_TO_HANDLER_METHOD = {
     BehaviorOperation.DELETE_NFS_NODE.value.id: handler.nfs_node_delete
 }
 
+# Behaviors that don't kick off long running work in VCD
+READ_LANE_BEHAVIOR_IDS = frozenset([
+    BehaviorOperation.GET_KUBE_CONFIG.value.id
+])
+
+
+def get_behavior_lane(request_msg: RequestMessage):
+    """Determine the execution lane of a behavior invocation.
+
+    :param RequestMessage request_msg: behavior invocation message.
+
+    :rtype: RequestLane
+    """
+    if request_msg.headers.get('behaviorId') in READ_LANE_BEHAVIOR_IDS:
+        return RequestLane.READ
+    return RequestLane.WRITE
+
 
-def process_behavior_request(msg_json, mqtt_publisher: MQTTPublisher):
+def process_behavior_request(request_msg: RequestMessage,
+                             mqtt_publisher: MQTTPublisher):
+    msg_json = request_msg.message
     # Extracting contents from headers
     task_id: str = msg_json['headers']['taskId']
     entity_id: str = msg_json['headers']['entityId']
@@ -37,7 +66,7 @@ def process_behavior_request(msg_json, mqtt_publisher: MQTTPublisher):
     usr_ctx: BehaviorUserContext = BehaviorUserContext(**msg_json['headers']['context'])  # noqa: E501
 
     # Extracting contents from the input payload
-    payload: dict = json.loads(msg_json['payload'])
+    payload: dict = request_msg.behavior_payload
     entity: dict = payload['entity']
     entity_type_id: str = payload['typeId']
     api_version: str = payload['_metadata']['apiVersion']
@@ -53,7 +82,12 @@ def process_behavior_request(msg_json, mqtt_publisher: MQTTPublisher):
     arguments: dict = payload['arguments']
 
     # Initializing Behavior operation context
-    op_ctx = OperationContext(auth_token=auth_token, request_id=request_id)  # noqa: E501
+    timeout = REQUEST_LANE_TIMEOUT_SEC[get_behavior_lane(request_msg)]
+    op_ctx = OperationContext(
+        auth_token=auth_token,
+        request_id=request_id,
+        deadline=deadline_utils.RequestDeadline(
+            timeout, start_time=request_msg.received_time))
     behavior_ctx = RequestContext(
         behavior_id=behavior_id,
         task_id=task_id,
@@ -71,7 +105,7 @@ def process_behavior_request(msg_json, mqtt_publisher: MQTTPublisher):
 
     # Invoke the handler method and return the response in the string format.
     try:
-        return MAP_BEHAVIOR_ID_TO_HANDLER_METHOD[behavior_id](behavior_ctx)
+        return _invoke_handler_within_deadline(behavior_ctx, timeout)
     except CseRequestError as e:
         error_details = asdict(BehaviorError(majorErrorCode=e.status_code,
                                              minorErrorCode=e.minor_error_code,
@@ -89,3 +123,32 @@ def process_behavior_request(msg_json, mqtt_publisher: MQTTPublisher):
                                        error_details=error_details)
         LOGGER.error(f"Error while executing handler: {error_details}", exc_info=True)  # noqa: E501
         return payload
+
+
+def _invoke_handler_within_deadline(behavior_ctx: RequestContext,
+                                    timeout: float):
+    """Invoke the behavior handler, converting errors past the deadline.
+
+    :raises RequestTimeoutError: if the handler failed after the deadline of
+        the behavior invocation had passed.
+    """
+    op_ctx = behavior_ctx.op_ctx
+    try:
+        # Fail fast if the request spent its budget waiting in the queue
+        op_ctx.get_remaining_time()
+        return MAP_BEHAVIOR_ID_TO_HANDLER_METHOD[behavior_ctx.behavior_id](behavior_ctx)  # noqa: E501
+    except Exception as err:
+        if tenant_session_cache.is_unauthorized_error(err):
+            op_ctx.discard_cached_sessions()
+        if not op_ctx.is_past_deadline():
+            raise
+        deadline_utils.record_request_timeout()
+        LOGGER.warning(f"Behavior invocation ({behavior_ctx.task_id}) of "
+                       f"({behavior_ctx.behavior_id}) timed out: {err}")
+        if isinstance(err, RequestTimeoutError):
+            raise
+        raise RequestTimeoutError(
+            error_message=f"Request did not finish within {timeout} "
+                          f"seconds: {err}") from err
+    finally:
+        op_ctx.clear_deadline()
@@ -55,6 +55,7 @@ from container_service_extension.security.encryption_engine import decrypt_file
 from container_service_extension.security.encryption_engine import encrypt_file
 from container_service_extension.security.encryption_engine import get_decrypted_file_contents  # noqa: E501
 import container_service_extension.server.service as cse_service
+from container_service_extension.server.worker_supervisor import WorkerSupervisor  # noqa: E501
 
 CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 
@@ -804,8 +805,17 @@ def pks_configure(ctx, pks_config_file_path, skip_config_decryption):
     '--skip-config-decryption',
     is_flag=True,
     help='Skip decryption of CSE/PKS config file')
+@click.option(
+    '-w',
+    '--workers',
+    'num_workers',
+    default=1,
+    type=click.IntRange(min=1),
+    help='Number of CSE server worker processes. If more than 1, a '
+         'supervisor process starts the workers, which process requests '
+         'from the same message queue.')
 def run(ctx, config_file_path, pks_config_file_path, skip_check,
-        skip_config_decryption):
+        skip_config_decryption, num_workers):
     """Run CSE service.
 
     legacy_mode is config property that is used to configure CSE with
@@ -818,6 +828,10 @@ def run(ctx, config_file_path, pks_config_file_path, skip_check,
     VCD whose maximum supported api_version >= 35. However, it is strongly
     recommended to set the property to false to leverage the new functionality.
 
+    With --workers N (N > 1), N CSE server processes are started, each with
+    `service.processors` threads. This lets CSE make use of more than one
+    CPU core. MQTT based deployments rely on the MQTT broker supporting
+    shared subscriptions.
     """
     SERVER_CLI_LOGGER.debug(f"Executing command: {ctx.command_path}")
     console_message_printer = utils.ConsoleMessagePrinter()
@@ -842,13 +856,22 @@ def run(ctx, config_file_path, pks_config_file_path, skip_check,
             log_wire_file=SERVER_DEBUG_WIRELOG_FILEPATH,
             logger_debug=SERVER_LOGGER,
             msg_update_callback=console_message_printer)
-        service = cse_service.Service(
-            config_file=config_file_path,
-            config=config,
-            pks_config_file=pks_config_file_path,
-            should_check_config=not skip_check,
-            skip_config_decryption=skip_config_decryption)
-        service.run(msg_update_callback=console_message_printer)
+        service_kwargs = {
+            'config_file': config_file_path,
+            'config': config,
+            'pks_config_file': pks_config_file_path,
+            'should_check_config': not skip_check,
+            'skip_config_decryption': skip_config_decryption
+        }
+        if num_workers > 1:
+            supervisor = WorkerSupervisor(
+                num_workers=num_workers,
+                service_kwargs=service_kwargs,
+                msg_update_callback=console_message_printer)
+            supervisor.run()
+        else:
+            service = cse_service.Service(**service_kwargs)
+            service.run(msg_update_callback=console_message_printer)
         cse_run_complete = True
     except Exception as err:
         SERVER_CLI_LOGGER.error(str(err), exc_info=True)
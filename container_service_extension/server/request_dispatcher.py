@@ -2,30 +2,45 @@
 # Copyright (c) 2021 VMware, Inc. All Rights Reserved.
 # SPDX-License-Identifier: BSD-2-Clause
 
-import base64
-import json
-import sys
+from collections import namedtuple
 from urllib.parse import parse_qsl
 
 from container_service_extension.common.constants.server_constants import CseOperation  # noqa: E501
+from container_service_extension.common.constants.server_constants import RequestLane  # noqa: E501
 from container_service_extension.common.constants.shared_constants import RequestKey  # noqa: E501
 from container_service_extension.common.constants.shared_constants import RequestMethod  # noqa: E501
 from container_service_extension.common.constants.shared_constants import RESPONSE_MESSAGE_KEY  # noqa: E501
 from container_service_extension.common.constants.shared_constants import SUPPORTED_VCD_API_VERSIONS  # noqa: E501
+import container_service_extension.common.utils.deadline_utils as deadline_utils  # noqa: E501
+from container_service_extension.common.utils.import_utils import LazyModule  # noqa: E501
 from container_service_extension.exception.exception_handler import handle_exception  # noqa: E501
 import container_service_extension.exception.exceptions as cse_exception
 from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER
+from container_service_extension.mqi.consumer.request_message import \
+    RequestMessage
 import container_service_extension.security.context.operation_context as ctx
-import container_service_extension.server.request_handlers.cluster_handler as cluster_handler  # noqa: E501
-import \
-    container_service_extension.server.request_handlers.legacy.native_cluster_handler as native_cluster_handler  # noqa: E501
-import container_service_extension.server.request_handlers.legacy.ovdc_handler as ovdc_handler  # noqa: E501
-import container_service_extension.server.request_handlers.pks.pks_cluster_handler as pks_cluster_handler  # noqa: E501
-import container_service_extension.server.request_handlers.pks.pks_ovdc_handler as pks_ovdc_handler  # noqa: E501
-import container_service_extension.server.request_handlers.system_handler as system_handler  # noqa: E501
-import container_service_extension.server.request_handlers.template_handler as template_handler  # noqa: E501 E501
-import container_service_extension.server.request_handlers.v35.def_cluster_handler as v35_cluster_handler  # noqa: E501
-import container_service_extension.server.request_handlers.v35.ovdc_handler as v35_ovdc_handler  # noqa: E501
+import container_service_extension.security.context.tenant_session_cache as tenant_session_cache  # noqa: E501
+
+# Handler modules are imported when a request for them is first dispatched,
+# e.g. the PKS handlers never get imported if PKS is not in use.
+_HANDLERS_PACKAGE = 'container_service_extension.server.request_handlers'
+cluster_handler = LazyModule(f'{_HANDLERS_PACKAGE}.cluster_handler')
+native_cluster_handler = LazyModule(
+    f'{_HANDLERS_PACKAGE}.legacy.native_cluster_handler')
+ovdc_handler = LazyModule(f'{_HANDLERS_PACKAGE}.legacy.ovdc_handler')
+pks_cluster_handler = LazyModule(
+    f'{_HANDLERS_PACKAGE}.pks.pks_cluster_handler')
+pks_ovdc_handler = LazyModule(f'{_HANDLERS_PACKAGE}.pks.pks_ovdc_handler')
+system_handler = LazyModule(f'{_HANDLERS_PACKAGE}.system_handler')
+template_handler = LazyModule(f'{_HANDLERS_PACKAGE}.template_handler')
+v35_cluster_handler = LazyModule(
+    f'{_HANDLERS_PACKAGE}.v35.def_cluster_handler')
+v35_ovdc_handler = LazyModule(f'{_HANDLERS_PACKAGE}.v35.ovdc_handler')
+
+# Handler matched for a request, along with values of url template params
+RequestRoute = namedtuple(
+    'RequestRoute',
+    ['operation', 'handler_method', 'method', 'url', 'url_data'])
 
 DUAL_FORM_TOKENS = {
     'template': ('template', 'templates'),
@@ -764,6 +779,189 @@ for url_entry in CSE_REQUEST_DISPATCHER_LIST:
     url_entry['url_tokens'] = url_entry['url'].split('/')
 
 
+def _normalize_url_token(token: str):
+    """Map a literal url token to the key used in the route trie.
+
+    Certain url tokens can be singular as well plural e.g. cluster /
+    clusters. Both forms map to the same key. This ensures that we support
+    both
+    /api/cse/cluster and
+    /api/cse/clusters
+    as well as
+    /api/cse/cluster/{id} and
+    /api/cse/clusters/{id}
+    """
+    token = token.lower()
+    dual_forms = DUAL_FORM_TOKENS.get(token)
+    if dual_forms:
+        return dual_forms[0]
+    return token
+
+
+class _CompiledMethodHandlers:
+    """Handlers of an url and HTTP method, indexed by api version."""
+
+    __slots__ = ('_handler_by_api_version', '_wildcard_handler',
+                 'supported_api_versions')
+
+    def __init__(self, handlers: dict):
+        # Api versions are matched in the order they are listed, the first
+        # entry that lists the version or '*' wins. Entries after the first
+        # '*' entry can never be matched.
+        self._handler_by_api_version = {}
+        self._wildcard_handler = None
+        self.supported_api_versions = []
+        for versions, handler in handlers.items():
+            self.supported_api_versions.extend(versions)
+            compiled_handler = (
+                handler, frozenset(handler.get('feature_flags', [])))
+            if self._wildcard_handler is not None:
+                continue
+            for version in versions:
+                self._handler_by_api_version.setdefault(
+                    version, compiled_handler)
+            if '*' in versions:
+                self._wildcard_handler = compiled_handler
+
+    def get(self, api_version: str):
+        """Return the handler and its required feature flags, or None."""
+        return self._handler_by_api_version.get(
+            api_version, self._wildcard_handler)
+
+
+class _CompiledRoute:
+    """Entry of CSE_REQUEST_DISPATCHER_LIST, compiled for dispatch."""
+
+    __slots__ = ('index', 'url_params', 'handlers_by_method')
+
+    def __init__(self, index: int, entry: dict):
+        # Position of the entry in the dispatcher list, the first entry
+        # matching an url wins
+        self.index = index
+        self.url_params = tuple(
+            (position, token[1:])
+            for position, token in enumerate(entry['url_tokens'])
+            if token.startswith('$'))
+        self.handlers_by_method = {
+            method: _CompiledMethodHandlers(entry[method])
+            for method in RequestMethod if method in entry
+        }
+
+
+class _RouteTrieNode:
+    __slots__ = ('children', 'param_child', 'routes')
+
+    def __init__(self):
+        # Children keyed by normalized literal url token
+        self.children = {}
+        # Child matching any token, for url template params
+        self.param_child = None
+        # Routes whose url ends at this node
+        self.routes = []
+
+
+def _compile_route_trie(dispatcher_list: list):
+    """Compile the dispatcher list into a trie keyed by url token.
+
+    :param list dispatcher_list: list of url entries, in order of priority.
+
+    :rtype: _RouteTrieNode
+    """
+    root = _RouteTrieNode()
+    for index, entry in enumerate(dispatcher_list):
+        node = root
+        for token in entry['url_tokens']:
+            if token.startswith('$'):
+                if node.param_child is None:
+                    node.param_child = _RouteTrieNode()
+                node = node.param_child
+            else:
+                node = node.children.setdefault(
+                    _normalize_url_token(token), _RouteTrieNode())
+        node.routes.append(_CompiledRoute(index, entry))
+    return root
+
+
+_ROUTE_TRIE = _compile_route_trie(CSE_REQUEST_DISPATCHER_LIST)
+
+
+def _find_route(url_tokens: list):
+    """Find the highest priority route matching the url tokens.
+
+    :param list url_tokens: url tokens, excluding the vcd host and /api.
+
+    :return: the matched route, or None.
+    :rtype: _CompiledRoute
+    """
+    url_keys = [_normalize_url_token(token) for token in url_tokens]
+    num_tokens = len(url_keys)
+    matched_route = None
+    nodes = [(_ROUTE_TRIE, 0)]
+    while nodes:
+        node, depth = nodes.pop()
+        if depth == num_tokens:
+            for route in node.routes:
+                if matched_route is None or route.index < matched_route.index:  # noqa: E501
+                    matched_route = route
+            continue
+        child = node.children.get(url_keys[depth])
+        if child is not None:
+            nodes.append((child, depth + 1))
+        if node.param_child is not None:
+            nodes.append((node.param_child, depth + 1))
+    return matched_route
+
+
+def match_route(method: RequestMethod, url_tokens: list, api_version: str,
+                enabled_feature_flags: frozenset):
+    """Match a request against the compiled route table.
+
+    :param RequestMethod method: HTTP method of the request.
+    :param list url_tokens: url tokens, excluding the vcd host and /api.
+    :param str api_version: api version requested by the client.
+    :param frozenset enabled_feature_flags: feature flags enabled in the
+        server config.
+
+    :return: matched handler entry and values of url template params.
+    :rtype: tuple
+
+    :raises MethodNotAllowedRequestError, NotAcceptableRequestError,
+        NotFoundRequestError: if the request doesn't match any handler.
+    """
+    route = _find_route(url_tokens)
+    if route is None:
+        raise cse_exception.NotFoundRequestError()
+
+    method_handlers = route.handlers_by_method.get(method)
+    if method_handlers is None:
+        raise cse_exception.MethodNotAllowedRequestError()
+
+    compiled_handler = method_handlers.get(api_version)
+    if compiled_handler is None:
+        raise cse_exception.NotAcceptableRequestError(
+            error_message="Invalid api version specified. Expected "
+                          f"api version "
+                          f"'{method_handlers.supported_api_versions}'.")
+
+    matched_handler, required_feature_flags = compiled_handler
+    if not required_feature_flags <= enabled_feature_flags:
+        LOGGER.debug("Url matched but failed to satisfy feature flags %s",
+                     required_feature_flags - enabled_feature_flags)
+        raise cse_exception.NotFoundRequestError()
+
+    url_data = {name: url_tokens[position]
+                for position, name in route.url_params}
+    return matched_handler, url_data
+
+
+def _get_enabled_feature_flags(server_config):
+    # Read on every request, so that flags changed in place in the server
+    # config take effect. There are only a handful of them.
+    return frozenset(
+        feature_flag for feature_flag, value
+        in server_config.get_value_at('feature_flags').items() if value)
+
+
 def _parse_accept_header(accept_header: str):
     """Parse accept headers and select one that fits CSE.
 
@@ -870,28 +1068,48 @@ def _get_api_version_from_accept_header(api_version_header: str):
     return api_version
 
 
-@handle_exception
-def process_request(message, mqtt_publisher=None):
+def get_request_lane(request_msg: RequestMessage):
+    """Determine the execution lane of an incoming request.
+
+    The request is routed to determine its operation. The result of routing
+    is remembered in the request message, so that process_request doesn't
+    need to route it again.
+
+    :param RequestMessage request_msg: message received over AMQP/MQTT bus
+        representing the incoming REST request.
+
+    :return: lane of the matched operation. Requests that can't be routed are
+        placed in the read lane, routing errors are reported back once the
+        request gets processed.
+
+    :rtype: RequestLane
     """
-    Determine the correct api handler to invoke and invoke it.
+    try:
+        request_msg.route = _route_request(request_msg)
+    except Exception:
+        return RequestLane.READ
+    return request_msg.route.operation.lane
+
+
+def _route_request(request_msg: RequestMessage):
+    """Determine the operation and handler for an incoming request.
 
     The request URI, api version and HTTP verb are used to determine the
     request operation and the corresponding handler.
 
-    Additionally support for payload verification, query param verification
-    will be added in a later point of time.
-
     URL template matching is also performed to compute values of url template
-    parameters. These computed values, request body and query params are all
-    sent to handlers in form of a dictionary.
+    parameters.
 
-    :param dict message: message received over AMQP/MQTT bus representing the
-        incoming REST request.
-    :param MQTTPublisher mqtt_publisher:
+    :param RequestMessage request_msg: message received over AMQP/MQTT bus
+        representing the incoming REST request.
 
-    :returns: response computed by the handler after processing the request
+    :return: the matched route
+    :rtype: RequestRoute
+
+    :raises MethodNotAllowedRequestError, NotAcceptableRequestError,
+        NotFoundRequestError: if the request doesn't match any handler.
     """
-    LOGGER.debug(f"Incoming request message: {json.dumps(message)}")
+    message = request_msg.message
 
     api_version_header = _parse_accept_header(
         accept_header=message['headers'].get('Accept'))
@@ -907,97 +1125,60 @@ def process_request(message, mqtt_publisher=None):
     if len(url_tokens) > 2:
         url_tokens = url_tokens[2:]
 
-    query_params = None
-    if message['queryString']:
-        query_params = dict(parse_qsl(message['queryString']))
-
-    request_body = None
-    # Should we do a content-type check? and allow only application/json content?  # noqa: E501
-    # Process request body only for requests with HTTP verbs that allow body
-    if method in [RequestMethod.POST,
-                  RequestMethod.PUT,
-                  RequestMethod.DELETE] and \
-            len(message['body']) > 0:
-        raw_body = base64.b64decode(message['body']).decode(sys.getfilesystemencoding())  # noqa: E501
-        request_body = json.loads(raw_body)
-
     import container_service_extension.server.service as cse_service
     server_config = cse_service.Service().get_service_config()
 
-    found = False
-    operation = None
-    handler_method = None
-    url_data = {}
-    for entry in CSE_REQUEST_DISPATCHER_LIST:
-        if found:
-            break
-        if len(entry['url_tokens']) != len(url_tokens):
-            continue
+    matched_handler, url_data = match_route(
+        method, url_tokens, api_version,
+        _get_enabled_feature_flags(server_config))
+    operation = matched_handler['operation']
+    handler_method = matched_handler['handler']
+    # ToDo: Extra validation based on allowed query params, content type etc.  # noqa: E501
 
-        url_matched = True
-        for i in range(0, len(url_tokens)):
-            token = entry['url_tokens'][i]
-            if token.startswith("$"):
-                url_data[token[1:]] = url_tokens[i]
-            else:
-                # Certain url tokens can be singular as well plural
-                # e.g. cluster / clusters. This ensures that we support both
-                # /api/cse/cluster and
-                # /api/cse/clusters
-                # as well as
-                # /api/cse/cluster/{id} and
-                # /api/cse/clusters/{id}
-                target_tag = url_tokens[i].lower()
-                if target_tag in DUAL_FORM_TOKENS:
-                    target_tag = DUAL_FORM_TOKENS[target_tag]
-                else:
-                    target_tag = (target_tag,)
-                if token.lower() not in target_tag:
-                    url_matched = False
-                    url_data.clear()
-                    break
-
-        if not url_matched:
-            continue
+    return RequestRoute(operation=operation,
+                        handler_method=handler_method,
+                        method=method,
+                        url=url,
+                        url_data=url_data)
 
-        if method not in entry.keys():
-            raise cse_exception.MethodNotAllowedRequestError()
-
-        handlers = entry[method]
-        matched_handler = None
-        supported_api_versions = []
-        for versions in handlers.keys():
-            supported_api_versions.extend(list(versions))
-            if api_version in versions or '*' in versions:
-                matched_handler = handlers[versions]
-                break
-
-        if not matched_handler:
-            raise cse_exception.NotAcceptableRequestError(
-                error_message="Invalid api version specified. Expected "
-                              f"api version '{supported_api_versions}'.")
-
-        required_feature_flags = matched_handler.get('feature_flags', {})
-        feature_flags_satisfied = True
-        for feature_flag in required_feature_flags:
-            value = server_config.get_value_at('feature_flags').get(feature_flag, False)  # noqa: E501
-            if not value:
-                LOGGER.debug("Url matched but failed to satisfy feature "
-                             f"flag {feature_flag}")
-                feature_flags_satisfied = False
-                break
-
-        if feature_flags_satisfied:
-            operation = matched_handler['operation']
-            handler_method = matched_handler['handler']
-
-            # ToDo: Extra validation based on allowed query params, content type etc.  # noqa: E501
-            found = True
-        else:
-            break
 
-    if not found:
-        raise cse_exception.NotFoundRequestError()
+@handle_exception
+def process_request(request_msg: RequestMessage, mqtt_publisher=None):
+    """
+    Determine the correct api handler to invoke and invoke it.
+
+    The request is routed to its handler by _route_request(), unless it has
+    already been routed by get_request_lane().
+
+    Additionally support for payload verification, query param verification
+    will be added in a later point of time.
+
+    Computed values of url template parameters, request body and query params
+    are all sent to handlers in form of a dictionary.
+
+    :param RequestMessage request_msg: message received over AMQP/MQTT bus
+        representing the incoming REST request.
+    :param MQTTPublisher mqtt_publisher:
+
+    :returns: response computed by the handler after processing the request
+    """
+    # Message is serialized only if debug logging is enabled
+    LOGGER.debug("Incoming request message: %s", request_msg)
+    message = request_msg.message
+
+    route = request_msg.route
+    if route is None:
+        route = _route_request(request_msg)
+    operation = route.operation
+    handler_method = route.handler_method
+    method = route.method
+    url = route.url
+
+    query_params = None
+    if message['queryString']:
+        query_params = dict(parse_qsl(message['queryString']))
+
+    import container_service_extension.server.service as cse_service
 
     # /system operations are excluded from these checks
     if operation not in (CseOperation.SYSTEM_INFO, CseOperation.SYSTEM_UPDATE):
@@ -1014,13 +1195,23 @@ def process_request(message, mqtt_publisher=None):
         request_data[RequestKey.QUERY_PARAMS] = query_params
         LOGGER.debug(f"query parameters: {query_params}")
 
+    # Should we do a content-type check? and allow only application/json content?  # noqa: E501
+    # Process request body only for requests with HTTP verbs that allow body.
+    # The body is decoded only now that the request has been routed to a
+    # handler.
+    request_body = None
+    if method in [RequestMethod.POST,
+                  RequestMethod.PUT,
+                  RequestMethod.DELETE]:
+        request_body = request_msg.body
+
     # update request_data with request_body
     if request_body:
         request_data[RequestKey.INPUT_SPEC] = request_body
         LOGGER.debug(f"request body: {request_body}")
 
     # update request_data with url template param key-values
-    request_data.update(url_data)
+    request_data.update(route.url_data)
     request_data['url'] = url
 
     # extract out the authorization token
@@ -1037,13 +1228,31 @@ def process_request(message, mqtt_publisher=None):
     operation_ctx = ctx.OperationContext(
         tenant_auth_token,
         request_id=message['id'],
-        mqtt_publisher=mqtt_publisher
+        mqtt_publisher=mqtt_publisher,
+        deadline=deadline_utils.RequestDeadline(
+            operation.timeout, start_time=request_msg.received_time)
     )
 
     try:
+        # Fail fast if the request spent its budget waiting in the queue
+        operation_ctx.get_remaining_time()
         body_content = handler_method(request_data, operation_ctx)
         LOGGER.debug(f"body content: {body_content}")
+    except Exception as err:
+        if tenant_session_cache.is_unauthorized_error(err):
+            operation_ctx.discard_cached_sessions()
+        if not operation_ctx.is_past_deadline():
+            raise
+        deadline_utils.record_request_timeout()
+        LOGGER.warning(f"Request ({message['id']}) for operation "
+                       f"({operation.name}) timed out: {err}")
+        if isinstance(err, cse_exception.RequestTimeoutError):
+            raise
+        raise cse_exception.RequestTimeoutError(
+            error_message=f"Request did not finish within "
+                          f"{operation.timeout} seconds: {err}") from err
     finally:
+        operation_ctx.clear_deadline()
         if not operation_ctx.is_async:
             operation_ctx.end()
 
@@ -19,6 +19,7 @@ Responsibility of the functions in this file:
 
 import container_service_extension.common.constants.server_constants as server_constants  # noqa: E501
 from container_service_extension.common.constants.server_constants import ThreadLocalData  # noqa: E501
+from container_service_extension.common.constants.shared_constants import CLUSTER_LIST_FIELDS_QUERY_PARAM  # noqa: E501
 from container_service_extension.common.constants.shared_constants import ClusterAclKey  # noqa: E501
 from container_service_extension.common.constants.shared_constants import ClusterEntityKind  # noqa: E501
 from container_service_extension.common.constants.shared_constants import CSE_PAGINATION_DEFAULT_PAGE_SIZE  # noqa: E501
@@ -105,6 +106,9 @@ def cluster_create(data: dict, op_ctx: ctx.OperationContext):
 def native_cluster_list(data: dict, op_ctx: ctx.OperationContext):
     """Request handler for cluster list operation.
 
+    Optional query param 'fields' holds the comma separated names of the
+    cluster summary fields to return, instead of the full entities.
+
     :return: List
     """
     svc = cluster_service_factory.ClusterServiceFactory(_get_request_context(op_ctx)).get_cluster_service(skip_tkgm_check=True)  # noqa: E501
@@ -120,10 +124,16 @@ def native_cluster_list(data: dict, op_ctx: ctx.OperationContext):
         del filters[PaginationKey.PAGE_NUMBER]
     if PaginationKey.PAGE_SIZE in filters:
         del filters[PaginationKey.PAGE_SIZE]
+    fields = request_utils.pop_cluster_summary_fields(filters)
 
     # response needs to paginated
-    result = svc.get_clusters_by_page(filters=filters)
-    clusters = [def_entity.to_dict() for def_entity in result[PaginationKey.VALUES]]  # noqa: E501
+    result = svc.get_clusters_by_page(filters=filters, fields=fields)
+    if fields is not None:
+        clusters = [summary.to_dict(fields) for summary in result[PaginationKey.VALUES]]  # noqa: E501
+        # keep the fields in the links to the next and previous pages
+        filters[CLUSTER_LIST_FIELDS_QUERY_PARAM] = ','.join(fields)
+    else:
+        clusters = [def_entity.to_dict() for def_entity in result[PaginationKey.VALUES]]  # noqa: E501
 
     # remove duplicate /api path while forming the endpoint url
     uri = f"{op_ctx.client.get_api_uri().strip('/api')}{data['url']}"
@@ -141,12 +151,19 @@ def native_cluster_list(data: dict, op_ctx: ctx.OperationContext):
 def cluster_list(data: dict, op_ctx: ctx.OperationContext):
     """Request handler for cluster list operation.
 
+    Optional query param 'fields' holds the comma separated names of the
+    cluster summary fields to return, instead of the full entities.
+
     :return: List
     """
     svc = cluster_service_factory.ClusterServiceFactory(_get_request_context(op_ctx)).get_cluster_service(skip_tkgm_check=True)  # noqa: E501
+    filters = data.get(RequestKey.QUERY_PARAMS, {})
+    fields = request_utils.pop_cluster_summary_fields(filters)
     # response should not be paginated
-    return [def_entity.to_dict() for def_entity in
-            svc.list_clusters(data.get(RequestKey.QUERY_PARAMS, {}))]
+    if fields is not None:
+        return [summary.to_dict(fields) for summary in
+                svc.list_clusters(filters, fields=fields)]
+    return [def_entity.to_dict() for def_entity in svc.list_clusters(filters)]
 
 
 @telemetry_handler.record_user_action_telemetry(cse_operation=telemetry_constants.CseOperation.V36_CLUSTER_INFO)  # noqa: E501
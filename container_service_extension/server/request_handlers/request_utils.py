@@ -2,12 +2,15 @@
 # Copyright (c) 2017 VMware, Inc. All Rights Reserved.
 # SPDX-License-Identifier: BSD-2-Clause
 import functools
+from typing import Optional
 
+from container_service_extension.common.constants.shared_constants import CLUSTER_LIST_FIELDS_QUERY_PARAM  # noqa: E501
 from container_service_extension.common.constants.shared_constants import RequestKey  # noqa: E501
 import container_service_extension.exception.exceptions as cse_exception
 from container_service_extension.exception.exceptions import BadRequestError
 from container_service_extension.exception.minor_error_codes import MinorErrorCode  # noqa: E501
 from container_service_extension.logging.logger import SERVER_LOGGER as LOGGER
+from container_service_extension.rde.models.common_models import ClusterSummary  # noqa: E501
 import container_service_extension.rde.utils as rde_utils
 
 
@@ -142,6 +145,26 @@ def validate_request_payload(input_spec: dict, reference_spec: dict,
         raise BadRequestError(err_msg)
 
 
+def pop_cluster_summary_fields(query_params: dict) -> Optional[list]:
+    """Remove the fields query parameter from cluster list query params.
+
+    :param dict query_params: query parameters of the cluster list request
+
+    :return: names of the cluster summary fields requested, or None if the
+        full entities of the clusters are requested
+    :rtype: list
+
+    :raises: BadRequestError if a requested field is unknown
+    """
+    fields_param = query_params.pop(CLUSTER_LIST_FIELDS_QUERY_PARAM, None)
+    if fields_param is None:
+        return None
+    try:
+        return ClusterSummary.parse_fields(fields_param)
+    except ValueError as err:
+        raise BadRequestError(str(err))
+
+
 def cluster_api_exception_handler(func):
     """Decorate to trap exceptions and process them.
 
@@ -5,6 +5,7 @@ import semantic_version
 
 from container_service_extension.common.constants.server_constants import FlattenedClusterSpecKey1X  # noqa: E501
 from container_service_extension.common.constants.server_constants import ThreadLocalData  # noqa: E501
+from container_service_extension.common.constants.shared_constants import CLUSTER_LIST_FIELDS_QUERY_PARAM  # noqa: E501
 from container_service_extension.common.constants.shared_constants import ClusterAclKey  # noqa: E501
 from container_service_extension.common.constants.shared_constants import CSE_PAGINATION_DEFAULT_PAGE_SIZE  # noqa: E501
 from container_service_extension.common.constants.shared_constants import CSE_PAGINATION_FIRST_PAGE_NUMBER  # noqa: E501
@@ -239,7 +240,12 @@ def native_cluster_list(data: dict, op_ctx: ctx.OperationContext):
 
     # Redirect to generic handler if the backend supports RDE-2.0
     if semantic_version.Version(rde_in_use) >= semantic_version.Version(rde_constants.RDEVersion.RDE_2_0_0.value):  # noqa: E501
+        is_summary_requested = CLUSTER_LIST_FIELDS_QUERY_PARAM in \
+            data.get(RequestKey.QUERY_PARAMS, {})
         response_data: dict = cluster_handler.native_cluster_list(data=data, op_ctx=op_ctx)  # noqa: E501
+        if is_summary_requested:
+            # Cluster summaries are the same at every RDE version
+            return response_data
         rde_list: list[dict] = response_data[PaginationKey.VALUES]
         formatted_rde_list = [_convert_rde_to_1_0_format(rde_data) for rde_data in rde_list]  # noqa: E501
         response_data[PaginationKey.VALUES] = formatted_rde_list
@@ -259,10 +265,16 @@ def native_cluster_list(data: dict, op_ctx: ctx.OperationContext):
         del filters[PaginationKey.PAGE_NUMBER]
     if PaginationKey.PAGE_SIZE in filters:
         del filters[PaginationKey.PAGE_SIZE]
+    fields = request_utils.pop_cluster_summary_fields(filters)
 
     # response needs to paginated
-    result = svc.get_clusters_by_page(filters=filters)
-    clusters = [def_entity.to_dict() for def_entity in result[PaginationKey.VALUES]]  # noqa: E501
+    result = svc.get_clusters_by_page(filters=filters, fields=fields)
+    if fields is not None:
+        clusters = [summary.to_dict(fields) for summary in result[PaginationKey.VALUES]]  # noqa: E501
+        # keep the fields in the links to the next and previous pages
+        filters[CLUSTER_LIST_FIELDS_QUERY_PARAM] = ','.join(fields)
+    else:
+        clusters = [def_entity.to_dict() for def_entity in result[PaginationKey.VALUES]]  # noqa: E501
 
     # remove duplicate /api path while forming the endpoint url
     uri = f"{op_ctx.client.get_api_uri().strip('/api')}{data['url']}"
@@ -330,15 +342,24 @@ def cluster_list(data: dict, op_ctx: ctx.OperationContext):
 
     # Redirect to generic handler if the backend supports RDE-2.0
     if semantic_version.Version(rde_in_use) >= semantic_version.Version(rde_constants.RDEVersion.RDE_2_0_0.value):  # noqa: E501
+        is_summary_requested = CLUSTER_LIST_FIELDS_QUERY_PARAM in \
+            data.get(RequestKey.QUERY_PARAMS, {})
         rde_list: list[dict] = cluster_handler.cluster_list(data=data, op_ctx=op_ctx)  # noqa: E501
+        if is_summary_requested:
+            # Cluster summaries are the same at every RDE version
+            return rde_list
         return [_convert_rde_to_1_0_format(rde_data) for rde_data in rde_list]
 
     svc = cluster_service_factory.ClusterServiceFactory(op_ctx). \
         get_cluster_service(rde_in_use)
+    filters = data.get(RequestKey.QUERY_PARAMS, {})
+    fields = request_utils.pop_cluster_summary_fields(filters)
 
     # response should not be paginated
-    return [def_entity.to_dict() for def_entity in
-            svc.list_clusters(data.get(RequestKey.QUERY_PARAMS, {}))]
+    if fields is not None:
+        return [summary.to_dict(fields) for summary in
+                svc.list_clusters(filters, fields=fields)]
+    return [def_entity.to_dict() for def_entity in svc.list_clusters(filters)]
 
 
 @request_utils.cluster_api_exception_handler
@@ -4,6 +4,7 @@
 
 from enum import Enum
 from enum import unique
+import os
 import signal
 import sys
 import threading
@@ -21,13 +22,16 @@ import semantic_version
 import container_service_extension.common.constants.server_constants as server_constants  # noqa: E501
 import container_service_extension.common.constants.shared_constants as shared_constants  # noqa: E501
 import container_service_extension.common.utils.core_utils as utils
+import container_service_extension.common.utils.deadline_utils as deadline_utils  # noqa: E501
 import container_service_extension.common.utils.pyvcloud_utils as vcd_utils
 import container_service_extension.common.utils.server_utils as server_utils
+from container_service_extension.common.utils.task_watcher import TASK_WATCHER  # noqa: E501
 from container_service_extension.common.utils.vsphere_utils import populate_vsphere_list  # noqa: E501
 from container_service_extension.config.server_config import ServerConfig
 import container_service_extension.exception.exceptions as cse_exception
 import container_service_extension.installer.configure_cse as configure_cse
 from container_service_extension.installer.templates.template_rule import TemplateRule  # noqa: E501
+from container_service_extension.lib.cloudapi.connection_pool import CLOUDAPI_CONNECTION_POOL  # noqa: E501
 from container_service_extension.lib.telemetry.constants import CseOperation
 from container_service_extension.lib.telemetry.constants import PayloadKey
 from container_service_extension.lib.telemetry.telemetry_handler \
@@ -38,11 +42,20 @@ import container_service_extension.logging.logger as logger
 from container_service_extension.mqi.consumer.consumer import MessageConsumer
 from container_service_extension.mqi.mqtt_extension_manager import \
     MQTTExtensionManager
+import container_service_extension.rde.backend.common.readiness_probes as readiness_probes  # noqa: E501
+from container_service_extension.rde.common.cluster_index import CLUSTER_INDEX  # noqa: E501
+from container_service_extension.rde.common.cluster_index import CLUSTER_INDEX_FIELDS  # noqa: E501
+import container_service_extension.rde.common.entity_service as def_entity_svc
+import container_service_extension.rde.common.entity_update_buffer as entity_update_buffer  # noqa: E501
+from container_service_extension.rde.common.rde_cache import RDE_CACHE
 import container_service_extension.rde.constants as def_constants
 import container_service_extension.rde.models.common_models as common_models
 import container_service_extension.rde.schema_service as def_schema_svc
 import container_service_extension.rde.utils as def_utils
 from container_service_extension.rde.utils import raise_error_if_def_not_supported  # noqa: E501
+from container_service_extension.security.context.role_rights_cache import ROLE_RIGHTS_CACHE  # noqa: E501
+from container_service_extension.security.context.sysadmin_session_pool import SYSADMIN_SESSION_POOL  # noqa: E501
+from container_service_extension.security.context.tenant_session_cache import TENANT_SESSION_CACHE  # noqa: E501
 import container_service_extension.server.compute_policy_manager \
     as compute_policy_manager
 from container_service_extension.server.pks.pks_cache import PksCache
@@ -64,6 +77,13 @@ def signal_handler(signal_in, frame):
     raise KeyboardInterrupt()
 
 
+def worker_signal_handler(signal_in, frame):
+    # Supervisor asked this worker process to stop. Further signals are
+    # ignored, so that they can't interrupt the graceful shutdown.
+    signal.signal(signal_in, signal.SIG_IGN)
+    raise KeyboardInterrupt()
+
+
 def consumer_thread_run(c):
     try:
         logger.SERVER_LOGGER.info(f"About to start consumer_thread {c}.")
@@ -85,8 +105,10 @@ def watchdog_thread_run(service_obj, num_processors):
         if service_state == ServerState.RUNNING.value and \
                 service_obj.consumer_thread is not None and \
                 not service_obj.consumer_thread.is_alive():
-            service_obj.consumer = MessageConsumer(service_obj.config,
-                                                   num_processors)
+            service_obj.consumer = MessageConsumer(
+                service_obj.config,
+                num_processors,
+                worker_id=service_obj.get_worker_id())
             consumer_thread = Thread(name=server_constants.MESSAGE_CONSUMER_THREAD,  # noqa: E501
                                      target=consumer_thread_run,
                                      args=(service_obj.consumer, ))
@@ -220,6 +242,20 @@ class Service(object, metaclass=Singleton):
         self.consumer = None
         self.consumer_thread = None
         self._consumer_watchdog = None
+        self._worker_context = None
+
+    def set_worker_context(self, worker_context):
+        """Run this server as one of many worker processes.
+
+        :param worker_supervisor.WorkerContext worker_context: identity of
+            this worker, and state shared with its peers.
+        """
+        self._worker_context = worker_context
+
+    def get_worker_id(self) -> Optional[int]:
+        if self._worker_context is None:
+            return None
+        return self._worker_context.worker_id
 
     def get_service_config(self) -> ServerConfig:
         return self.config
@@ -249,20 +285,66 @@ class Service(object, metaclass=Singleton):
         result[shared_constants.CSE_SERVER_SUPPORTED_API_VERSIONS] = self.config.get_value_at('service.supported_api_versions')  # noqa: E501
         result[shared_constants.CSE_SERVER_LEGACY_MODE] = self.config.get_value_at('service.legacy_mode')  # noqa: E501
         if get_sysadmin_info:
-            result['all_consumer_threads'] = 0 if self.consumer is None else \
-                self.consumer.get_num_total_threads()
+            result.update(self.get_consumer_stats())
             result['all_threads'] = threading.activeCount()
-            result['requests_in_progress'] = self.active_requests_count()
             result['config_file'] = self.config_file
             result['status'] = self.get_status()
+            if self._worker_context is not None:
+                result['workers'] = self._worker_context.get_workers_info()
         else:
             del result['python']
         return result
 
+    def get_consumer_stats(self) -> Dict:
+        return {
+            'all_consumer_threads': 0 if self.consumer is None
+            else self.consumer.get_num_total_threads(),
+            'requests_in_progress': self.active_requests_count(),
+            'requests_timed_out':
+                deadline_utils.get_num_timed_out_requests(),
+            'request_queue': {} if self.consumer is None
+            else self.consumer.get_queue_stats(),
+            'request_idempotency_cache': {} if self.consumer is None
+            else self.consumer.get_idempotency_cache_stats(),
+            'tenant_session_cache': TENANT_SESSION_CACHE.get_stats(),
+            'sysadmin_session_pool': SYSADMIN_SESSION_POOL.get_stats(),
+            'cloudapi_connection_pool':
+                CLOUDAPI_CONNECTION_POOL.get_stats(),
+            'role_rights_cache': ROLE_RIGHTS_CACHE.get_stats(),
+            'rde_cache': RDE_CACHE.get_stats(),
+            'entity_update_buffer': entity_update_buffer.get_stats(),
+            'cluster_index': CLUSTER_INDEX.get_stats(),
+            'task_watcher': TASK_WATCHER.get_stats(),
+            'readiness_probes': readiness_probes.get_stats()
+        }
+
     def get_native_cluster_entity_type(self) -> common_models.DefEntityType:
         return self._nativeEntityType
 
     def update_status(self, server_action: shared_constants.ServerAction):
+        try:
+            return self._update_status(server_action)
+        finally:
+            if self._worker_context is not None:
+                # Let peer worker processes follow the state change
+                self._worker_context.set_shared_server_state(
+                    self._state.value)
+
+    def _sync_with_peer_workers(self):
+        shared_state = self._worker_context.get_shared_server_state()
+        if shared_state is not None and shared_state != self._state.value:
+            logger.SERVER_LOGGER.info(
+                f"Changing server state to '{shared_state}' to match peer "
+                f"worker processes")
+            self._state = ServerState(shared_state)
+
+    def _publish_worker_stats(self):
+        stats = self.get_consumer_stats()
+        stats['pid'] = os.getpid()
+        stats['status'] = self.get_status()
+        self._worker_context.publish_stats(stats)
+
+    def _update_status(self, server_action: shared_constants.ServerAction):
         def graceful_shutdown():
             message = 'Shutting down CSE'
             n = self.active_requests_count()
@@ -335,112 +417,29 @@ class Service(object, metaclass=Singleton):
             if sysadmin_client:
                 sysadmin_client.logout()
 
-        if server_utils.should_use_mqtt_protocol(self.config):
-            # Store/setup MQTT extension, api filter, and token info
-            try:
-                sysadmin_client = \
-                    vcd_utils.get_sys_admin_client(api_version=None)
-                mqtt_ext_manager = MQTTExtensionManager(sysadmin_client)
-                ext_info = mqtt_ext_manager.get_extension_info(
-                    ext_name=server_constants.CSE_SERVICE_NAME,
-                    ext_version=server_constants.MQTT_EXTENSION_VERSION,
-                    ext_vendor=server_constants.MQTT_EXTENSION_VENDOR)
-                ext_urn_id = ext_info[server_constants.MQTTExtKey.EXT_URN_ID]
-                ext_uuid = mqtt_ext_manager.get_extension_uuid(ext_urn_id)
-                api_filters_status = mqtt_ext_manager.check_api_filters_setup(
-                    ext_uuid, configure_cse.API_FILTER_PATTERNS)
-                if not api_filters_status:
-                    msg = 'MQTT Api filter is not set up'
-                    logger.SERVER_LOGGER.error(msg)
-                    raise cse_exception.MQTTExtensionError(msg)
-
-                token_info = mqtt_ext_manager.setup_extension_token(
-                    token_name=server_constants.MQTT_TOKEN_NAME,
-                    ext_name=server_constants.CSE_SERVICE_NAME,
-                    ext_version=server_constants.MQTT_EXTENSION_VERSION,
-                    ext_vendor=server_constants.MQTT_EXTENSION_VENDOR,
-                    ext_urn_id=ext_urn_id
-                )
-
-                for key, value in ext_info.items():
-                    self.config.set_value_at(f"mqtt.{key}", value)
-                for key, value in token_info.items():
-                    self.config.set_value_at(f"mqtt.{key}", value)
-                self.config.set_value_at(
-                    f"mqtt.{server_constants.MQTTExtKey.EXT_UUID}", ext_uuid
-                )
-            except Exception as err:
-                msg = f'MQTT extension setup error: {err}'
-                logger.SERVER_LOGGER.error(msg)
-                raise err
-            finally:
-                if sysadmin_client:
-                    sysadmin_client.logout()
+        # Worker processes get the config prepared by the supervisor
+        if self._worker_context is None:
+            self.run_one_time_startup(msg_update_callback=msg_update_callback)
 
         if not server_utils.is_no_vc_communication_mode(self.config):
-            populate_vsphere_list(self.config.get_value_at('vcs'))
+            try:
+                max_concurrent_guest_operations = self.config.get_value_at(
+                    'service.max_concurrent_guest_operations_per_vcenter')
+            except KeyError:
+                max_concurrent_guest_operations = \
+                    server_constants.DEFAULT_MAX_CONCURRENT_GUEST_OPERATIONS_PER_VCENTER  # noqa: E501
+            populate_vsphere_list(
+                self.config.get_value_at('vcs'),
+                max_concurrent_guest_operations_per_vcenter=int(
+                    max_concurrent_guest_operations))
 
         # Load def entity-type and interface
         self._load_def_schema(msg_update_callback=msg_update_callback)
 
-        # Read k8s catalog definition from catalog item metadata and append
-        # the same to to server run-time config
-        if not server_utils.is_no_vc_communication_mode(self.config):
-            native_templates = \
-                template_reader.read_native_template_definition_from_catalog(
-                    config=self.config,
-                    msg_update_callback=msg_update_callback
-                )
-            self.config.set_value_at('broker.templates', native_templates)
-        else:
-            msg = "Skipping loading k8s template definition from catalog " \
-                  "since `No communication with VCenter` mode is on."
-            logger.SERVER_LOGGER.info(msg)
-            msg_update_callback.general_no_color(msg)
-            self.config.set_value_at('broker.templates', [])
-
-        # Read TKGm catalog definition from catalog item metadata and append
-        # the same to to server run-time config
-
-        tkgm_templates = \
-            template_reader.read_tkgm_template_definition_from_catalog(
-                config=self.config,
-                msg_update_callback=msg_update_callback
-            )
-        self.config.set_value_at('broker.tkgm_templates', tkgm_templates)
-
         self._load_placement_policy_details(
             msg_update_callback=msg_update_callback
         )
 
-        if self.config.get_value_at('service.legacy_mode'):
-            # Read templates rules from config and update template definition
-            # in server run-time config
-            self._process_template_rules(
-                msg_update_callback=msg_update_callback
-            )
-
-            # Make sure that all vms in templates are compliant with the
-            # compute policy specified in template definition (can be affected
-            # by rules).
-            self._process_template_compute_policy_compliance(
-                msg_update_callback=msg_update_callback
-            )
-        else:
-            msg = "Template rules are not supported by CSE for vCD api " \
-                  "version 35.0 or above. Skipping template rule processing."
-            msg_update_callback.info(msg)
-            logger.SERVER_LOGGER.debug(msg)
-
-        if self.should_check_config:
-            # TODO: find a better way to get the raw dictionary from the object
-            # this method is also called via CSE server cli,
-            # so can't force this method to accept a ServerConfig object
-            configure_cse.check_cse_installation(
-                self.config._config,
-                msg_update_callback=msg_update_callback
-            )
-
         try:
             pks_config = self.config.get_value_at('pks_config')
             if pks_config:
@@ -454,10 +453,36 @@ class Service(object, metaclass=Singleton):
         except KeyError:
             pass
 
+        try:
+            pool_maxsize = self.config.get_value_at(
+                'service.cloudapi_connection_pool_size')
+            CLOUDAPI_CONNECTION_POOL.configure(pool_maxsize=pool_maxsize)
+        except KeyError:
+            pass
+
+        try:
+            cluster_index_refresh_interval = self.config.get_value_at(
+                'service.cluster_index_refresh_interval')
+        except KeyError:
+            cluster_index_refresh_interval = \
+                server_constants.DEFAULT_CLUSTER_INDEX_REFRESH_INTERVAL_SEC
+        if cluster_index_refresh_interval and \
+                self._nativeEntityType is not None:
+            # Warms the index, and keeps it reconciled with vCD
+            CLUSTER_INDEX.start(
+                entity_type_id=self._nativeEntityType.id,
+                refresh_interval=cluster_index_refresh_interval,
+                list_clusters=self._list_cluster_summaries)
+            msg = f"Started cluster index, refreshed every " \
+                  f"{cluster_index_refresh_interval} seconds"
+            msg_update_callback.general(msg)
+            logger.SERVER_LOGGER.info(msg)
+
         num_processors = self.config.get_value_at('service.processors')
         name = server_constants.MESSAGE_CONSUMER_THREAD
         try:
-            self.consumer = MessageConsumer(self.config, num_processors)
+            self.consumer = MessageConsumer(self.config, num_processors,
+                                            worker_id=self.get_worker_id())
             consumer_thread = Thread(name=name, target=consumer_thread_run,
                                      args=(self.consumer, ))
             consumer_thread.daemon = True
@@ -500,7 +525,10 @@ class Service(object, metaclass=Singleton):
                   f"{logger.SERVER_DEBUG_LOG_FILEPATH}" \
                   f"\nwaiting for requests (ctrl+c to close)"
 
-        signal.signal(signal.SIGINT, signal_handler)
+        if self._worker_context is None:
+            signal.signal(signal.SIGINT, signal_handler)
+        else:
+            signal.signal(signal.SIGTERM, worker_signal_handler)
         msg_update_callback.general_no_color(message)
         logger.SERVER_LOGGER.info(message)
 
@@ -514,9 +542,16 @@ class Service(object, metaclass=Singleton):
                                    cse_params=cse_params)
         record_user_action(cse_operation=CseOperation.SERVICE_RUN)
 
+        last_stats_publish_time = 0
         while True:
             try:
                 time.sleep(1)
+                if self._worker_context is not None:
+                    self._sync_with_peer_workers()
+                    if time.time() - last_stats_publish_time >= \
+                            server_constants.WORKER_STATS_PUBLISH_INTERVAL_SEC:  # noqa: E501
+                        self._publish_worker_stats()
+                        last_stats_publish_time = time.time()
                 if self._state == ServerState.STOPPING and \
                         self.active_requests_count() == 0:
                     break
@@ -535,10 +570,144 @@ class Service(object, metaclass=Singleton):
             self.consumer.stop()
         except Exception:
             logger.SERVER_LOGGER.error(traceback.format_exc())
+        CLUSTER_INDEX.stop()
+        TASK_WATCHER.stop()
+        SYSADMIN_SESSION_POOL.close()
+        CLOUDAPI_CONNECTION_POOL.close()
 
         self._state = ServerState.STOPPED
         logger.SERVER_LOGGER.info("Done")
 
+    def run_one_time_startup(self, msg_update_callback=utils.NullPrinter()):
+        """Prepare vCD and the server runtime config for the server to run.
+
+        Sets up the MQTT extension token, reads templates, processes template
+        rules and compute policies, and checks CSE installation. Setting up
+        the token revokes the tokens issued before, so in multi-process mode
+        the supervisor runs this once before starting the workers, which get
+        the resulting config, and workers skip it.
+
+        :param utils.ConsoleMessagePrinter msg_update_callback: Callback
+            object.
+        """
+        sysadmin_client = None
+        if server_utils.should_use_mqtt_protocol(self.config):
+            # Store/setup MQTT extension, api filter, and token info
+            try:
+                sysadmin_client = \
+                    vcd_utils.get_sys_admin_client(api_version=None)
+                mqtt_ext_manager = MQTTExtensionManager(sysadmin_client)
+                ext_info = mqtt_ext_manager.get_extension_info(
+                    ext_name=server_constants.CSE_SERVICE_NAME,
+                    ext_version=server_constants.MQTT_EXTENSION_VERSION,
+                    ext_vendor=server_constants.MQTT_EXTENSION_VENDOR)
+                ext_urn_id = ext_info[server_constants.MQTTExtKey.EXT_URN_ID]
+                ext_uuid = mqtt_ext_manager.get_extension_uuid(ext_urn_id)
+                api_filters_status = mqtt_ext_manager.check_api_filters_setup(
+                    ext_uuid, configure_cse.API_FILTER_PATTERNS)
+                if not api_filters_status:
+                    msg = 'MQTT Api filter is not set up'
+                    logger.SERVER_LOGGER.error(msg)
+                    raise cse_exception.MQTTExtensionError(msg)
+
+                token_info = mqtt_ext_manager.setup_extension_token(
+                    token_name=server_constants.MQTT_TOKEN_NAME,
+                    ext_name=server_constants.CSE_SERVICE_NAME,
+                    ext_version=server_constants.MQTT_EXTENSION_VERSION,
+                    ext_vendor=server_constants.MQTT_EXTENSION_VENDOR,
+                    ext_urn_id=ext_urn_id
+                )
+
+                for key, value in ext_info.items():
+                    self.config.set_value_at(f"mqtt.{key}", value)
+                for key, value in token_info.items():
+                    self.config.set_value_at(f"mqtt.{key}", value)
+                self.config.set_value_at(
+                    f"mqtt.{server_constants.MQTTExtKey.EXT_UUID}", ext_uuid
+                )
+            except Exception as err:
+                msg = f'MQTT extension setup error: {err}'
+                logger.SERVER_LOGGER.error(msg)
+                raise err
+            finally:
+                if sysadmin_client:
+                    sysadmin_client.logout()
+
+        # Read k8s catalog definition from catalog item metadata and append
+        # the same to to server run-time config
+        if not server_utils.is_no_vc_communication_mode(self.config):
+            native_templates = \
+                template_reader.read_native_template_definition_from_catalog(
+                    config=self.config,
+                    msg_update_callback=msg_update_callback
+                )
+            self.config.set_value_at('broker.templates', native_templates)
+        else:
+            msg = "Skipping loading k8s template definition from catalog " \
+                  "since `No communication with VCenter` mode is on."
+            logger.SERVER_LOGGER.info(msg)
+            msg_update_callback.general_no_color(msg)
+            self.config.set_value_at('broker.templates', [])
+
+        # Read TKGm catalog definition from catalog item metadata and append
+        # the same to to server run-time config
+
+        tkgm_templates = \
+            template_reader.read_tkgm_template_definition_from_catalog(
+                config=self.config,
+                msg_update_callback=msg_update_callback
+            )
+        self.config.set_value_at('broker.tkgm_templates', tkgm_templates)
+
+        if self.config.get_value_at('service.legacy_mode'):
+            # Read templates rules from config and update template definition
+            # in server run-time config
+            self._process_template_rules(
+                msg_update_callback=msg_update_callback
+            )
+
+            # Make sure that all vms in templates are compliant with the
+            # compute policy specified in template definition (can be affected
+            # by rules).
+            self._process_template_compute_policy_compliance(
+                msg_update_callback=msg_update_callback
+            )
+        else:
+            msg = "Template rules are not supported by CSE for vCD api " \
+                  "version 35.0 or above. Skipping template rule processing."
+            msg_update_callback.info(msg)
+            logger.SERVER_LOGGER.debug(msg)
+
+        if self.should_check_config:
+            # TODO: find a better way to get the raw dictionary from the object
+            # this method is also called via CSE server cli,
+            # so can't force this method to accept a ServerConfig object
+            configure_cse.check_cse_installation(
+                self.config._config,
+                msg_update_callback=msg_update_callback
+            )
+
+    def _list_cluster_summaries(self) -> List[common_models.ClusterSummary]:
+        """List the summaries of all native clusters, for the cluster index.
+
+        :rtype: list
+        """
+        pooled_session = SYSADMIN_SESSION_POOL.borrow(api_version=None)
+        try:
+            cloudapi_client = \
+                vcd_utils.get_cloudapi_client_from_vcd_client(
+                    client=pooled_session.client,
+                    logger_debug=logger.SERVER_LOGGER
+                )
+            entity_svc = def_entity_svc.DefEntityService(cloudapi_client)
+            return list(entity_svc.list_entities_by_entity_type(
+                vendor=self._nativeEntityType.vendor,
+                nss=self._nativeEntityType.nss,
+                version=self._nativeEntityType.version,
+                summary_fields=CLUSTER_INDEX_FIELDS))
+        finally:
+            SYSADMIN_SESSION_POOL.release(pooled_session)
+
     def _load_def_schema(self, msg_update_callback=utils.NullPrinter()):
         """Load cluster interface and cluster entity type to global context.
 
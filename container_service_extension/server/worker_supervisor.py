@@ -0,0 +1,267 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Supervisor of CSE server worker processes.
+
+In multi-process mode (`cse run --workers N`), the parent process doesn't
+process any requests itself. It starts N worker processes, each of which runs
+a complete CSE server (Service) with its own message consumer. All consumers
+listen on the same AMQP queue, or the same MQTT shared subscription, so the
+message bus load balances requests across workers.
+
+The parent
+* runs the one-time startup of the server (MQTT extension token, templates,
+  installation checks) before starting the workers, which get the resulting
+  config. A token set up by a worker would revoke the tokens of its peers,
+* restarts workers that die unexpectedly,
+* aggregates health and counters published by the workers, and makes the
+  aggregate available to the workers, so that `cse system info` reports them,
+* on SIGINT/SIGTERM asks every worker to stop gracefully, and waits for them
+  to finish processing in-flight requests.
+
+Server state changes (enable/disable/stop) requested through any worker are
+propagated to all workers via shared state.
+"""
+
+import multiprocessing
+from multiprocessing.managers import SyncManager
+import os
+import signal
+import time
+import traceback
+
+import container_service_extension.common.constants.server_constants as server_constants  # noqa: E501
+import container_service_extension.common.utils.core_utils as utils
+from container_service_extension.lib.cloudapi.connection_pool import CLOUDAPI_CONNECTION_POOL  # noqa: E501
+import container_service_extension.logging.logger as logger
+import container_service_extension.server.service as cse_service
+
+# Keys under which shared state is stored
+WORKER_STATE_KEY = 'state'
+AGGREGATE_STATS_KEY = 'aggregate'
+
+# Counters that are summed up across workers
+_ADDITIVE_STATS = {
+    'requests_in_progress': (),
+    'requests_timed_out': (),
+    'all_consumer_threads': (),
+    'request_queue': ('max_workers', 'busy_threads', 'max_queue_size',
+                      'queue_depth', 'requests_rejected', 'requests_expired'),
+    'request_idempotency_cache': ('requests_in_progress',
+                                  'responses_cached', 'hits', 'misses',
+                                  'evictions'),
+    'tenant_session_cache': ('sessions_cached', 'hits', 'misses', 'evictions'),
+    'sysadmin_session_pool': ('sessions', 'sessions_idle', 'sessions_borrowed',
+                              'sessions_detached', 'logins', 'login_failures',
+                              'logouts', 'refreshes', 'keepalives', 'borrows',
+                              'waits', 'wait_timeouts', 'detaches'),
+    'cloudapi_connection_pool': ('hosts', 'requests', 'connections_opened',
+                                 'pool_hits'),
+    'role_rights_cache': ('roles_cached', 'hits', 'misses', 'invalidations'),
+    'rde_cache': ('entities_cached', 'revalidations', 'not_modified',
+                  'invalidations'),
+    'entity_update_buffer': ('updates', 'deferred_updates', 'writes',
+                             'discards', 'coalesced_updates'),
+    'cluster_index': ('clusters_indexed', 'queries', 'stale_queries',
+                      'unsupported_queries', 'updates', 'removals',
+                      'reconciles', 'reconcile_failures', 'drifts'),
+    'task_watcher': ('tasks_watched', 'tasks_in_progress', 'tasks_finished',
+                     'tasks_failed', 'status_queries',
+                     'status_query_failures', 'task_gets',
+                     'task_get_failures'),
+    'readiness_probes': tuple(
+        f"{phase.value}_{counter}"
+        for phase in server_constants.ReadinessProbePhase
+        for counter in ('waits', 'waits_out_of_budget', 'wait_sec'))
+}
+
+
+class WorkerContext:
+    """Identity of a worker process, and state it shares with its peers."""
+
+    def __init__(self, worker_id, num_workers, shared_state, worker_stats):
+        self.worker_id = worker_id
+        self.num_workers = num_workers
+        self.shared_state = shared_state
+        self.worker_stats = worker_stats
+
+    def get_shared_server_state(self):
+        return self.shared_state.get(WORKER_STATE_KEY)
+
+    def set_shared_server_state(self, state):
+        self.shared_state[WORKER_STATE_KEY] = state
+
+    def publish_stats(self, stats):
+        self.worker_stats[self.worker_id] = stats
+
+    def get_workers_info(self):
+        return {
+            'worker_id': self.worker_id,
+            'num_workers': self.num_workers,
+            AGGREGATE_STATS_KEY: self.shared_state.get(AGGREGATE_STATS_KEY, {})  # noqa: E501
+        }
+
+
+def aggregate_worker_stats(all_stats):
+    """Sum up counters published by the workers.
+
+    :param list all_stats: list of dicts, as published by the workers.
+
+    :return: aggregated counters, along with the number of live workers.
+    :rtype: dict
+    """
+    aggregate = {'live_workers': len(all_stats)}
+    for key, sub_keys in _ADDITIVE_STATS.items():
+        if not sub_keys:
+            aggregate[key] = sum(stats.get(key, 0) for stats in all_stats)
+            continue
+        aggregate[key] = {}
+        for sub_key in sub_keys:
+            aggregate[key][sub_key] = sum(
+                stats.get(key, {}).get(sub_key, 0) for stats in all_stats)
+
+    # Request queue counters are also summed up per request lane
+    queue_sub_keys = _ADDITIVE_STATS['request_queue']
+    aggregate['request_queue']['lanes'] = {}
+    for lane in server_constants.RequestLane:
+        all_lane_stats = [
+            stats.get('request_queue', {}).get('lanes', {}).get(lane.value, {})
+            for stats in all_stats
+        ]
+        aggregate['request_queue']['lanes'][lane.value] = {
+            sub_key: sum(lane_stats.get(sub_key, 0)
+                         for lane_stats in all_lane_stats)
+            for sub_key in queue_sub_keys
+        }
+    return aggregate
+
+
+def _ignore_sigint():
+    # Ctrl+C is delivered to the whole process group. Only the supervisor
+    # should react to it, it will then ask every worker to stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _worker_process_run(worker_context, service_kwargs, should_print):
+    _ignore_sigint()
+    msg_update_callback = utils.ConsoleMessagePrinter() if should_print \
+        else utils.NullPrinter()
+    try:
+        service = cse_service.Service(**service_kwargs)
+        service.set_worker_context(worker_context)
+        service.run(msg_update_callback=msg_update_callback)
+    except Exception:
+        logger.SERVER_LOGGER.error(traceback.format_exc())
+        raise
+
+
+class WorkerSupervisor:
+    def __init__(self, num_workers, service_kwargs,
+                 msg_update_callback=utils.NullPrinter()):
+        """Create a supervisor of CSE server worker processes.
+
+        :param int num_workers: number of worker processes.
+        :param dict service_kwargs: keyword arguments used to construct
+            Service in every worker process.
+        :param utils.ConsoleMessagePrinter msg_update_callback: Callback
+            object.
+        """
+        self.num_workers = num_workers
+        self.service_kwargs = service_kwargs
+        self.msg_update_callback = msg_update_callback
+        self._manager = None
+        self._shared_state = None
+        self._worker_stats = None
+        self._processes = {}
+        self._is_stopping = False
+
+    def run(self):
+        service = cse_service.Service(**self.service_kwargs)
+        service.run_one_time_startup(
+            msg_update_callback=self.msg_update_callback)
+        # Workers skip the one-time startup, they are started with the config
+        # it produced. Forked workers also inherit the Service instance, but
+        # workers started with spawn or forkserver build their own.
+        self.service_kwargs = dict(
+            self.service_kwargs,
+            config=service.get_service_config()._config)
+        # Workers must not share connections opened by this process
+        CLOUDAPI_CONNECTION_POOL.close()
+
+        # The manager runs in its own process, which must outlive the
+        # workers during a graceful shutdown.
+        self._manager = SyncManager()
+        self._manager.start(_ignore_sigint)
+        self._shared_state = self._manager.dict()
+        self._worker_stats = self._manager.dict()
+
+        signal.signal(signal.SIGINT, self._on_stop_signal)
+        signal.signal(signal.SIGTERM, self._on_stop_signal)
+
+        for worker_id in range(self.num_workers):
+            self._start_worker(worker_id)
+
+        try:
+            while self._processes:
+                time.sleep(server_constants.WORKER_SUPERVISOR_POLL_SEC)
+                self._supervise()
+        finally:
+            self._manager.shutdown()
+
+        msg = "All CSE worker processes have stopped"
+        self.msg_update_callback.general_no_color(msg)
+        logger.SERVER_LOGGER.info(msg)
+
+    def _start_worker(self, worker_id):
+        worker_context = WorkerContext(
+            worker_id=worker_id,
+            num_workers=self.num_workers,
+            shared_state=self._shared_state,
+            worker_stats=self._worker_stats)
+        process = multiprocessing.Process(
+            name=f"{server_constants.WORKER_PROCESS_NAME_PREFIX}{worker_id}",
+            target=_worker_process_run,
+            args=(worker_context, self.service_kwargs, worker_id == 0))
+        process.start()
+        self._processes[worker_id] = process
+        msg = f"Started worker process {worker_id} ({process.pid})"
+        self.msg_update_callback.general(msg)
+        logger.SERVER_LOGGER.info(msg)
+
+    def _supervise(self):
+        server_state = self._shared_state.get(WORKER_STATE_KEY)
+        if server_state in (cse_service.ServerState.STOPPING.value,
+                            cse_service.ServerState.STOPPED.value):
+            self._is_stopping = True
+
+        for worker_id, process in list(self._processes.items()):
+            if process.is_alive():
+                continue
+            del self._processes[worker_id]
+            self._worker_stats.pop(worker_id, None)
+            if self._is_stopping:
+                logger.SERVER_LOGGER.info(
+                    f"Worker process {worker_id} ({process.pid}) exited")
+                continue
+            msg = f"Worker process {worker_id} ({process.pid}) exited " \
+                  f"unexpectedly with code {process.exitcode}, restarting it"
+            self.msg_update_callback.general_no_color(msg)
+            logger.SERVER_LOGGER.warning(msg)
+            self._start_worker(worker_id)
+
+        aggregate = aggregate_worker_stats(list(self._worker_stats.values()))
+        self._shared_state[AGGREGATE_STATS_KEY] = aggregate
+        logger.SERVER_LOGGER.debug(f"Aggregated worker stats: {aggregate}")
+
+    def _on_stop_signal(self, signal_in, frame):
+        if self._is_stopping:
+            return
+        self._is_stopping = True
+        msg = f"Stopping {len(self._processes)} CSE worker processes, " \
+              f"waiting for in-flight requests to finish"
+        self.msg_update_callback.general_no_color(msg)
+        logger.SERVER_LOGGER.info(msg)
+        for process in self._processes.values():
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
@@ -0,0 +1,227 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Micro-benchmark of the compiled serializers of the RDE models.
+
+Converts a corpus of RDEs from and to dicts, with the serializers generated
+by compiled_serializers and with dataclasses_json, checks that both produce
+the same output, and times both.
+
+The corpus is made of sample clusters of every RDE version with a growing
+number of nodes, plus the RDEs in the json files passed as arguments. Those
+can hold a single entity or a page of entities, as returned by
+GET /cloudapi/1.0.0/entities/<id> or
+GET /cloudapi/1.0.0/entities/types/vmware/nativeCluster/<version>.
+
+Usage:
+    python tests/benchmark_rde_serializers.py [-n num_iterations]
+        [rde.json ...]
+"""
+
+import argparse
+import copy
+import json
+import timeit
+
+import yaml
+
+# pyvcloud_utils must be imported before the models (import cycle)
+import container_service_extension.common.utils.pyvcloud_utils  # noqa: F401,E501
+from container_service_extension.rde.models.common_models import DefEntity
+import container_service_extension.rde.models.compiled_serializers as compiled_serializers  # noqa: E501
+import container_service_extension.rde.models.rde_1_0_0 as rde_1_0_0
+import container_service_extension.rde.models.rde_2_1_0 as rde_2_1_0
+
+ENTITY_TYPE_PREFIX = 'urn:vcloud:type:cse:nativeCluster'
+SAMPLE_NUM_WORKERS = (0, 3, 10, 50)
+# Size of a kubeconfig with embedded certificates
+SAMPLE_KUBECONFIG_SIZE = 5500
+
+
+def _get_sample_spec(native_entity_class):
+    # The sample specification is yaml with comments
+    return yaml.safe_load(
+        native_entity_class.get_sample_native_cluster_specification())
+
+
+def _get_sample_rde_2_1_0(num_workers):
+    entity = _get_sample_spec(rde_2_1_0.NativeEntity)
+    workers = [{
+        'name': f"node-{i}",
+        'ip': f"10.150.0.{i + 10}",
+        'sizingClass': 'Medium_sizing_policy_name',
+        'storageProfile': 'Silver_storage_profile',
+        'cpu': 2,
+        'memory': 4096
+    } for i in range(num_workers)]
+    entity['status'] = {
+        'phase': 'CREATE:SUCCEEDED',
+        'cni': 'antrea 0.11.3',
+        'taskHref': 'https://vcd.example.com/api/task/1234',
+        'kubernetes': 'upstream 1.20.8',
+        'dockerVersion': None,
+        'os': 'ubuntu-20.04',
+        'externalIp': None,
+        'nodes': {
+            'controlPlane': {
+                'name': 'mstr-abcd',
+                'ip': '10.150.0.2',
+                'sizingClass': 'Large_sizing_policy_name',
+                'storageProfile': 'Gold_storage_profile_name',
+                'cpu': 4,
+                'memory': 8192
+            },
+            'workers': workers,
+            'nfs': [{
+                'name': 'nfsd-abcd',
+                'ip': '10.150.0.3',
+                'exports': ['/export/vol1', '/export/vol2']
+            }]
+        },
+        'uid': 'urn:vcloud:entity:cse:nativeCluster:1234',
+        'cloudProperties': {
+            'site': 'https://vcd.example.com',
+            'orgName': 'org1',
+            'virtualDataCenterName': 'ovdc1',
+            'ovdcNetworkName': 'net1',
+            'distribution': {
+                'templateName': 'ubuntu-20.04_k8-1.20_weave-2.8.1',
+                'templateRevision': 1
+            },
+            'sshKey': 'ssh-rsa AAAA',
+            'rollbackOnFailure': True,
+            'exposed': False
+        },
+        'persistentVolumes': None,
+        'virtualIPs': None,
+        'private': {
+            'kubeConfig': 'k' * SAMPLE_KUBECONFIG_SIZE,
+            'kubeToken': None,
+            'certificates': None
+        },
+        'csi': [{
+            'default': True,
+            'name': 'cloud-director-named-disk-csi-driver',
+            'version': '1.1.0',
+            'defaultK8sStorageClass': {
+                'vcdStorageProfileName': '*',
+                'k8sStorageClassName': 'default-storage-class',
+                'filesystem': 'ext4',
+                'useDeleteReclaimPolicy': True
+            }
+        }],
+        'cpi': {'name': 'cpi for cloud director', 'version': '1.1.0'},
+        'tkgCorePackages': {'kappController': None, 'metricsServer': None}
+    }
+    return entity
+
+
+def _get_sample_rde_1_0_0(num_workers):
+    entity = _get_sample_spec(rde_1_0_0.NativeEntity)
+    entity['status'] = {
+        'phase': 'CREATE:SUCCEEDED',
+        'cni': 'weave 2.6.5',
+        'task_href': 'https://vcd.example.com/api/task/1234',
+        'kubernetes': 'upstream 1.18.6',
+        'docker_version': '19.03.12',
+        'os': 'ubuntu 16.04',
+        'nodes': {
+            'control_plane': {'name': 'mstr-abcd', 'ip': '10.150.0.2',
+                              'sizing_class': None},
+            'workers': [{'name': f"node-{i}", 'ip': f"10.150.0.{i + 10}",
+                         'sizing_class': None}
+                        for i in range(num_workers)],
+            'nfs': []
+        },
+        'exposed': False
+    }
+    return entity
+
+
+def _get_def_entity_body(entity, version):
+    return {
+        'id': 'urn:vcloud:entity:cse:nativeCluster:1234',
+        'entityType': f"{ENTITY_TYPE_PREFIX}:{version}",
+        'name': entity['metadata'].get('name')
+        or entity['metadata'].get('cluster_name'),
+        'externalId': 'urn:vcloud:vapp:1234',
+        'entity': entity,
+        'state': 'RESOLVED',
+        'owner': {'name': 'user1', 'id': 'urn:vcloud:user:1234'},
+        'org': {'name': 'org1', 'id': 'urn:vcloud:org:1234'}
+    }
+
+
+def _load_corpus(file_paths):
+    corpus = []
+    for num_workers in SAMPLE_NUM_WORKERS:
+        corpus.append((f"sample 2.1.0, {num_workers} workers",
+                       _get_def_entity_body(
+                           _get_sample_rde_2_1_0(num_workers), '2.1.0')))
+        corpus.append((f"sample 1.0.0, {num_workers} workers",
+                       _get_def_entity_body(
+                           _get_sample_rde_1_0_0(num_workers), '1.0.0')))
+    for file_path in file_paths:
+        with open(file_path) as f:
+            content = json.load(f)
+        bodies = content['values'] if 'values' in content else [content]
+        for index, body in enumerate(bodies):
+            corpus.append((f"{file_path} [{index}]", body))
+    return corpus
+
+
+def _check_same_output(name, entity_class, entity_dict, slow_to_dict,
+                       slow_from_dict):
+    fast_entity = entity_class.from_dict(copy.deepcopy(entity_dict))
+    slow_entity = slow_from_dict(entity_class, copy.deepcopy(entity_dict))
+    if fast_entity != slow_entity:
+        raise AssertionError(f"{name}: from_dict() output differs")
+    # Key order matters too, since it shows in the json sent to vCD
+    fast_json = json.dumps(fast_entity.to_dict())
+    slow_json = json.dumps(slow_to_dict(slow_entity))
+    if fast_json != slow_json:
+        raise AssertionError(f"{name}: to_dict() output differs")
+
+
+def _time(func, num_iterations):
+    return timeit.timeit(func, number=num_iterations) / num_iterations * 10**6
+
+
+def main(num_iterations, file_paths):
+    slow_to_dict, slow_from_dict = compiled_serializers.get_slow_serializers()
+    corpus = _load_corpus(file_paths)
+
+    print(f"{'':40} {'from_dict usec':>23}   {'to_dict usec':>23}")
+    print(f"{'entity':40} {'slow':>7} {'fast':>7} {'speedup':>7}   "
+          f"{'slow':>7} {'fast':>7} {'speedup':>7}")
+    totals = [0, 0, 0, 0]
+    for name, body in corpus:
+        entity_class = type(DefEntity(**copy.deepcopy(body)).entity)
+        entity_dict = body['entity']
+        _check_same_output(name, entity_class, entity_dict, slow_to_dict,
+                           slow_from_dict)
+        entity = entity_class.from_dict(entity_dict)
+        timings = [
+            _time(lambda: slow_from_dict(entity_class, entity_dict),
+                  num_iterations),
+            _time(lambda: entity_class.from_dict(entity_dict),
+                  num_iterations),
+            _time(lambda: slow_to_dict(entity), num_iterations),
+            _time(lambda: entity.to_dict(), num_iterations)
+        ]
+        totals = [total + timing for total, timing in zip(totals, timings)]
+        print(f"{name[:40]:40} {timings[0]:7.1f} {timings[1]:7.1f} "
+              f"{timings[0] / timings[1]:6.1f}x   {timings[2]:7.1f} "
+              f"{timings[3]:7.1f} {timings[2] / timings[3]:6.1f}x")
+    print(f"\n{len(corpus)} entities, {num_iterations} iterations each, "
+          f"output identical: from_dict {totals[0] / totals[1]:.1f}x, "
+          f"to_dict {totals[2] / totals[3]:.1f}x faster overall")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', dest='num_iterations', type=int, default=1000)
+    parser.add_argument('file_paths', nargs='*')
+    args = parser.parse_args()
+    main(args.num_iterations, args.file_paths)
@@ -0,0 +1,65 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Micro-benchmark of routing requests in request_dispatcher.
+
+Times match_route() for every url in CSE_REQUEST_DISPATCHER_LIST, at every
+api version the url supports. Since routes are looked up in a trie, the cost
+of dispatching a request should not depend on the position of its url in
+the dispatcher list.
+
+Usage: python tests/benchmark_request_dispatcher.py [num_iterations]
+"""
+
+import sys
+import timeit
+
+from container_service_extension.common.constants.shared_constants import RequestMethod  # noqa: E501
+import container_service_extension.server.request_dispatcher as request_dispatcher  # noqa: E501
+
+# Every route is reachable with both flags enabled
+ENABLED_FEATURE_FLAGS = frozenset(['legacy_api', 'non_legacy_api'])
+
+
+def _get_benchmark_cases():
+    cases = []
+    for index, entry in enumerate(
+            request_dispatcher.CSE_REQUEST_DISPATCHER_LIST):
+        url_tokens = [token if not token.startswith('$') else 'some-id'
+                      for token in entry['url_tokens']]
+        for method in RequestMethod:
+            for versions in entry.get(method, {}):
+                for api_version in versions:
+                    cases.append((index, entry['url'], method, url_tokens,
+                                  api_version))
+    return cases
+
+
+def _match(method, url_tokens, api_version):
+    request_dispatcher.match_route(
+        method, url_tokens, api_version, ENABLED_FEATURE_FLAGS)
+
+
+def main(num_iterations):
+    cases = _get_benchmark_cases()
+    timings = []
+    for index, url, method, url_tokens, api_version in cases:
+        total_time = timeit.timeit(
+            lambda: _match(method, url_tokens, api_version),
+            number=num_iterations)
+        timings.append((total_time / num_iterations * 10**6, index, url,
+                        method, api_version))
+
+    print(f"{'usec':>8}  {'pos':>3}  route")
+    for usec, index, url, method, api_version in timings:
+        print(f"{usec:8.2f}  {index:3d}  {method.value} {url} "
+              f"(api version {api_version})")
+    all_usec = [timing[0] for timing in timings]
+    print(f"\n{len(timings)} routes, {num_iterations} iterations each: "
+          f"mean {sum(all_usec) / len(all_usec):.2f} usec, "
+          f"min {min(all_usec):.2f} usec, max {max(all_usec):.2f} usec")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
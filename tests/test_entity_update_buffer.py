@@ -0,0 +1,137 @@
+# container-service-extension
+# Copyright (c) 2022 VMware, Inc. All Rights Reserved.
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Unit tests of the buffer of RDE updates.
+
+The entity service is replaced by a fake that records the changes written,
+no vCD is needed.
+
+Usage:
+    pytest tests/test_entity_update_buffer.py
+"""
+
+import pytest
+
+# Imported first to avoid a circular import through the rde package
+import container_service_extension.common.utils.pyvcloud_utils  # noqa: F401
+import container_service_extension.rde.common.entity_update_buffer as entity_update_buffer  # noqa: E501
+
+ENTITY_ID = 'urn:vcloud:entity:vmware:nativeCluster:1'
+
+
+class FakeEntityService:
+    def __init__(self):
+        self.writes = []
+        self.num_failures_left = 0
+
+    def update_entity(self, entity_id, invoke_hooks=False, changes=None):
+        if self.num_failures_left > 0:
+            self.num_failures_left -= 1
+            raise Exception('write failed')
+        self.writes.append((entity_id, changes))
+        return changes
+
+
+@pytest.fixture
+def entity_svc():
+    return FakeEntityService()
+
+
+@pytest.fixture
+def buffer(entity_svc):
+    return entity_update_buffer.EntityUpdateBuffer(
+        entity_svc, max_delay=3600, max_pending_changes=10)
+
+
+def test_update_is_written_immediately(buffer, entity_svc):
+    changes = {'entity.status.phase': 'CREATE:IN_PROGRESS'}
+    assert buffer.update(ENTITY_ID, changes) == changes
+    assert entity_svc.writes == [(ENTITY_ID, changes)]
+
+
+def test_deferred_update_is_written_with_next_update(buffer, entity_svc):
+    assert buffer.update(
+        ENTITY_ID, {'entity.status.private': 'kubeconfig'}, defer=True) is None
+    assert entity_svc.writes == []
+
+    buffer.update(ENTITY_ID, {'entity.status.phase': 'CREATE:SUCCEEDED'})
+    assert entity_svc.writes == [(ENTITY_ID, {
+        'entity.status.private': 'kubeconfig',
+        'entity.status.phase': 'CREATE:SUCCEEDED'
+    })]
+
+
+def test_changed_key_is_applied_after_earlier_changes(buffer, entity_svc):
+    buffer.update(ENTITY_ID, {'entity.status.nodes': 'old nodes'}, defer=True)
+    buffer.update(ENTITY_ID, {'entity.status': 'status'}, defer=True)
+    buffer.update(ENTITY_ID, {'entity.status.nodes': 'new nodes'})
+
+    _, changes = entity_svc.writes[0]
+    assert list(changes.items()) == [
+        ('entity.status', 'status'),
+        ('entity.status.nodes', 'new nodes')
+    ]
+
+
+def test_too_many_pending_changes_are_written(entity_svc):
+    buffer = entity_update_buffer.EntityUpdateBuffer(
+        entity_svc, max_delay=3600, max_pending_changes=2)
+    assert buffer.update(ENTITY_ID, {'a': 1}, defer=True) is None
+    assert buffer.update(ENTITY_ID, {'b': 2}, defer=True) == {'a': 1, 'b': 2}
+    assert len(entity_svc.writes) == 1
+
+
+def test_old_pending_changes_are_written(entity_svc, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(entity_update_buffer.time, 'monotonic',
+                        lambda: now[0])
+    buffer = entity_update_buffer.EntityUpdateBuffer(
+        entity_svc, max_delay=10, max_pending_changes=10)
+
+    assert buffer.update(ENTITY_ID, {'a': 1}, defer=True) is None
+    now[0] += 9
+    assert buffer.update(ENTITY_ID, {'b': 2}, defer=True) is None
+    now[0] += 1
+    assert buffer.update(ENTITY_ID, {'c': 3}, defer=True) == \
+        {'a': 1, 'b': 2, 'c': 3}
+
+
+def test_failed_write_keeps_changes(buffer, entity_svc):
+    buffer.update(ENTITY_ID, {'a': 1, 'b': 1}, defer=True)
+    entity_svc.num_failures_left = 1
+    with pytest.raises(Exception):
+        buffer.update(ENTITY_ID, {'c': 1})
+    assert entity_svc.writes == []
+
+    buffer.update(ENTITY_ID, {'a': 2})
+    assert entity_svc.writes == [(ENTITY_ID, {'b': 1, 'c': 1, 'a': 2})]
+
+
+def test_changes_made_during_failed_write_take_precedence(entity_svc):
+    buffer = entity_update_buffer.EntityUpdateBuffer(
+        entity_svc, max_delay=3600, max_pending_changes=10)
+
+    def update_entity(entity_id, invoke_hooks=False, changes=None):
+        # Another update of the entity comes in while the write is running
+        buffer.update(entity_id, {'a': 'newer'}, defer=True)
+        raise Exception('write failed')
+
+    entity_svc.update_entity = update_entity
+    with pytest.raises(Exception):
+        buffer.update(ENTITY_ID, {'a': 'older', 'b': 'older'})
+
+    del entity_svc.update_entity
+    buffer.flush(ENTITY_ID)
+    assert entity_svc.writes == [(ENTITY_ID, {'b': 'older', 'a': 'newer'})]
+
+
+def test_flush_all_and_discard(buffer, entity_svc):
+    other_entity_id = 'urn:vcloud:entity:vmware:nativeCluster:2'
+    buffer.update(ENTITY_ID, {'a': 1}, defer=True)
+    buffer.update(other_entity_id, {'b': 2}, defer=True)
+    buffer.discard(other_entity_id)
+
+    buffer.flush_all()
+    assert entity_svc.writes == [(ENTITY_ID, {'a': 1})]
+    assert buffer.flush(ENTITY_ID) is None